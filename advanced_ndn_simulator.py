@@ -6,20 +6,49 @@
 from mininet.net import Mininet
 from mininet.node import Host
 from mininet.link import TCLink
-from mininet.log import setLogLevel, info
+from mininet.log import setLogLevel, info, lg
 from mininet.cli import CLI
 from time import sleep
 import os
-import importlib.util
-import sys
+import socket
+import time
+import routing
+import experiment_config
+from experiment_config import load_config
+import log_analysis
+import fairness
+import producer_log
+import scenario
+import cross_traffic
+import nfd_tables
+import nfd_sampler
+import proc_profiler
+import tracing
+import multipath
+import dashboard
+import dataset
+from consumer_output import GOODPUT_SUFFIX, segment_size_for
+from consumer_scheduler import ConsumerScheduler, Flow, start_offsets
+import argparse
 import datetime
-import shutil
-import threading
+import json
+import numpy as np
 
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 PRODUCER_BIN = os.path.join(PROJECT_ROOT, "producer/bin/ndnput")
 CONSUMER_BIN = os.path.join(PROJECT_ROOT, "consumer/bin/ndnget")
 
+NFD_SOCKET_DIR = "/run/nfd"
+NFD_STARTUP_TIMEOUT = 30     # 等待所有 NFD 就绪的超时 (秒)
+PRODUCER_READY_TIMEOUT = 30  # 等待生产者注册前缀的超时 (秒)
+READY_POLL_INTERVAL = 0.05   # 就绪检查的轮询间隔 (秒)
+LIVE_REPORT_INTERVAL = 1.0   # 实时 goodput 输出间隔 (秒)
+LIVE_REPORT_MAX_FLOWS = 8    # 流数超过该值时只输出每个流结束时的一行摘要
+VERBOSE_MAX_LINKS = 20       # 链路数超过该值时不逐条输出节点和链路
+RESULTS_FILE = 'results.json'
+PRODUCERS_FILE = 'producers.json'
+OUTPUT_SUFFIX = '.out'       # 消费者取回的文件
+
 class NDNHost(Host):
     """扩展的 Host 类，支持 NDN 功能"""
     
@@ -27,22 +56,46 @@ class NDNHost(Host):
         super().__init__(name, **kwargs)
         self.nfd_process = None
         self.app_processes = []
+        self.app_logs = []          # 正在运行的生产者的日志
+        self.nfd_settings = nfd_tables.DEFAULT_SETTINGS
+        self.faces = []
     
+    @property
+    def nfd_config_file(self):
+        return f"/tmp/{self.name}-nfd.conf"
+
+    @property
+    def nfd_socket(self):
+        return os.path.join(NFD_SOCKET_DIR, f"{self.name}.sock")
+
     def start_nfd(self):
-        """启动 NFD"""
-        config_file = f"/tmp/{self.name}-nfd.conf"
-        self.create_nfd_config(config_file)
-        
-        # 启动 NFD
-        nfd_cmd = f"nfd --config {config_file}"
+        """启动 NFD（不等待就绪，配置文件需已由 create_nfd_config 写好）"""
+        # 删除上次运行残留的 socket，避免误判为已就绪
+        if os.path.exists(self.nfd_socket):
+            os.remove(self.nfd_socket)
+
+        nfd_cmd = f"nfd --config {self.nfd_config_file}"
         self.nfd_process = self.popen(nfd_cmd, shell=True)
-        sleep(2)  # 等待 NFD 启动
-        
-        print(f"✓ NFD 启动在 {self.name}")
         return self.nfd_process
+
+    def nfd_ready(self):
+        """检查 NFD 的 unix socket 是否已经可以连接"""
+        if not os.path.exists(self.nfd_socket):
+            return False
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.nfd_socket)
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.close()
     
-    def create_nfd_config(self, config_file):
-        """为节点创建 NFD 配置文件"""
+    def create_nfd_config(self, config_file=None, settings=None):
+        """为节点创建 NFD 配置文件，settings 为 nfd_tables.node_settings 合并后的表与策略设置"""
+        if settings is not None:
+            self.nfd_settings = settings
+        marking = 'yes' if self.nfd_settings['congestion_marking'] else 'no'
         config_content = f"""
 general {{
 }}
@@ -51,26 +104,15 @@ log {{
     default_level INFO
 }}
 
-tables {{
-    cs_max_packets 65536
-    cs_policy lru
-    cs_unsolicited_policy drop-all
-    
-    strategy_choice {{
-        / /localhost/nfd/strategy/best-route
-        /localhost /localhost/nfd/strategy/multicast
-        /localhost/nfd /localhost/nfd/strategy/best-route
-        /ndn/broadcast /localhost/nfd/strategy/multicast
-    }}
-}}
+{nfd_tables.render_tables(self.nfd_settings)}
 
 face_system {{
     general {{
-        enable_congestion_marking yes
+        enable_congestion_marking {marking}
     }}
     
     unix {{
-        path /run/nfd/{self.name}.sock
+        path {self.nfd_socket}
     }}
     
     tcp {{
@@ -120,20 +162,62 @@ rib {{
 }}
 """
         
-        with open(config_file, 'w') as f:
+        with open(config_file or self.nfd_config_file, 'w') as f:
             f.write(config_content)
     
-    def add_route(self, prefix, nexthop):
-        """添加路由"""
-        env = f"NDN_CLIENT_TRANSPORT=unix:///run/nfd/{self.name}.sock"
-        cmd = f"{env} nfdc route add {prefix} {nexthop}"
-        result = self.cmd(cmd)
+    def routes_command(self, routes):
+        """把多条路由拼成一次 shell 调用: 先创建 face，再逐条添加路由"""
+        env = f"NDN_CLIENT_TRANSPORT=unix://{self.nfd_socket}"
+        commands = []
+        options = nfd_tables.face_options(self.nfd_settings)
+        for nexthop in dict.fromkeys(nexthop for _, nexthop, _ in routes):
+            if '://' in nexthop:
+                commands.append(f"nfdc face create {nexthop} {options} >/dev/null")
+                if nexthop not in self.faces:
+                    self.faces.append(nexthop)
+        for prefix, nexthop, cost in routes:
+            cost_arg = f" cost {cost}" if cost is not None else ""
+            commands.append(f"nfdc route add {prefix} {nexthop}{cost_arg} >/dev/null")
+        return f"export {env}; " + " && ".join(commands)
+
+    def add_routes(self, routes):
+        """批量添加路由 [(prefix, nexthop, cost)]，返回未等待的进程"""
+        return self.popen(self.routes_command(routes), shell=True)
+
+    def add_route(self, prefix, nexthop, cost=None):
+        """添加单条路由"""
+        result = self.cmd(self.routes_command([(prefix, nexthop, cost)]))
         print(f"✓ {self.name}: 添加路由 {prefix} -> {nexthop}")
         return result
     
+    def remove_routes_command(self, routes):
+        """删除 routes_command 添加的路由 (face 保留)"""
+        env = f"NDN_CLIENT_TRANSPORT=unix://{self.nfd_socket}"
+        commands = [f"nfdc route remove {prefix} {nexthop} >/dev/null" for prefix, nexthop, _ in routes]
+        return f"export {env}; " + "; ".join(commands)
+
+    def erase_cs_command(self):
+        """清空本节点 NFD 内容缓存的命令"""
+        return f"NDN_CLIENT_TRANSPORT=unix://{self.nfd_socket} nfdc cs erase / >/dev/null"
+
+    def nfd_settings_command(self, settings):
+        """把运行中的 NFD 改为 settings 的命令，没有需要修改的项时返回 None"""
+        commands = nfd_tables.runtime_commands(self.nfd_settings, settings, self.faces)
+        if not commands:
+            return None
+        return f"export NDN_CLIENT_TRANSPORT=unix://{self.nfd_socket}; " + " && ".join(commands)
+
+    def nfd_counters_command(self):
+        """输出转发器与内容缓存计数器的命令"""
+        return f"export NDN_CLIENT_TRANSPORT=unix://{self.nfd_socket}; nfdc status show; nfdc cs info"
+
+    def nfd_sample_command(self):
+        """输出转发器计数器与各 face 计数器的命令，供 nfd_sampler 周期性采样"""
+        return f"export NDN_CLIENT_TRANSPORT=unix://{self.nfd_socket}; nfdc status show; nfdc face list"
+
     def get_nfd_status(self):
         """获取 NFD 状态"""
-        env = f"NDN_CLIENT_TRANSPORT=unix:///run/nfd/{self.name}.sock"
+        env = f"NDN_CLIENT_TRANSPORT=unix://{self.nfd_socket}"
         cmd = f"{env} nfd-status"
         return self.cmd(cmd)
     
@@ -141,10 +225,11 @@ rib {{
         """启动生产者应用"""
         os.makedirs(log_dir, exist_ok=True)
         log_path = os.path.join(log_dir, f"{self.name}.log")
-        env = f"NDN_CLIENT_TRANSPORT=unix:///run/nfd/{self.name}.sock"
+        env = f"NDN_CLIENT_TRANSPORT=unix://{self.nfd_socket}"
         cmd = f"{env} {PRODUCER_BIN} --prefix {prefix} --config {config_file} -d {directory} > {log_path} 2>&1"
         proc = self.popen(cmd, shell=True)
         self.app_processes.append(proc)
+        self.app_logs.append(log_path)
         print(f"✓ 生产者应用启动在 {self.name}: {prefix}")
         return proc
     
@@ -152,10 +237,21 @@ rib {{
         """启动消费者应用"""
         os.makedirs(log_dir, exist_ok=True)
         log_path = os.path.join(log_dir, f"{self.name}.log")
-        env = f"NDN_CLIENT_TRANSPORT=unix:///run/nfd/{self.name}.sock"
-        cmd = f"{env} {CONSUMER_BIN} --prefix {interest_name} --config {config_file} > {log_path} 2>&1"
+        env = f"NDN_CLIENT_TRANSPORT=unix://{self.nfd_socket}"
+        # stdout 是取回的文件内容，stderr 是逐段的诊断输出
+        cmd = f"{env} {CONSUMER_BIN} --prefix {interest_name} --config {config_file} > /dev/null 2> {log_path}"
         return self.cmd(cmd)
     
+    def popen_consumer(self, config_file, interest_name, log_path, output_path=None):
+        """非阻塞地启动消费者，返回 Popen；exec 使 terminate 直接作用于 ndnget
+
+        stdout 是取回的文件内容，写到 output_path 供校验，未指定时丢弃。
+        """
+        env = f"NDN_CLIENT_TRANSPORT=unix://{self.nfd_socket}"
+        cmd = (f"export {env}; exec {CONSUMER_BIN} --prefix {interest_name} --config {config_file}"
+               f" > {output_path or '/dev/null'} 2> {log_path}")
+        return self.popen(cmd, shell=True)
+
     def cleanup(self):
         """清理进程"""
         if self.nfd_process:
@@ -163,15 +259,14 @@ rib {{
         for proc in self.app_processes:
             proc.terminate()
 
-def load_config(config_file='network_config.py'):
-    """加载网络配置"""
-    spec = importlib.util.spec_from_file_location("network_config", config_file)
-    config = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(config)
-    return config
-
 def create_topology_from_config(config):
-    """根据配置创建拓扑"""
+    """根据配置创建拓扑；节点和链路较多时只输出汇总，并暂时关闭 Mininet 的逐条日志"""
+    
+    verbose = len(config.links) <= VERBOSE_MAX_LINKS
+    level = lg.level
+    if not verbose:
+        setLogLevel('warning')
+    start = time.time()
     
     # 创建网络
     net = Mininet(host=NDNHost, link=TCLink)
@@ -181,7 +276,8 @@ def create_topology_from_config(config):
     for name, node_config in config.nodes.items():
         host = net.addHost(name, ip=node_config['ip'])
         hosts[name] = host
-        print(f"✓ 创建节点: {name} ({node_config['ip']})")
+        if verbose:
+            print(f"✓ 创建节点: {name} ({node_config['ip']})")
     
     # 创建链路
     for link_name, link_config in config.links.items():
@@ -199,252 +295,676 @@ def create_topology_from_config(config):
             'use_htb': link_config.get('use_htb', True)
         }
         
+        # 多跳拓扑中每条链路两端可以单独配置 IP
+        if link_config.get('ips'):
+            link_params['params1'] = {'ip': link_config['ips'][0]}
+            link_params['params2'] = {'ip': link_config['ips'][1]}
+        
         # 添加可选参数
         if 'jitter' in link_config and link_config['jitter']:
             link_params['jitter'] = link_config['jitter']
         
         link = net.addLink(node1, node2, **link_params)
         
-        print(f"✓ 创建链路: {link_name}")
-        print(f"  - 带宽: {link_config['bw']} Mbps")
-        print(f"  - 延迟: {link_config['delay']}")
-        print(f"  - 丢包率: {link_config['loss']}%")
-        print(f"  - 队列大小: {link_config['max_queue_size']}")
+        if verbose:
+            print(f"✓ 创建链路: {link_name}")
+            print(f"  - 带宽: {link_config['bw']} Mbps")
+            print(f"  - 延迟: {link_config['delay']}")
+            print(f"  - 丢包率: {link_config['loss']}%")
+            print(f"  - 队列大小: {link_config['max_queue_size']}")
     
+    if not verbose:
+        lg.setLevel(level)
+        print(f"✓ 创建 {len(hosts)} 个节点, {len(config.links)} 条链路, 耗时 {time.time() - start:.2f} 秒")
     return net, hosts
 
+def start_nfd_all(hosts, config=None, timeout=NFD_STARTUP_TIMEOUT):
+    """同时启动所有节点的 NFD，并轮询各自的 socket 直到就绪或超时"""
+    os.makedirs(NFD_SOCKET_DIR, exist_ok=True)
+    for name, host in hosts.items():
+        host.create_nfd_config(settings=nfd_tables.node_settings(config, name) if config else None)
+
+    start = time.time()
+    for host in hosts.values():
+        host.start_nfd()
+
+    latencies = {}
+    failed = {}
+    pending = dict(hosts)
+    deadline = start + timeout
+    while pending:
+        for name, host in list(pending.items()):
+            returncode = host.nfd_process.poll()
+            if returncode is not None:
+                failed[name] = f"进程已退出 (返回码 {returncode})"
+                del pending[name]
+            elif host.nfd_ready():
+                latencies[name] = time.time() - start
+                del pending[name]
+        if not pending or time.time() >= deadline:
+            break
+        sleep(READY_POLL_INTERVAL)
+
+    for name in pending:
+        failed[name] = f"{timeout} 秒内 socket 未就绪"
+    for name, reason in failed.items():
+        tracing.complete('nfd 启动', start, time.time(), process='节点', thread=name, error=reason)
+
+    for name, latency in sorted(latencies.items(), key=lambda item: item[1]):
+        print(f"✓ NFD 启动在 {name}: {latency * 1000:.0f} ms")
+        tracing.complete('nfd 启动', start, start + latency, process='节点', thread=name)
+    for name, reason in failed.items():
+        print(f"❌ NFD 启动失败 {name}: {reason}")
+    print(f"NFD 启动完成: {len(latencies)}/{len(hosts)} 个节点, "
+          f"总耗时 {time.time() - start:.2f} 秒")
+
+    if failed:
+        raise RuntimeError(f"NFD 启动失败的节点: {', '.join(sorted(failed))}")
+    return latencies
+
+def wait_producers_ready(hosts, config, log_dir, timeout=PRODUCER_READY_TIMEOUT, names=None):
+    """等待所有生产者 (或 names 中的生产者) 在日志中报告前缀注册成功"""
+    pending = {name for name in (names or config.applications) if name in hosts}
+    start = time.time()
+    while pending and time.time() - start < timeout:
+        for name in list(pending):
+            log_path = os.path.join(log_dir, f"{name}.log")
+            if os.path.exists(log_path):
+                with open(log_path, errors='replace') as f:
+                    if 'Producer is ready for prefix' in f.read():
+                        pending.discard(name)
+                        tracing.complete('生产者就绪', start, time.time(), process='节点', thread=name)
+        if pending:
+            sleep(READY_POLL_INTERVAL)
+
+    if pending:
+        print(f"❌ 生产者未就绪: {', '.join(sorted(pending))}")
+    else:
+        print(f"✓ 所有生产者就绪, 耗时 {time.time() - start:.2f} 秒")
+    return not pending
+
+def install_routes(hosts, config):
+    """根据拓扑计算 FIB，并对所有节点并行、批量地安装路由"""
+    routing_config = getattr(config, 'routing', None)
+    if routing_config is not None:
+        routes = routing.compute_routes(
+            config,
+            metric=routing_config.get('metric', 'delay'),
+            multipath=routing_config.get('multipath', False)
+        )
+        for node, prefix in routing.unreachable_prefixes(config, routes,
+                                                         routing_config.get('metric', 'delay')):
+            print(f"❌ {node}: 没有到达 {prefix} 的路径")
+    else:
+        routes = {}
+    routing.merge_static_routes(routes, getattr(config, 'routes', {}))
+
+    start = time.time()
+    processes = {}
+    for node_name, node_routes in routes.items():
+        if node_routes and node_name in hosts:
+            processes[node_name] = hosts[node_name].add_routes(node_routes)
+
+    failed = []
+    for node_name, proc in processes.items():
+        _, err = proc.communicate()
+        tracing.complete('安装路由', start, time.time(), process='节点', thread=node_name,
+                         routes=len(routes[node_name]))
+        if proc.returncode != 0:
+            failed.append(node_name)
+            message = err.decode(errors='replace').strip() if err else ''
+            print(f"❌ {node_name}: 路由安装失败 {message}")
+
+    total = sum(len(routes[name]) for name in processes)
+    print(f"路由安装完成: {len(processes) - len(failed)}/{len(processes)} 个节点, "
+          f"{total} 条路由, 耗时 {time.time() - start:.2f} 秒")
+    return routes
+
 def setup_ndn_environment(net, hosts, config, log_dir):
     """设置 NDN 环境"""
     
     print("### 启动网络 ###")
-    net.start()
+    with tracing.span('net.start'):
+        net.start()
     
     print("### 启动 NFD ###")
-    for host in hosts.values():
-        host.start_nfd()
+    with tracing.span('start_nfd'):
+        start_nfd_all(hosts, config)
     
     print("### 配置路由 ###")
-    for node_name, routes in config.routes.items():
-        node = hosts[node_name]
-        for prefix, nexthop in routes:
-            node.add_route(prefix, nexthop)
+    with tracing.span('install_routes'):
+        install_routes(hosts, config)
     
     print("### 启动应用程序 ###")
-    for node_name, app_config in config.applications.items():
-        if node_name in hosts:
-            node = hosts[node_name]
-            node.start_producer(
-                prefix=app_config['prefix'],
-                config_file=app_config['config_file'],
-                directory=app_config['directory'],
-                log_dir=log_dir
-            )
+    with tracing.span('start_producers'):
+        for node_name, app_config in config.applications.items():
+            if node_name in hosts:
+                node = hosts[node_name]
+                node.start_producer(
+                    prefix=app_config['prefix'],
+                    config_file=app_config['config_file'],
+                    directory=app_config['directory'],
+                    log_dir=log_dir
+                )
+    with tracing.span('wait_producers_ready'):
+        wait_producers_ready(hosts, config, log_dir)
     
     return net
 
+def link_params_for(config, node_name):
+    """返回节点所在第一条链路的 (bw, delay)"""
+    for link_config in config.links.values():
+        if node_name in link_config['nodes']:
+            return link_config['bw'], link_config['delay']
+    return None, None
+
+def print_live_goodput(result, sample):
+    """实时输出 ConsumerMonitor 的 goodput 采样"""
+    elapsed, goodput = sample
+    print(f"  [{result.consumer}] {elapsed:6.1f}s 段数 {result.segments} "
+          f"重传 {result.retransmissions} goodput {goodput:.2f} Mbps")
+
+def print_consumer_result(result, bw, delay):
+    """输出单个消费者的结构化结果"""
+    print(f"\n--- {result.consumer} 完成 ---")
+    if result.success:
+        print(f"✓ 测试成功")
+    else:
+        print(f"❌ 测试失败:")
+        for error in result.errors:
+            print(f"  {error}")
+        if result.verify_error:
+            print(f"  内容校验失败: {result.verify_error}")
+    print(f"  传输时间: {result.wall_time:.2f} 秒")
+    print(f"  接收段数: {result.segments} (最大段号 #{result.max_segment})")
+    print(f"  段大小: {result.segment_size} 字节")
+    print(f"  数据量: {result.bytes} 字节")
+    print(f"  重传: {result.retransmissions}, 超时: {result.timeouts}, Nack: {result.nacks}")
+    if result.retx_overhead is not None:
+        print(f"  Interest 开销 (发出的 Interest / 所需段数): {result.retx_overhead:.3f}")
+    if result.startup_s is not None:
+        print(f"  启动开销: {result.startup_s * 1e3:.1f} ms")
+    if result.time_to_first_segment_s is not None:
+        print(f"  首段到达: {result.time_to_first_segment_s * 1e3:.1f} ms")
+    if result.avg_rtt_ms is not None:
+        print(f"  平均 RTT: {result.avg_rtt_ms:.2f} ms")
+    print(f"  链路带宽: {bw} Mbps")
+    print(f"  链路延迟: {delay}")
+    print(f"  传输带宽: {result.goodput_mbps:.2f} Mbps")
+    if result.transfer_goodput_mbps is not None:
+        print(f"  传输阶段带宽 (不含启动): {result.transfer_goodput_mbps:.2f} Mbps")
+    if result.steady_goodput_mbps is not None:
+        print(f"  稳态带宽: {result.steady_goodput_mbps:.2f} Mbps")
+    if bw:
+        print(f"  带宽利用率: {result.goodput_mbps / bw * 100:.1f}%")
+
+def prepare_consumer_config(base_config, consumer_name, test_dir):
+    """基于测试的 ini 为消费者生成专用配置，cwnd/rtt 日志写到测试目录下各自的文件"""
+    cwnd_log = os.path.abspath(os.path.join(test_dir, f"{consumer_name}-cwnd.log"))
+    rtt_log = os.path.abspath(os.path.join(test_dir, f"{consumer_name}-rtt.log"))
+    config_path = os.path.join(test_dir, f"{consumer_name}-conconfig.ini")
+    experiment_config.derive_ini(
+        base_config, {'pipeline': {'log-cwnd': cwnd_log, 'log-rtt': rtt_log}}, config_path
+    )
+    return config_path
+
+def write_flows_file(test_dir, test, flows):
+    """记录测试中每个流的元数据，供 log_analysis 对齐各流的时间轴"""
+    records = [{
+        'consumer': flow.name,
+        'host': flow.host,
+        'interest': flow.interest,
+        'test': test['name'],
+        'config': test['config'],
+        'start_offset': flow.start_offset,
+        'start_time': flow.start_time,
+        'status': flow.status,
+    } for flow in flows]
+    with open(os.path.join(test_dir, log_analysis.FLOWS_FILE), 'w') as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+
+def schedule_flows(config, test, test_dir):
+    """为测试中的每个流生成 Flow，按 test['arrival'] 安排启动时间
+
+    test['repeat'] 为每个消费者并发的流数；同一节点上的多个流命名为 <consumer>-<n>。
+    test['verify'] 为 False 时不保存取回的文件，也不做内容校验。
+    """
+    verify = test.get('verify', True)
+    pairs = routing.flows_of_test(test) * test.get('repeat', 1)
+    arrival = dict(test.get('arrival', {}))
+    offsets = start_offsets(len(pairs), arrival.pop('mode', 'together'), **arrival)
+    counts = {}
+    flows = []
+    for (consumer_name, interest_name), offset in zip(pairs, offsets):
+        counts[consumer_name] = counts.get(consumer_name, 0) + 1
+        name = consumer_name if counts[consumer_name] == 1 else f"{consumer_name}-{counts[consumer_name]}"
+        flows.append(Flow(
+            name=name, host=consumer_name, interest=interest_name,
+            config_file=prepare_consumer_config(test['config'], name, test_dir),
+            log_path=os.path.join(test_dir, f"{name}.log"),
+            start_offset=offset,
+            segment_size=segment_size_for(config, interest_name),
+            output_path=os.path.join(test_dir, f"{name}{OUTPUT_SUFFIX}") if verify else None,
+        ))
+    return flows
+
+def start_dashboard(hosts, config, test, test_dir, flows, title):
+    """为测试的所有流和正在运行的生产者启动实时面板"""
+    live = dashboard.Dashboard(title)
+    for flow in flows:
+        source_path = source_file_for(config, flow.interest, test.get('producer'))
+        live.add_flow(flow.name, flow.log_path,
+                      os.path.join(test_dir, f"{flow.name}-cwnd.log"), os.path.join(test_dir, f"{flow.name}-rtt.log"),
+                      expected_bytes=os.path.getsize(source_path) if source_path and os.path.exists(source_path) else None,
+                      segment_size=flow.segment_size)
+    for name, host in hosts.items():
+        for log_path in host.app_logs:
+            label = name if len(host.app_logs) == 1 else f"{name} ({os.path.basename(os.path.dirname(log_path))})"
+            live.add_producer(label, log_path)
+    return live.start()
+
+def trace_flow(flow, result):
+    """把流的传输区间和启动阶段记录为 trace 中该流轨道上的区间"""
+    if not flow.start_time:
+        return
+    tracing.complete(result.test, flow.start_time, flow.start_time + (result.wall_time or 0.0),
+                     process='流', thread=flow.name, category='flow', interest=flow.interest,
+                     status=flow.status, segments=result.segments, goodput_mbps=result.goodput_mbps)
+    if result.startup_s is not None:
+        tracing.complete('启动', flow.start_time, flow.start_time + result.startup_s,
+                         process='流', thread=flow.name, category='flow')
+
+def run_test(hosts, config, test, test_dir, label=None):
+    """运行一个测试，日志写到 test_dir，返回每个流的 ConsumerResult 列表"""
+    if test.get('sources'):
+        return run_multisource_test(hosts, config, test, test_dir, label)
+    with tracing.span(f"测试 {label or test['name']}"):
+        return _run_test(hosts, config, test, test_dir, label)
+
+def _run_test(hosts, config, test, test_dir, label=None):
+    print(f"\n--- 测试: {label or test['name']} ---")
+    print(f"描述: {test['description']}")
+
+    os.makedirs(test_dir, exist_ok=True)
+    flows = schedule_flows(config, test, test_dir)
+    for flow in flows:
+        if os.path.exists(flow.log_path):
+            os.remove(flow.log_path)
+    # 测试开始时先写一次 flows.json，供 dashboard.py 连接正在运行的测试
+    write_flows_file(test_dir, test, flows)
+    show_dashboard = test.get('dashboard', False)
+    verbose = len(flows) <= LIVE_REPORT_MAX_FLOWS and not show_dashboard
+    live = None
+
+    def launch(flow):
+        if verbose:
+            print(f"消费者 {flow.name} 请求: {flow.interest}")
+        return hosts[flow.host].popen_consumer(flow.config_file, flow.interest, flow.log_path,
+                                               flow.output_path)
+
+    def on_result(flow, result):
+        result.test = label or test['name']
+        trace_flow(flow, result)
+        if live:
+            live.flow_exited(flow.name)
+        elif verbose:
+            bw, delay = link_params_for(config, flow.host)
+            print_consumer_result(result, bw, delay)
+        else:
+            print(f"  [{flow.name}] {flow.status} {result.segments} 段 "
+                  f"{result.wall_time:.2f} 秒 {result.goodput_mbps:.2f} Mbps")
+        result.write_goodput(os.path.join(test_dir, f"{flow.name}{GOODPUT_SUFFIX}"))
+
+    scheduler = ConsumerScheduler(
+        launch, timeout=test.get('timeout'), max_running=test.get('max_running'),
+        interval=LIVE_REPORT_INTERVAL, on_sample=print_live_goodput if verbose else None,
+    )
+    if test.get('nfd'):
+        apply_nfd_settings(hosts, config, test)
+    counters_before = read_nfd_counters(hosts)
+    origin = time.time()
+    runner = None
+    if test.get('scenario'):
+        runner = scenario.ScenarioRunner(
+            config.scenarios[test['scenario']], config.links,
+            lambda link_name, state: apply_link_state(hosts, config, link_name, state),
+        ).start(origin)
+    background = None
+    sampler = None
+    sample_interval = test.get('nfd_sample_interval', nfd_sampler.DEFAULT_INTERVAL)
+    if sample_interval:
+        sampler = nfd_sampler.NfdSampler(hosts, sample_interval).start()
+    try:
+        if test.get('cross_traffic'):
+            background = cross_traffic.CrossTraffic(
+                hosts, config, config.cross_traffic[test['cross_traffic']], test_dir,
+                timeout=test.get('timeout')).start(origin)
+        if show_dashboard:
+            live = start_dashboard(hosts, config, test, test_dir, flows, label or test['name'])
+        with tracing.span('scheduler.run', flows=len(flows)):
+            results = scheduler.run(flows, on_result, origin)
+    finally:
+        if live:
+            live.stop()
+        if background:
+            background.stop()
+        applied = runner.stop() if runner else []
+        samples = sampler.stop() if sampler else []
+        counters_after = read_nfd_counters(hosts)
+        if test.get('nfd'):
+            apply_nfd_settings(hosts, config)
+    order = {flow.name: i for i, flow in enumerate(flows)}
+    results.sort(key=lambda result: order[result.consumer])
+    with tracing.span('verify_outputs'):
+        verify_outputs(config, flows, results, keep=test.get('keep_output', False),
+                       producer=test.get('producer'))
+    if runner:
+        analyze_scenario(config, test, test_dir, flows, results, applied)
+    if background:
+        analyze_cross_traffic(config, test, test_dir, flows, results, origin)
+    analyze_nfd_counters(test_dir, flows, results, counters_before, counters_after)
+    if samples:
+        nfd_sampler.print_summary(*nfd_sampler.write_rates(test_dir, samples))
+
+    write_flows_file(test_dir, test, flows)
+    log_analysis.write_merged_cwnd(test_dir)
+    if len(flows) > 1:
+        fairness_result = fairness.analyze_test(test_dir, config)
+        fairness.print_summary(fairness_result)
+        fairness.write_result(test_dir, fairness_result)
+    return results
+
+def start_sources(hosts, config, sources, prefix, log_dir):
+    """在每个数据源上用共享前缀再启动一个生产者，日志写到 log_dir/<节点>.log"""
+    procs = {}
+    for name in sources:
+        if name not in config.applications:
+            raise ValueError(f"数据源 {name} 没有 applications 配置")
+        app_config = config.applications[name]
+        procs[name] = hosts[name].start_producer(prefix, app_config['config_file'],
+                                                 app_config['directory'], log_dir)
+    wait_producers_ready(hosts, config, log_dir, names=sources)
+    return procs
+
+def stop_sources(hosts, procs, log_dir):
+    """停止 start_sources 启动的生产者"""
+    for name, proc in procs.items():
+        proc.terminate()
+        proc.wait()
+        hosts[name].app_processes.remove(proc)
+        hosts[name].app_logs.remove(os.path.join(log_dir, f"{name}.log"))
+
+def run_multisource_test(hosts, config, test, test_dir, label=None):
+    """同一数据集由多个生产者提供: 依次用全部数据源和单个数据源运行，比较吞吐量，写 test_dir/multipath.json"""
+    label = label or test['name']
+    prefixes = {multipath.shared_prefix(interest) for interest in multipath.test_interests(test)}
+    if len(prefixes) != 1:
+        raise ValueError(f"多数据源测试的 Interest 需要共用一个前缀: {', '.join(sorted(prefixes))}")
+    prefix = prefixes.pop()
+    metric = (getattr(config, 'routing', None) or {}).get('metric', 'delay')
+
+    summaries = {}
+    all_results = []
+    for mode, sources in multipath.modes(test):
+        mode_dir = os.path.join(test_dir, mode)
+        os.makedirs(mode_dir, exist_ok=True)
+        erase_content_stores(hosts)
+        procs = start_sources(hosts, config, sources, prefix, mode_dir)
+        routes = {name: node_routes for name, node_routes
+                  in routing.source_routes(config, prefix, sources, metric).items() if node_routes}
+        route_procs = {name: hosts[name].add_routes(node_routes) for name, node_routes in routes.items()}
+        for name, proc in route_procs.items():
+            if proc.wait() != 0:
+                print(f"❌ {name}: 到 {prefix} 的路由安装失败")
+        try:
+            results = run_test(hosts, config, multipath.mode_test(test, sources), mode_dir, f"{label}/{mode}")
+        finally:
+            remove_procs = [hosts[name].popen(hosts[name].remove_routes_command(node_routes), shell=True)
+                            for name, node_routes in routes.items()]
+            for proc in remove_procs:
+                proc.wait()
+            stop_sources(hosts, procs, mode_dir)
+
+        counts, owners = multipath.segment_sources(
+            [(name, os.path.join(mode_dir, f"{name}.log")) for name in sources], prefix)
+        multipath.write_segment_sources(os.path.join(mode_dir, multipath.SEGMENT_SOURCES_FILE),
+                                        multipath.owner_runs(owners, sources))
+        summaries[mode] = multipath.summarize(sources, results, counts, owners)
+        all_results.extend(results)
+
+    result = multipath.compare(summaries)
+    multipath.print_summary(result)
+    multipath.write_result(test_dir, result)
+    return all_results
+
+def apply_link_state(hosts, config, link_name, state):
+    """把链路两端的 TCIntf 改为 state 中的参数，或者断开/恢复链路"""
+    link_config = config.links[link_name]
+    node1, node2 = (hosts[name] for name in link_config['nodes'])
+    for intf1, intf2 in node1.connectionsTo(node2)[:1]:
+        for intf in (intf1, intf2):
+            if state['down']:
+                intf.ifconfig('down')
+                continue
+            intf.ifconfig('up')
+            params = {key: value for key, value in state.items()
+                      if key in scenario.LINK_PARAMS and value is not None}
+            intf.config(use_htb=link_config.get('use_htb', True), **params)
+
+def goodput_series(result):
+    """ConsumerResult 的实时 goodput 采样 -> (相对流启动的秒数, Mbps)"""
+    samples = np.array(result.goodput_samples, dtype=np.float64).reshape(-1, 2)
+    return samples[:, 0], samples[:, 1]
+
+def analyze_scenario(config, test, test_dir, flows, results, applied):
+    """计算各流对场景事件的反应与恢复时间，写到 test_dir/scenario.json"""
+    flow_series = []
+    for flow, result in zip(flows, results):
+        cwnd_path = os.path.join(test_dir, f"{flow.name}-cwnd.log")
+        cwnd = None
+        if os.path.exists(cwnd_path):
+            data = log_analysis.load_cwnd(cwnd_path)
+            cwnd = (np.asarray(data['time']), np.asarray(data['cwnd']))
+        flow_series.append({
+            'name': flow.name, 'host': flow.host, 'interest': flow.interest,
+            'start_time': flow.start_time or 0.0,
+            'goodput': goodput_series(result),
+            'cwnd': cwnd,
+            'pipeline_offset': result.startup_s or 0.0,
+        })
+    recovery = scenario.analyze(applied, config, flow_series)
+    scenario.print_summary(recovery)
+    scenario.write_result(test_dir, config.scenarios[test['scenario']], applied, recovery)
+
+def analyze_cross_traffic(config, test, test_dir, flows, results, origin):
+    """统计背景流的吞吐量及其与 NDN 流在共享链路上的份额，写到 test_dir/cross_traffic.json"""
+    ndn_flows = [{
+        'name': flow.name, 'host': flow.host, 'interest': flow.interest,
+        'start_time': flow.start_time or origin,
+        'goodput': goodput_series(result),
+    } for flow, result in zip(flows, results) if flow.start_time]
+    result = cross_traffic.analyze(config, config.cross_traffic[test['cross_traffic']],
+                                   test_dir, origin, ndn_flows)
+    cross_traffic.print_summary(result)
+    cross_traffic.write_result(test_dir, result)
+
+def source_file_for(config, interest_name, producer=None):
+    """Interest 对应的生产者目录中的原文件；producer 指定时 (多数据源的共享前缀) 去掉第一个名称组件"""
+    if producer is None:
+        producer = routing.producer_of(config, interest_name)
+        if producer is None:
+            return None
+        prefix = config.applications[producer]['prefix']
+    else:
+        prefix = multipath.shared_prefix(interest_name)
+    app = config.applications[producer]
+    relative = interest_name.strip('/')[len(prefix.strip('/')):].strip('/')
+    return os.path.join(app['directory'], relative)
+
+def verify_outputs(config, flows, results, keep=False, producer=None):
+    """按原文件的分块哈希清单校验每个流取回的文件；校验通过的输出默认删除，失败的保留"""
+    for flow, result in zip(flows, results):
+        if not flow.output_path or not os.path.exists(flow.output_path) or not result.completed:
+            continue
+        source_path = source_file_for(config, flow.interest, producer)
+        check = dataset.verify_against_source(flow.output_path, source_path, flow.segment_size) \
+            if source_path else None
+        if check is None:
+            print(f"⚠ {flow.name}: 找不到原文件，未校验")
+            continue
+        result.verified = check['ok']
+        if check['ok']:
+            if not keep:
+                os.remove(flow.output_path)
+        else:
+            result.verify_error = f"{check['reason']}，第一个不一致的段 #{check['first_bad_segment']}"
+            print(f"❌ {flow.name}: 内容校验失败: {result.verify_error} (保留 {flow.output_path})")
+
+def print_totals(results):
+    """输出所有消费者的汇总统计；失败或内容损坏的传输不计入吞吐量"""
+    if not results:
+        return
+    failed = [result for result in results if not result.success]
+    results = [result for result in results if result.success]
+    total_time = sum(result.wall_time or 0.0 for result in results)
+    total_bytes = sum(result.bytes for result in results)
+    print("\n=== 测试统计 ===")
+    if failed:
+        print(f"失败或内容损坏的流: {len(failed)} 个 (不计入统计)")
+    print(f'time: {total_time:.2f}')
+    print(f"总传输数据量: {total_bytes} 字节")
+    if total_bytes > 0 and total_time > 0:
+        print(f"总体平均传输速率: {total_bytes * 8 / total_time / 1e6:.2f} Mbps")
+
 def run_tests(hosts, config, log_dir):
-    """运行测试"""
+    """运行测试，每个测试的日志写到 log_dir/<测试名>/，返回每个消费者的 ConsumerResult 列表"""
     
     print("### 运行测试 ###")
     
-    total_bw = 0.0
-    total_delay = 0.0
-    total_time = 0.0
-    total_bytes = 0
-    test_count = 0
-    
+    all_results = []
     for test in config.tests:
-        print(f"\n--- 测试: {test['name']} ---")
-        print(f"描述: {test['description']}")
+        all_results.extend(run_test(hosts, config, test, os.path.join(log_dir, test['name'])))
+    print_totals(all_results)
+    return all_results
 
-        # 支持test['consumer'] 为字符串或列表
-        consumers = test['consumer']
-        if isinstance(consumers, str):
-            consumers = [consumers]
-        
-        # 支持test['interest'] 为字符串或列表
-        interests = test['interest']
-        if not isinstance(interests, list):
-            interests = [interests] * len(consumers)
-        
-        threads = []
-        results = {}
-        start_times = {}
-        end_times = {}
-
-        def consumer_task(consumer_name, interest_name):
-            consumer = hosts[consumer_name]
-            print(f"消费者 {consumer_name} 请求: {interest_name}")
-            import time
-            start_times[consumer_name] = time.time()
-            result = consumer.start_consumer(test['config'], interest_name, log_dir)
-            end_times[consumer_name] = time.time()
-            results[consumer_name] = result
-        
-        # 启动所有 consumer 线程
-        for idx, consumer_name in enumerate(consumers):
-            thread = threading.Thread(target=consumer_task, args=(consumer_name, interests[idx]))
-            threads.append(thread)
-            thread.start()
-
-        # 等待所有 consumer 完成
-        for thread in threads:
-            thread.join()
-
-        # 针对每个 consumer 进行统计和输出
-        for consumer_name in consumers:
-            transfer_time = end_times[consumer_name] - start_times[consumer_name]
-            result = results[consumer_name]
-            print(f"\n--- {consumer_name} 完成 ---")
-            print(f"传输时间：{transfer_time:.2f} 秒")
-
-            # 获取链路参数
-            bw = None
-            delay = None
-            for link_name, link_config in config.links.items():
-                if consumer_name in link_config['nodes']:
-                    bw = link_config['bw']
-                    delay = link_config['delay']
-                    break
-
-            # 分析结果并提取传输信息
-            bytes_transferred = 0
-            segments_received = 0
-            max_segment_number = 0
-
-            if "ERROR" in result:
-                print(f"❌ 测试失败:")
-                print(result)
-            else:
-                print(f"✓ 测试成功")
-            
-            # 调试输出：显示完整的consumer输出
-            print(f"  --- Consumer 完整输出 (调试用) ---")
-            for i, line in enumerate(result.split('\n')):
-                if line.strip():
-                    print(f"  [{i}] {line}")
-            print(f"  --- 输出结束 ---")
-                
-            # 提取传输统计信息
-            for line in result.split('\n'):
-                if any(keyword in line for keyword in ['Published', 'Received', 'segments', 'bytes']):
-                    print(f"  {line}")
-                
-                # 提取segment号码 - 从 "Received segment #206" 格式中提取
-                if 'received segment #' in line.lower():
-                    import re
-                    segment_match = re.search(r'segment\s*#(\d+)', line, re.IGNORECASE)
-                    if segment_match:
-                        segment_num = int(segment_match.group(1))
-                        max_segment_number = max(max_segment_number, segment_num)
-                
-                # 提取字节数 - 改进的正则表达式
-                if 'bytes' in line.lower():
-                    import re
-                    bytes_patterns = [
-                        r'(\d+)\s*bytes',
-                        r'bytes:\s*(\d+)',
-                        r'received\s+(\d+)',
-                        r'transferred\s+(\d+)',
-                        r'size\s*:\s*(\d+)'
-                    ]
-                    for pattern in bytes_patterns:
-                        bytes_match = re.search(pattern, line, re.IGNORECASE)
-                        if bytes_match:
-                            bytes_transferred = int(bytes_match.group(1))
-                            break
-                
-                # 提取段数 - 改进的正则表达式
-                if 'segment' in line.lower() and 'received segment #' not in line.lower():
-                    import re
-                    segment_patterns = [
-                        r'(\d+)\s*segments?',
-                        r'segments?\s*:\s*(\d+)',
-                        r'received\s+(\d+)\s+segments?',
-                        r'total\s+segments?\s*:\s*(\d+)',
-                        r'segments?\s+received\s*:\s*(\d+)'
-                    ]
-                    for pattern in segment_patterns:
-                        segments_match = re.search(pattern, line, re.IGNORECASE)
-                        if segments_match:
-                            segments_received = int(segments_match.group(1))
-                            break
-            
-            # 如果找到了segment号码，计算总段数（segment从0开始，所以+1）
-            if max_segment_number > 0:
-                calculated_segments = max_segment_number + 1
-                print(f"  最大段号: #{max_segment_number}")
-                print(f"  计算的段数: {calculated_segments} (基于最大段号+1)")
-                segments_received = max(segments_received, calculated_segments)
-            
-            print(f"  链路带宽: {bw} Mbps")
-            print(f"  链路延迟: {delay}")
-            print(f"  传输时间: {transfer_time:.2f} 秒")
-            
-            if segments_received > 0:
-                print(f"  接收段数: {segments_received}")
-                
-                segment_size = 8192  # NDN默认段大小
-                for line in result.split('\n'):
-                    if 'segment size' in line.lower() or 'payload size' in line.lower():
-                        import re
-                        size_match = re.search(r'(\d+)', line)
-                        if size_match:
-                            segment_size = int(size_match.group(1))
-                            break
-                
-                calculated_bytes = segments_received * segment_size
-                print(f"  段大小: {segment_size} 字节")
-                print(f"  计算数据量: {calculated_bytes} 字节 ({segments_received} × {segment_size})")
-                
-                if transfer_time > 0:
-                    segment_based_bw = calculated_bytes * 8 / transfer_time / 1e6
-                    print(f"  基于段的传输带宽: {segment_based_bw:.2f} Mbps")
-                    if bw and bw > 0:
-                        utilization = (segment_based_bw / bw) * 100
-                        print(f"  带宽利用率: {utilization:.1f}%")
-            
-            if bytes_transferred > 0 and transfer_time > 0:
-                reported_bw = bytes_transferred * 8 / transfer_time / 1e6
-                print(f"  报告的传输带宽: {reported_bw:.2f} Mbps")
-                print(f"  报告的数据量: {bytes_transferred} 字节")
-            
-            total_bw += bw if bw else 0
-            total_delay += float(delay.replace('ms','')) if delay else 0
-            total_time += transfer_time
-            
-            # 优先使用基于段的数据量，否则使用报告的字节数
-            if segments_received > 0:
-                segment_size = 8192  # 默认NDN段大小
-                calculated_bytes = segments_received * segment_size
-                total_bytes += calculated_bytes
-            else:
-                total_bytes += bytes_transferred
-                
-            test_count += 1
-            sleep(2)  # 测试间隔
-        
-    if test_count > 0:
-        print("\n=== 测试统计 ===")
-        print(f'time: {total_time:.2f}')
-        print(f"总传输数据量: {total_bytes} 字节")
-        if total_bytes > 0 and total_time > 0:
-            print(f"总体平均传输速率: {total_bytes * 8 / total_time / 1e6:.2f} Mbps")
+def apply_nfd_settings(hosts, config, test=None):
+    """按测试的 'nfd' 覆盖项修改运行中的 NFD (test 为 None 时恢复为网络配置的设置)"""
+    procs = {}
+    targets = {}
+    for name, host in hosts.items():
+        targets[name] = nfd_tables.node_settings(config, name, test)
+        skipped = nfd_tables.startup_only_changes(host.nfd_settings, targets[name])
+        if skipped:
+            print(f"⚠ {name}: {', '.join(skipped)} 只能在 NFD 启动时设置，本测试中不生效")
+            targets[name] = dict(targets[name], **{key: host.nfd_settings[key] for key in skipped})
+        command = host.nfd_settings_command(targets[name])
+        if command:
+            procs[name] = host.popen(command, shell=True)
+    failed = [name for name, proc in procs.items() if proc.wait() != 0]
+    for name in procs:
+        if name not in failed:
+            hosts[name].nfd_settings = targets[name]
+    if failed:
+        print(f"⚠ 修改 NFD 设置失败: {', '.join(failed)}")
+
+def read_nfd_counters(hosts):
+    """并行读取所有节点的转发器与内容缓存计数器，返回 {node: {counter: value}}"""
+    procs = {name: host.popen(host.nfd_counters_command(), shell=True) for name, host in hosts.items()}
+    counters = {}
+    for name, proc in procs.items():
+        output, _ = proc.communicate()
+        counters[name] = nfd_tables.parse_counters(output.decode(errors='replace') if output else '')
+    return counters
+
+def analyze_nfd_counters(test_dir, flows, results, before, after):
+    """测试期间各节点的计数器增量、内容缓存命中率，以及同一对象重复获取的加速比"""
+    fetches = [(flow.interest, flow.start_time, result.wall_time, result.goodput_mbps)
+               for flow, result in zip(flows, results) if result.success and flow.start_time]
+    result = {'nodes': nfd_tables.counter_delta(before, after), 'cache': nfd_tables.cache_speedup(fetches)}
+    nfd_tables.print_summary(result)
+    nfd_tables.write_result(test_dir, result)
+
+def erase_content_stores(hosts):
+    """并行清空所有节点的 NFD 内容缓存，使每次试验都从冷缓存开始"""
+    procs = {name: host.popen(host.erase_cs_command(), shell=True) for name, host in hosts.items()}
+    failed = [name for name, proc in procs.items() if proc.wait() != 0]
+    if failed:
+        print(f"⚠ 清空内容缓存失败: {', '.join(failed)}")
+
+def load_batch(batch_file, config, trials=None):
+    """读取批处理队列，返回 [(label, test, trial)]
+
+    批处理文件为 JSON:
+        {"trials": 3,
+         "runs": [{"test": "multi_test"},
+                  {"test": "multi_test", "label": "aimd", "set": {"pipeline.pipeline-type": "aimd"}},
+                  {"test": "multi_test", "config": "other-conconfig.ini", "trials": 5}]}
+    没有批处理文件时，对 config.tests 中的每个测试运行 trials 次。
+    """
+    tests = {test['name']: test for test in config.tests}
+    if batch_file:
+        with open(batch_file) as f:
+            batch = json.load(f)
+    else:
+        batch = {'runs': [{'test': name} for name in tests]}
+    default_trials = trials or batch.get('trials', 1)
+
+    queue = []
+    labels = set()
+    for run in batch['runs']:
+        test = dict(tests[run['test']])
+        if 'config' in run:
+            test['config'] = os.path.abspath(run['config'])
+        if run.get('set'):
+            test['overrides'] = experiment_config.parse_overrides(run['set'])
+        label = run.get('label', run['test'])
+        while label in labels:
+            label = f"{label}-{len(labels)}"
+        labels.add(label)
+        for trial in range(1, run.get('trials', default_trials) + 1):
+            queue.append((label, test, trial))
+    return queue
+
+def run_batch(hosts, config, log_dir, queue):
+    """在同一个网络上依次运行队列中的测试，每次试验前清空内容缓存，日志写到 log_dir/<label>/trial-<n>/"""
+    print(f"### 批处理: {len(queue)} 次试验 ###")
+    all_results = []
+    for index, (label, test, trial) in enumerate(queue, 1):
+        trial_name = os.path.join(label, f"trial-{trial}")
+        trial_dir = os.path.join(log_dir, trial_name)
+        os.makedirs(trial_dir, exist_ok=True)
+        if 'overrides' in test:
+            derived = experiment_config.derive_ini(
+                test['config'], test['overrides'], os.path.join(trial_dir, 'conconfig.ini'))
+            test = dict(test, config=os.path.abspath(derived))
+        if test.get('cold_cache', True):
+            with tracing.span('erase_content_stores'):
+                erase_content_stores(hosts)
+        print(f"\n[{index}/{len(queue)}] {trial_name}")
+        results = run_test(hosts, config, test, trial_dir, label=trial_name)
+        write_results(trial_dir, results)
+        all_results.extend(results)
+    print_totals(all_results)
+    return all_results
 
 def show_network_status(hosts):
     """显示网络状态"""
     
     print("\n### 网络状态 ###")
     
+    counters = read_nfd_counters(hosts)
     for name, host in hosts.items():
         print(f"\n--- {name} ---")
         status = host.get_nfd_status()
         
         # 显示关键统计信息
+        node_counters = counters.get(name, {})
         print("统计信息:")
-        for line in status.split('\n'):
-            if any(keyword in line.lower() for keyword in ['interests', 'data', 'nacks', 'uptime']):
-                print(f"  {line.strip()}")
+        for key in ('nInInterests', 'nOutInterests', 'nInData', 'nOutData', 'nInNacks', 'nOutNacks',
+                    'nSatisfiedInterests', 'nUnsatisfiedInterests', 'nPitEntries', 'nCsEntries',
+                    'nHits', 'nMisses'):
+            if key in node_counters:
+                print(f"  {key}={node_counters[key]}")
         
         # 显示路由表
         print("路由表:")
@@ -458,59 +978,114 @@ def show_network_status(hosts):
             elif in_fib and not line.startswith('  '):
                 break
 
+def write_results(log_dir, results):
+    """把所有消费者的结构化结果写到 log_dir/results.json"""
+    os.makedirs(log_dir, exist_ok=True)
+    with open(os.path.join(log_dir, RESULTS_FILE), 'w') as f:
+        json.dump([result.to_dict() for result in results], f, indent=2, ensure_ascii=False)
+
+def analyze_producer_logs(config, log_dir):
+    """分析所有生产者日志，输出摘要并写到 log_dir/producers.json"""
+    results = {}
+    for name in config.applications:
+        log_path = os.path.join(log_dir, f"{name}.log")
+        if os.path.exists(log_path):
+            results[name] = producer_log.analyze_producer_log(log_path)
+            producer_log.print_summary(results[name])
+    with open(os.path.join(log_dir, PRODUCERS_FILE), 'w') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='高级 NDN 网络模拟器')
+    parser.add_argument('config_file', nargs='?', default='network_config.py', help='网络配置文件')
+    parser.add_argument('--log-dir', help='日志目录，默认为 logs/<时间>_<文件名>')
+    parser.add_argument('--no-cli', action='store_true', help='测试结束后不进入 Mininet CLI')
+    parser.add_argument('--batch', help='批处理队列 (JSON)，在同一个网络上依次运行，不进入 CLI')
+    parser.add_argument('--trials', type=int, help='每个测试重复的次数 (批处理模式)')
+    parser.add_argument('--dashboard', action='store_true', help='测试期间显示实时面板')
+    parser.add_argument('--profile-interval', type=float, default=proc_profiler.DEFAULT_INTERVAL,
+                        help='nfd / ndnput / ndnget 资源采样间隔 (秒)，0 为不采样')
+    return parser.parse_args(argv)
+
 def main():
-    if len(sys.argv) > 1:
-        config_file = sys.argv[1]
-    else:
-        config_file = 'network_config.py'
+    args = parse_args()
+    config_file = args.config_file
     
     setLogLevel('info')
     
+    profiler = None
+    log_dir = None
     try:
         # 加载配置
         print(f"### 加载配置文件: {config_file} ###")
-        config = load_config(config_file)
+        with tracing.span('load_config'):
+            config = load_config(config_file)
+        if args.dashboard:
+            for test in config.tests:
+                test['dashboard'] = True
         
         # 创建拓扑
         print("### 创建网络拓扑 ###")
-        net, hosts = create_topology_from_config(config)
+        with tracing.span('create_topology_from_config'):
+            net, hosts = create_topology_from_config(config)
 
         # 创建logs目录
-        start_time_str = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        file_name = os.path.basename(str(config.tests[0]['interest'][0]))
-        log_dir = os.path.join("logs", f"{start_time_str}_{file_name}")
+        log_dir = args.log_dir
+        if log_dir is None:
+            start_time_str = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            file_name = os.path.basename(routing.flows_of_test(config.tests[0])[0][1])
+            log_dir = os.path.join("logs", f"{start_time_str}_{file_name}")
+        with tracing.span('write_run_metadata'):
+            experiment_config.write_run_metadata(log_dir, config, config_file)
+        if args.profile_interval:
+            profiler = proc_profiler.ProcessProfiler(hosts, log_dir, args.profile_interval).start()
         
         # 设置 NDN 环境
-        net = setup_ndn_environment(net, hosts, config, log_dir)
-        
-        # 等待系统稳定
-        sleep(5)
+        with tracing.span('setup_ndn_environment'):
+            net = setup_ndn_environment(net, hosts, config, log_dir)
         
         # 运行测试
-        run_tests(hosts, config, log_dir)
+        batch = args.batch or args.trials
+        if batch:
+            with tracing.span('run_batch'):
+                results = run_batch(hosts, config, log_dir, load_batch(args.batch, config, args.trials))
+        else:
+            with tracing.span('run_tests'):
+                results = run_tests(hosts, config, log_dir)
+        write_results(log_dir, results)
+        with tracing.span('analyze_producer_logs'):
+            analyze_producer_logs(config, log_dir)
+        if profiler:
+            proc_profiler.print_summary(profiler.stop())
+            profiler = None
         
         # 显示状态
-        show_network_status(hosts)
+        with tracing.span('show_network_status'):
+            show_network_status(hosts)
     
-        CLI(net)
+        if not (args.no_cli or batch):
+            with tracing.span('CLI'):
+                CLI(net)
     except Exception as e:
         print(f"错误: {e}")
         import traceback
         traceback.print_exc()
+        # sweep.py 和 benchmark.py 用 check=True 运行本脚本，失败必须以非零状态退出 (清理仍在 finally 中进行)
+        raise SystemExit(1)
     finally:
         print("### 清理资源 ###")
+        if profiler:
+            profiler.stop()
         try:
-            for host in hosts.values():
-                host.cleanup()
-            net.stop()
+            with tracing.span('teardown'):
+                for host in hosts.values():
+                    host.cleanup()
+                net.stop()
         except:
             pass
-
-        # 移动日志文件到指定目录
-        for fname in ['cwnd.log', 'rtt.log']:
-            if os.path.exists(fname):
-                target_path = os.path.join(log_dir, fname)
-                shutil.move(fname, target_path)
+        if log_dir:
+            print(f"trace: {tracing.write(log_dir)}")
                 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+基准测试套件 - 按名称定义的场景各运行 N 次试验，报告 goodput、完成时间和 RTT 分位数的均值、中位数和
+bootstrap 置信区间；结果可保存为基线，之后的运行与基线比较，吞吐量显著下降时以非零状态退出
+
+场景由 topology.py 的拓扑规格、文件大小和消费者 ini 描述 (见 SCENARIOS)。mininet 后端在同一个网络上
+用批处理模式运行全部试验 (需要 root)；sim 后端用 pipeline_sim 离线仿真，只运行单链路单个流的场景。
+
+用法:
+    sudo python3 benchmark.py --save-baseline                   # 运行全部场景并保存为基线
+    sudo python3 benchmark.py single_100m lossy --trials 10     # 运行部分场景并与基线比较
+    python3 benchmark.py --backend sim --trials 20
+    python3 benchmark.py --suite suite.json --baseline benchmarks/baseline-aimd.json
+
+suite.json 示例:
+    {"trials": 5,
+     "scenarios": {"wide_100m": {"description": "...", "topology": {"type": "line", "n": 2,
+                                 "link": {"bw": 100, "delay": "40ms"}}, "size": "64M"}}}
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import dataset
+import experiment_config
+import log_analysis
+import pipeline_sim
+import topology
+from consumer_output import read_segment_size
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+SIMULATOR = os.path.join(PROJECT_ROOT, 'advanced_ndn_simulator.py')
+DATASET_DIR = os.path.join(PROJECT_ROOT, 'experiments', 'bench')
+DEFAULT_OUT_DIR = 'benchmarks'
+DEFAULT_BASELINE = os.path.join(DEFAULT_OUT_DIR, 'baseline.json')
+SUMMARY_FILE = 'summary.json'
+DEFAULT_TRIALS = 5
+CONFIDENCE = 0.95
+BOOTSTRAP_RESAMPLES = 10000
+TOLERANCE = 0.05            # goodput 相对基线下降超过该比例且置信区间不含 0 时判为回退
+MININET_TIMEOUT = 7200      # 一个场景全部试验的超时 (秒)
+
+SCENARIOS = {
+    'single_100m': {
+        'description': '单个流, 100 Mbps / 5ms 链路',
+        'topology': {'type': 'line', 'n': 2, 'link': {'bw': 100, 'delay': '5ms', 'max_queue_size': 100}},
+        'size': '64M',
+    },
+    'shared_3flow': {
+        'description': '3 个流共享 100 Mbps 瓶颈链路',
+        'topology': {'type': 'dumbbell', 'left': 3, 'right': 3, 'consumers': 3, 'producers': 3,
+                     'link': {'bw': 1000, 'delay': '1ms', 'max_queue_size': 1000},
+                     'bottleneck': {'bw': 100, 'delay': '10ms', 'max_queue_size': 200}},
+        'size': '64M',
+    },
+    'lossy': {
+        'description': '单个流, 100 Mbps / 10ms 链路, 1% 丢包',
+        'topology': {'type': 'line', 'n': 2, 'link': {'bw': 100, 'delay': '10ms', 'loss': 1}},
+        'size': '64M',
+    },
+    'large_file': {
+        'description': '单个流获取 1 GiB 文件',
+        'topology': {'type': 'line', 'n': 2, 'link': {'bw': 100, 'delay': '5ms', 'max_queue_size': 100}},
+        'size': '1G',
+        'pattern': 'random',
+    },
+}
+
+# 每次试验记录的指标，和它们的变好方向 (1 为越大越好)
+METRICS = {
+    'goodput_mbps': 1,
+    'completion_s': -1,
+    'rtt_p50_ms': -1,
+    'rtt_p95_ms': -1,
+    'rtt_p99_ms': -1,
+}
+GATED_METRICS = ('goodput_mbps',)
+
+def definition_hash(scenario, backend):
+    """场景定义的哈希，基线只和定义相同的场景比较"""
+    text = json.dumps({'scenario': scenario, 'backend': backend}, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+def dataset_file(scenario):
+    """场景使用的数据文件名，不存在时生成"""
+    size = dataset.parse_size(scenario['size'])
+    pattern = scenario.get('pattern', 'lorem')
+    name = f"bench_{size}_{pattern}.dat"
+    path = os.path.join(DATASET_DIR, name)
+    if not os.path.exists(path) or os.path.getsize(path) != size:
+        print(f"生成数据文件 {path} ({size} 字节, {pattern})")
+        dataset.generate(path, size, pattern)
+    return name
+
+# ---- 统计 ----
+
+def bootstrap_ci(samples, statistic=np.mean, confidence=CONFIDENCE, resamples=BOOTSTRAP_RESAMPLES, seed=0):
+    """百分位 bootstrap 置信区间；样本少于 2 个时返回 (None, None)"""
+    samples = np.asarray(samples, dtype=float)
+    if len(samples) < 2:
+        return None, None
+    rng = np.random.default_rng(seed)
+    stats = statistic(samples[rng.integers(0, len(samples), (resamples, len(samples)))], axis=1)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(stats, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+def describe(samples):
+    """均值、中位数、标准差和均值的 bootstrap 置信区间"""
+    samples = np.asarray([value for value in samples if value is not None], dtype=float)
+    if len(samples) == 0:
+        return None
+    low, high = bootstrap_ci(samples)
+    return {
+        'n': int(len(samples)),
+        'mean': float(np.mean(samples)),
+        'median': float(np.median(samples)),
+        'std': float(np.std(samples, ddof=1)) if len(samples) > 1 else 0.0,
+        'ci_low': low,
+        'ci_high': high,
+    }
+
+def relative_change(current, baseline, confidence=CONFIDENCE, resamples=BOOTSTRAP_RESAMPLES, seed=0):
+    """均值的相对变化 (current / baseline - 1) 及其 bootstrap 置信区间，两组样本分别重采样"""
+    current = np.asarray(current, dtype=float)
+    baseline = np.asarray(baseline, dtype=float)
+    if len(current) == 0 or len(baseline) == 0 or np.mean(baseline) == 0:
+        return None
+    change = float(np.mean(current) / np.mean(baseline) - 1)
+    if len(current) < 2 or len(baseline) < 2:
+        return {'change': change, 'ci_low': None, 'ci_high': None}
+    rng = np.random.default_rng(seed)
+    current_means = current[rng.integers(0, len(current), (resamples, len(current)))].mean(axis=1)
+    baseline_means = baseline[rng.integers(0, len(baseline), (resamples, len(baseline)))].mean(axis=1)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(current_means / baseline_means - 1, [alpha, 1 - alpha])
+    return {'change': change, 'ci_low': float(low), 'ci_high': float(high)}
+
+def is_regression(comparison, direction, tolerance=TOLERANCE):
+    """变差超过 tolerance，且置信区间整体位于变差一侧"""
+    if comparison is None or comparison['ci_low'] is None:
+        return False
+    if direction > 0:
+        return comparison['change'] < -tolerance and comparison['ci_high'] < 0
+    return comparison['change'] > tolerance and comparison['ci_low'] > 0
+
+# ---- 运行 ----
+
+def trial_metrics(flows, rtt):
+    """一次试验的指标: 成功流的总 goodput、最慢流的完成时间、各流 RTT 分位数的均值"""
+    succeeded = [flow for flow in flows if flow['success']]
+    metrics = {
+        'flows': len(flows),
+        'failed': len(flows) - len(succeeded),
+        'goodput_mbps': sum(flow['goodput_mbps'] for flow in succeeded) if succeeded else None,
+        'completion_s': max(flow['wall_time'] for flow in succeeded) if succeeded else None,
+    }
+    for p in (50, 95, 99):
+        values = [flow_rtt['rtt_ms'][f'p{p}'] for flow_rtt in rtt if flow_rtt.get('rtt_ms')]
+        metrics[f'rtt_p{p}_ms'] = sum(values) / len(values) if values else None
+    return metrics
+
+def run_sim(name, scenario, trials, conconfig, proconfig, out_dir):
+    """离线仿真后端，返回每次试验的指标；场景不是单链路单个流时返回 None"""
+    spec = scenario['topology']
+    _, values = topology.generate(spec)
+    if len(values['links']) != 1 or len(values['tests'][0]['consumer']) != 1:
+        print(f"⚠ {name}: sim 后端只支持单链路上的单个流，跳过")
+        return None
+    link_config = next(iter(values['links'].values()))
+    size = dataset.parse_size(scenario['size'])
+    conconfig = experiment_config.read_ini(conconfig)
+    segment_size = read_segment_size(proconfig)
+    trial_results = []
+    for trial in range(1, trials + 1):
+        trial_dir = os.path.join(out_dir, name, f"trial-{trial}")
+        result = pipeline_sim.simulate(conconfig, link_config, size, segment_size, seed=trial, out_dir=trial_dir)
+        flows = [{'success': result['completed'], 'goodput_mbps': result.get('goodput_mbps', 0.0),
+                  'wall_time': result['time_elapsed_s']}]
+        rtt = [flow.get('rtt', {}) for flow in log_analysis.analyze_run(trial_dir, segment_size)['flows'].values()]
+        trial_results.append(trial_metrics(flows, rtt))
+    return trial_results
+
+def run_mininet(name, scenario, trials, conconfig, proconfig, out_dir):
+    """Mininet 后端: 生成场景的网络配置，用仿真器的批处理模式在同一个网络上运行全部试验"""
+    scenario_dir = os.path.abspath(os.path.join(out_dir, name))
+    spec = dict(scenario['topology'], file=dataset_file(scenario), directory=DATASET_DIR,
+                producer_config=os.path.abspath(proconfig))
+    _, values = topology.generate(spec)
+    values['tests'][0]['config'] = os.path.abspath(conconfig)
+    network_path = experiment_config.dump_network_config(
+        values, os.path.join(scenario_dir, 'network_config.py'), header=f"由 benchmark.py 生成: {name}")
+
+    log_dir = os.path.join(scenario_dir, 'logs')
+    with open(os.path.join(scenario_dir, 'simulator.log'), 'w') as output:
+        subprocess.run([sys.executable, SIMULATOR, network_path, '--log-dir', log_dir,
+                        '--trials', str(trials), '--profile-interval', '0'],
+                       stdout=output, stderr=subprocess.STDOUT, cwd=PROJECT_ROOT,
+                       timeout=MININET_TIMEOUT, check=True)
+
+    segment_size = read_segment_size(proconfig)
+    test_name = values['tests'][0]['name']
+    trial_results = []
+    for trial in range(1, trials + 1):
+        trial_dir = os.path.join(log_dir, test_name, f"trial-{trial}")
+        results_path = os.path.join(trial_dir, 'results.json')
+        if not os.path.exists(results_path):
+            print(f"❌ {name}: 第 {trial} 次试验没有结果 (见 {scenario_dir}/simulator.log)")
+            continue
+        with open(results_path) as f:
+            flows = json.load(f)
+        rtt = [flow.get('rtt', {}) for flow in log_analysis.analyze_run(trial_dir, segment_size)['flows'].values()]
+        trial_results.append(trial_metrics(flows, rtt))
+    return trial_results
+
+def summarize(trial_results):
+    return {metric: describe([trial[metric] for trial in trial_results]) for metric in METRICS}
+
+def compare_baseline(scenarios, baseline, tolerance=TOLERANCE):
+    """与基线比较，返回 (每个场景各指标的相对变化, 回退列表)"""
+    comparisons = {}
+    regressions = []
+    for name, current in scenarios.items():
+        reference = baseline.get('scenarios', {}).get(name)
+        if reference is None:
+            continue
+        if reference['definition'] != current['definition']:
+            print(f"⚠ {name}: 场景定义与基线不同，不比较")
+            continue
+        comparisons[name] = {}
+        for metric, direction in METRICS.items():
+            samples = [trial[metric] for trial in current['trials'] if trial[metric] is not None]
+            reference_samples = [trial[metric] for trial in reference['trials'] if trial[metric] is not None]
+            comparison = relative_change(samples, reference_samples)
+            if comparison is None:
+                continue
+            comparison['regression'] = metric in GATED_METRICS and is_regression(comparison, direction, tolerance)
+            comparisons[name][metric] = comparison
+            if comparison['regression']:
+                regressions.append((name, metric, comparison))
+    return comparisons, regressions
+
+def run_suite(scenarios, trials, backend, conconfig, proconfig, out_dir):
+    """依次运行各场景，返回 (结果, 运行失败的场景)"""
+    results = {}
+    failed = []
+    for name, scenario in scenarios.items():
+        print(f"\n### {name}: {scenario.get('description', '')} ({trials} 次试验, {backend}) ###")
+        start = time.time()
+        runner = run_sim if backend == 'sim' else run_mininet
+        try:
+            trial_results = runner(name, scenario, trials, conconfig, proconfig, out_dir)
+        except (subprocess.SubprocessError, OSError, ValueError) as e:
+            print(f"❌ {name}: {e}")
+            failed.append(name)
+            continue
+        if trial_results is None:
+            continue
+        results[name] = {
+            'definition': definition_hash(scenario, backend),
+            'description': scenario.get('description', ''),
+            'trials': trial_results,
+            'summary': summarize(trial_results),
+            'wall_time_s': time.time() - start,
+        }
+        print(f"完成, 耗时 {results[name]['wall_time_s']:.1f} 秒")
+    return results, failed
+
+# ---- 输出 ----
+
+def format_stat(stat):
+    if stat is None:
+        return '-'
+    ci = f" [{stat['ci_low']:.2f}, {stat['ci_high']:.2f}]" if stat['ci_low'] is not None else ''
+    return f"{stat['mean']:.2f} (中位数 {stat['median']:.2f}){ci}"
+
+def print_report(results, comparisons):
+    print(f"\n=== 基准测试结果 (均值, {CONFIDENCE * 100:.0f}% bootstrap 置信区间) ===")
+    for name, result in results.items():
+        failed = sum(trial['failed'] for trial in result['trials'])
+        print(f"\n{name}: {len(result['trials'])} 次试验" + (f", 失败的流 {failed}" if failed else ''))
+        for metric in METRICS:
+            line = f"  {metric:14s} {format_stat(result['summary'][metric])}"
+            comparison = comparisons.get(name, {}).get(metric)
+            if comparison:
+                ci = (f" [{comparison['ci_low'] * 100:+.1f}%, {comparison['ci_high'] * 100:+.1f}%]"
+                      if comparison['ci_low'] is not None else '')
+                line += f"  相对基线 {comparison['change'] * 100:+.1f}%{ci}"
+                if comparison['regression']:
+                    line += "  ❌ 回退"
+            print(line)
+
+def load_suite(path):
+    if not path:
+        return SCENARIOS, None
+    with open(path) as f:
+        suite = json.load(f)
+    return suite['scenarios'], suite.get('trials')
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='重复试验的基准测试套件')
+    parser.add_argument('scenarios', nargs='*', help='要运行的场景，默认全部')
+    parser.add_argument('--suite', help='场景定义 JSON，默认使用内置场景')
+    parser.add_argument('--trials', type=int, help=f'每个场景的试验次数 (默认 {DEFAULT_TRIALS})')
+    parser.add_argument('--backend', choices=['mininet', 'sim'], default='mininet')
+    parser.add_argument('--conconfig', default='exp-conconfig.ini', help='消费者 ini')
+    parser.add_argument('--proconfig', default='exp-proconfig.ini', help='生产者 ini')
+    parser.add_argument('--out', help='结果目录，默认为 benchmarks/<时间>')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基线 (替换同名场景)')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='goodput 相对基线下降超过该比例 (且显著) 时判为回退')
+    parser.add_argument('--list', action='store_true', help='列出场景')
+    args = parser.parse_args(argv)
+
+    scenarios, suite_trials = load_suite(args.suite)
+    if args.list:
+        for name, scenario in scenarios.items():
+            print(f"{name:16s} {scenario.get('description', '')}")
+        return 0
+    unknown = [name for name in args.scenarios if name not in scenarios]
+    if unknown:
+        parser.error(f"未知的场景: {', '.join(unknown)} (可选 {', '.join(scenarios)})")
+    selected = {name: scenarios[name] for name in (args.scenarios or scenarios)}
+    trials = args.trials or suite_trials or DEFAULT_TRIALS
+    out_dir = args.out or os.path.join(
+        DEFAULT_OUT_DIR, datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S"))
+
+    results, failed = run_suite(selected, trials, args.backend, args.conconfig, args.proconfig, out_dir)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    comparisons, regressions = compare_baseline(results, baseline, args.tolerance)
+    print_report(results, comparisons)
+
+    summary = {
+        'started': os.path.basename(os.path.normpath(out_dir)),
+        'git_revision': experiment_config.git_revision(),
+        'backend': args.backend,
+        'conconfig': experiment_config.read_ini(args.conconfig),
+        'baseline': os.path.abspath(args.baseline) if baseline else None,
+        'scenarios': results,
+        'comparisons': comparisons,
+    }
+    write_json(os.path.join(out_dir, SUMMARY_FILE), summary)
+    print(f"\n结果: {os.path.join(out_dir, SUMMARY_FILE)}")
+
+    if args.save_baseline:
+        baseline.setdefault('scenarios', {}).update(results)
+        baseline['git_revision'] = summary['git_revision']
+        baseline['saved'] = datetime.datetime.now().isoformat(timespec='seconds')
+        write_json(args.baseline, baseline)
+        print(f"基线已保存: {args.baseline}")
+    if failed:
+        print(f"❌ 没有完成的场景: {', '.join(failed)}")
+    if regressions:
+        print("❌ 吞吐量回退: " + ', '.join(f"{name} {comparison['change'] * 100:+.1f}%"
+                                        for name, _, comparison in regressions))
+    return 1 if failed or regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
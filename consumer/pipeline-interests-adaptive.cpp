@@ -225,7 +225,9 @@ PipelineInterestsAdaptive::handleData(const Interest& interest, const Data& data
   if (m_options.isVerbose) {
     std::cerr << "Received segment #" << recvSegNo
               << ", rtt=" << rtt.count() / 1e6 << "ms"
-              << ", rto=" << segInfo.rto.count() / 1e6 << "ms\n";
+              << ", rto=" << segInfo.rto.count() / 1e6 << "ms"
+              << ", t=" << (time::steady_clock::now() - getStartTime()).count() / 1e9 << "s"
+              << ", size=" << data.getContent().value_size() << "\n";
   }
 
   m_highData = std::max(m_highData, recvSegNo);
@@ -128,7 +128,9 @@ PipelineInterestsFixed::handleData(const Interest& interest, const Data& data, s
   BOOST_ASSERT(data.getName().equals(interest.getName()));
 
   if (m_options.isVerbose)
-    std::cerr << "Received segment #" << getSegmentFromPacket(data) << "\n";
+    std::cerr << "Received segment #" << getSegmentFromPacket(data)
+              << ", t=" << (time::steady_clock::now() - getStartTime()).count() / 1e9 << "s"
+              << ", size=" << data.getContent().value_size() << "\n";
 
   onData(data);
 
@@ -34,6 +34,7 @@
 #include <boost/asio/io_context.hpp>
 #include <boost/asio/post.hpp>
 
+#include <iomanip>
 #include <iostream>
 
 namespace ndn::get {
@@ -59,6 +60,13 @@ PipelineInterests::run(const Name& versionedName, DataCallback dataCb, FailureCa
 
   // record the start time of the pipeline
   m_startTime = time::steady_clock::now();
+  if (m_options.isVerbose) {
+    // wall-clock time, so that the caller can separate process startup from the transfer
+    auto sinceEpoch = time::system_clock::now().time_since_epoch();
+    std::cerr << "Pipeline started at " << std::fixed << std::setprecision(6)
+              << time::duration_cast<time::microseconds>(sinceEpoch).count() / 1e6 << "\n"
+              << std::defaultfloat;
+  }
 
   doRun();
 }
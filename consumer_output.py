@@ -0,0 +1,353 @@
+"""
+消费者 (ndnget) 输出的流式解析 - 单次遍历、增量解析，运行中实时统计吞吐量
+"""
+
+from array import array
+from dataclasses import asdict, dataclass, field
+import bisect
+import configparser
+import itertools
+import re
+import threading
+import time
+
+DEFAULT_SEGMENT_SIZE = 8192
+GOODPUT_SUFFIX = '-goodput.tsv'
+TAIL_POLL_INTERVAL = 0.2    # 读取日志新内容的间隔 (秒)
+TAIL_READ_SIZE = 1 << 20    # 每次最多读取的字节数
+
+RECEIVED_RE = re.compile(
+    r'Received segment #(\d+)(?:, rtt=([\d.]+)ms)?(?:, rto=[\d.]+ms)?(?:, t=([\d.e+-]+)s)?(?:, size=(\d+))?'
+)
+PIPELINE_START_PREFIX = 'Pipeline started at '
+STEADY_STATE_RANGE = (0.1, 0.9)     # 稳态 goodput 取已传输字节数的这一区间
+# ndnget 用默认浮点格式输出数值，大文件的 Transferred size 为 6.44245e+06 kB 形式
+SUMMARY_RE = re.compile(
+    r'(Time elapsed|Segments received|Transferred size|Goodput|Timeouts|Retransmitted segments'
+    r'|Congestion marks): ([\d.]+(?:[eE][+-]?\d+)?)\s*(\S*)'
+)
+UNIT_SCALE = {'bit/s': 1e-6, 'kbit/s': 1e-3, 'Mbit/s': 1.0, 'Gbit/s': 1e3, 'Tbit/s': 1e6}
+
+def read_segment_size(producer_config_file):
+    """从生产者 ini 中读取 segment-size"""
+    parser = configparser.ConfigParser()
+    if producer_config_file and parser.read(producer_config_file):
+        return parser.getint('general', 'segment-size', fallback=DEFAULT_SEGMENT_SIZE)
+    return DEFAULT_SEGMENT_SIZE
+
+def segment_size_for(config, interest):
+    """根据 Interest 名称找到对应的生产者配置，返回其 segment-size"""
+    first = interest.strip('/').split('/')[0]
+    for app_config in config.applications.values():
+        if app_config['prefix'].strip('/') == first:
+            return read_segment_size(app_config.get('config_file'))
+    return DEFAULT_SEGMENT_SIZE
+
+@dataclass
+class ConsumerResult:
+    """单个消费者一次传输的结构化结果"""
+    consumer: str
+    interest: str
+    test: str = ''
+    segment_size: int = DEFAULT_SEGMENT_SIZE
+    segments: int = 0
+    max_segment: int = -1
+    requested: int = 0
+    retransmissions: int = 0
+    timeouts: int = 0
+    nacks: int = 0
+    loss_events: int = 0
+    congestion_marks: int = 0
+    errors: list = field(default_factory=list)
+    rtt_sum: float = 0.0
+    rtt_count: int = 0
+    completed: bool = False
+    status: str = ''            # 调度器记录的结束方式: done / failed / timeout / cancelled
+    wall_time: float = 0.0
+    launch_time: float = None   # 启动消费者进程的时刻 (epoch 秒)
+    pipeline_start: float = None    # 消费者报告的流水线启动时刻 (epoch 秒)
+    payload_bytes: int = 0          # 按各段实际内容长度累计的字节数
+    first_segment_s: float = None   # 第一个段到达的时间 (相对流水线启动)
+    last_segment_s: float = None
+    steady_goodput_mbps: float = None
+    verified: bool = None           # 取回的文件与原文件是否一致 (None 为未校验)
+    verify_error: str = None
+    reported: dict = field(default_factory=dict)
+    goodput_samples: list = field(default_factory=list)
+
+    @property
+    def bytes(self):
+        """优先使用各段的实际内容长度，其次是消费者报告的传输量，最后按段数 × 段大小估算"""
+        if self.payload_bytes:
+            return self.payload_bytes
+        if 'transferred_bytes' in self.reported:
+            return self.reported['transferred_bytes']
+        return self.segments * self.segment_size
+
+    @property
+    def success(self):
+        """消费者打印了 'All segments have been received' (quiet 模式下无法判断)，且内容校验没有失败"""
+        return self.completed and self.verified is not False
+
+    @property
+    def avg_rtt_ms(self):
+        return self.rtt_sum / self.rtt_count if self.rtt_count else None
+
+    @property
+    def goodput_mbps(self):
+        """优先使用消费者报告的 Goodput，否则用墙钟时间计算"""
+        if 'goodput_mbps' in self.reported:
+            return self.reported['goodput_mbps']
+        if self.wall_time > 0:
+            return self.bytes * 8 / self.wall_time / 1e6
+        return 0.0
+
+    @property
+    def startup_s(self):
+        """进程启动、face 注册和版本发现的开销"""
+        if self.launch_time is None or self.pipeline_start is None:
+            return None
+        return self.pipeline_start - self.launch_time
+
+    @property
+    def time_to_first_segment_s(self):
+        """从启动进程到第一个段到达的时间"""
+        if self.startup_s is None or self.first_segment_s is None:
+            return None
+        return self.startup_s + self.first_segment_s
+
+    @property
+    def transfer_goodput_mbps(self):
+        """流水线启动到最后一个段到达之间的 goodput，不含启动开销"""
+        if not self.last_segment_s:
+            return None
+        return self.bytes * 8 / self.last_segment_s / 1e6
+
+    @property
+    def interests_sent(self):
+        return self.requested + self.retransmissions
+
+    @property
+    def retx_overhead(self):
+        """发出的 Interest 数 / 所需的段数"""
+        needed = self.reported.get('segments', self.max_segment + 1)
+        return self.interests_sent / needed if needed > 0 and self.interests_sent else None
+
+    def to_dict(self):
+        """可 JSON 序列化的结果，包含计算得到的字段"""
+        data = asdict(self)
+        data.update(bytes=self.bytes, success=self.success,
+                    goodput_mbps=self.goodput_mbps, avg_rtt_ms=self.avg_rtt_ms,
+                    startup_s=self.startup_s, time_to_first_segment_s=self.time_to_first_segment_s,
+                    transfer_goodput_mbps=self.transfer_goodput_mbps,
+                    interests_sent=self.interests_sent, retx_overhead=self.retx_overhead)
+        return data
+
+    def write_goodput(self, path):
+        """把实时 goodput 采样写成 TSV (time 为相对流启动的秒数)"""
+        with open(path, 'w') as f:
+            f.write('time\tgoodput_mbps\n')
+            for elapsed, goodput in self.goodput_samples:
+                f.write(f"{elapsed:.3f}\t{goodput:.4f}\n")
+
+class ConsumerOutputParser:
+    """逐行增量解析 ndnget 的 stderr 输出，每行只做一次分发"""
+
+    def __init__(self, result):
+        self.result = result
+        self.segment_times = array('d')
+        self.segment_sizes = array('q')
+
+    def feed(self, line):
+        result = self.result
+        if line.startswith('Received segment #'):
+            match = RECEIVED_RE.match(line)
+            if match:
+                segment = int(match.group(1))
+                result.segments += 1
+                if segment > result.max_segment:
+                    result.max_segment = segment
+                if match.group(2):
+                    result.rtt_sum += float(match.group(2))
+                    result.rtt_count += 1
+                if match.group(3) and match.group(4):
+                    self._feed_timing(float(match.group(3)), int(match.group(4)))
+        elif line.startswith('Requesting segment #'):
+            result.requested += 1
+        elif line.startswith('Retransmitting segment #'):
+            result.retransmissions += 1
+        elif line.startswith('Timeout for Interest'):
+            result.timeouts += 1
+        elif line.startswith('Received Nack'):
+            result.nacks += 1
+        elif line.startswith('Packet loss event'):
+            result.loss_events += 1
+        elif line.startswith('Received congestion mark'):
+            result.congestion_marks += 1
+        elif line.startswith('ERROR'):
+            result.errors.append(line.strip())
+        elif line.startswith(PIPELINE_START_PREFIX):
+            result.pipeline_start = float(line[len(PIPELINE_START_PREFIX):])
+        elif line.startswith('All segments have been received'):
+            result.completed = True
+        elif result.completed:
+            self._feed_summary(line)
+
+    def _feed_timing(self, t, size):
+        result = self.result
+        result.payload_bytes += size
+        if result.first_segment_s is None:
+            result.first_segment_s = t
+        result.last_segment_s = t
+        self.segment_times.append(t)
+        self.segment_sizes.append(size)
+
+    def finish(self):
+        """传输结束后计算稳态 goodput: 已传输字节数处于 STEADY_STATE_RANGE 区间内的平均速率"""
+        if len(self.segment_times) < 2:
+            return
+        cumulative = list(itertools.accumulate(self.segment_sizes))
+        total = cumulative[-1]
+        low, high = (bisect.bisect_left(cumulative, fraction * total) for fraction in STEADY_STATE_RANGE)
+        elapsed = self.segment_times[high] - self.segment_times[low]
+        if elapsed > 0:
+            self.result.steady_goodput_mbps = (cumulative[high] - cumulative[low]) * 8 / elapsed / 1e6
+
+    def _feed_summary(self, line):
+        match = SUMMARY_RE.match(line)
+        if not match:
+            return
+        key, value, unit = match.group(1), float(match.group(2)), match.group(3)
+        reported = self.result.reported
+        if key == 'Time elapsed':
+            reported['time_elapsed'] = value * (1e-3 if unit.startswith('milli') else 1.0)
+        elif key == 'Segments received':
+            reported['segments'] = int(value)
+        elif key == 'Transferred size':
+            reported['transferred_bytes'] = int(round(value * 1e3))
+        elif key == 'Goodput':
+            reported['goodput_mbps'] = value * UNIT_SCALE.get(unit, 1.0)
+        elif key == 'Timeouts':
+            reported['timeouts'] = int(value)
+        elif key == 'Retransmitted segments':
+            reported['retransmitted'] = int(value)
+        elif key == 'Congestion marks':
+            reported['congestion_marks'] = int(value)
+
+class LogTailer:
+    """增量读取一个不断增长的文件，只返回完整的新行"""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self._partial = b''
+
+    def read_lines(self):
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                chunk = f.read(TAIL_READ_SIZE)
+        except FileNotFoundError:
+            return []
+        if not chunk:
+            return []
+        self.offset += len(chunk)
+        data = self._partial + chunk
+        lines = data.split(b'\n')
+        self._partial = lines.pop()
+        return [line.decode('utf-8', errors='replace') for line in lines]
+
+    def read_available(self, max_reads=None):
+        """反复 read_lines() 直到没有新的完整行，积压超过一个读取块时也能追上；max_reads 限制读取次数"""
+        lines = []
+        reads = 0
+        while max_reads is None or reads < max_reads:
+            batch = self.read_lines()
+            if not batch:
+                break
+            lines.extend(batch)
+            reads += 1
+        return lines
+
+    def read_all(self):
+        """读到文件末尾 (包括最后不带换行的一行)"""
+        lines = self.read_available()
+        if self._partial:
+            lines.append(self._partial.decode('utf-8', errors='replace'))
+            self._partial = b''
+        return lines
+
+class ConsumerMonitor:
+    """在后台线程中跟踪消费者日志，维护计数器并定期记录实时 goodput"""
+
+    def __init__(self, consumer, interest, log_path, segment_size=DEFAULT_SEGMENT_SIZE,
+                 interval=TAIL_POLL_INTERVAL, on_sample=None):
+        self.result = ConsumerResult(consumer, interest, segment_size=segment_size)
+        self.parser = ConsumerOutputParser(self.result)
+        self.tailer = LogTailer(log_path)
+        self.interval = interval
+        self.on_sample = on_sample
+        self._stop = threading.Event()
+        self._lock = threading.Lock()   # poll 与 stop 共用 tailer 的偏移量和解析器的计数器
+        self._thread = None
+        self._start_time = None
+        self._last = None
+
+    def begin(self):
+        """开始计时，不启动线程；由调用方定期调用 poll() (例如在事件循环中)"""
+        self._start_time = time.time()
+        self._last = (self._start_time, 0)
+        self.result.launch_time = self._start_time
+        return self
+
+    def start(self):
+        """开始计时并在后台线程中每隔 interval 秒调用 poll()"""
+        self.begin()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def poll(self):
+        """解析日志新增的全部行并记录一个 goodput 采样；stop() 之后不再做任何事"""
+        with self._lock:
+            if not self._stop.is_set():
+                self._poll()
+
+    def _poll(self):
+        for line in self.tailer.read_available():
+            self.parser.feed(line)
+        now = time.time()
+        last_time, last_bytes = self._last
+        current_bytes = self.result.bytes
+        goodput = (current_bytes - last_bytes) * 8 / (now - last_time) / 1e6 if now > last_time else 0.0
+        sample = (now - self._start_time, goodput)
+        self.result.goodput_samples.append(sample)
+        if self.on_sample:
+            self.on_sample(self.result, sample)
+        self._last = (now, current_bytes)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def stop(self, wall_time=None):
+        """停止跟踪，读完剩余内容并返回结果"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        with self._lock:
+            for line in self.tailer.read_all():
+                self.parser.feed(line)
+            self.parser.finish()
+        self.result.wall_time = wall_time if wall_time is not None else time.time() - self._start_time
+        return self.result
+
+def parse_consumer_log(log_path, consumer='', interest='', segment_size=DEFAULT_SEGMENT_SIZE):
+    """离线解析一个完整的消费者日志"""
+    result = ConsumerResult(consumer, interest, segment_size=segment_size)
+    parser = ConsumerOutputParser(result)
+    with open(log_path, 'rb') as f:
+        for line in f:
+            parser.feed(line.decode('utf-8', errors='replace'))
+    parser.finish()
+    return result
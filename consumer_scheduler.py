@@ -0,0 +1,189 @@
+"""
+消费者调度 - 用 asyncio 和非阻塞 popen 启动大量消费者
+
+支持按分布安排启动时间 (同时 / 等间隔 / 泊松到达)、单流超时与取消，每个流结束后立即产出结果。
+所有进程由一个共享的回收协程检查是否退出，日志解析放到线程池中执行，不阻塞事件循环，
+也不为每个流创建线程。
+"""
+
+from dataclasses import dataclass
+import asyncio
+import random
+import time
+
+from consumer_output import DEFAULT_SEGMENT_SIZE, TAIL_POLL_INTERVAL, ConsumerMonitor
+
+ARRIVAL_MODES = ('together', 'stagger', 'poisson')
+PROCESS_POLL_INTERVAL = 0.05    # 回收协程检查所有进程是否退出的间隔 (秒)
+TERMINATE_GRACE = 2.0           # terminate 后等待进程退出的时间，超时则 kill (秒)
+
+def start_offsets(count, mode='together', interval=0.0, rate=None, seed=None):
+    """各流相对测试开始的启动时间 (秒)
+
+    together: 全部同时启动；stagger: 每隔 interval 秒启动一个；
+    poisson: 到达率为 rate (每秒) 的泊松过程，第一个流在 0 时刻启动。
+    """
+    if mode == 'together':
+        return [0.0] * count
+    if mode == 'stagger':
+        return [i * interval for i in range(count)]
+    if mode == 'poisson':
+        if not rate:
+            raise ValueError("泊松到达需要指定 rate")
+        rng = random.Random(seed)
+        offsets = []
+        t = 0.0
+        for _ in range(count):
+            offsets.append(t)
+            t += rng.expovariate(rate)
+        return offsets
+    raise ValueError(f"未知的到达方式: {mode}")
+
+@dataclass
+class Flow:
+    """一个待启动的消费者流"""
+    name: str
+    host: str
+    interest: str
+    config_file: str
+    log_path: str
+    start_offset: float = 0.0
+    segment_size: int = DEFAULT_SEGMENT_SIZE
+    output_path: str = None     # 取回的文件写到这里，None 时丢弃
+    status: str = 'pending'     # pending / running / done / failed / timeout / cancelled
+    start_time: float = None
+    returncode: int = None
+
+class ConsumerScheduler:
+    """按启动时间启动流并等待其结束
+
+    launch(flow) 负责启动消费者并返回 Popen；timeout 为单流超时 (秒)，
+    max_running 限制同时运行的流数 (受文件描述符和进程数限制)。
+    on_sample 在线程池中随日志解析一起调用。
+    """
+
+    def __init__(self, launch, timeout=None, max_running=None,
+                 interval=TAIL_POLL_INTERVAL, on_sample=None):
+        self.launch = launch
+        self.timeout = timeout
+        self.max_running = max_running
+        self.interval = interval
+        self.on_sample = on_sample
+        self._tasks = {}
+        self._semaphore = None
+        self._exits = {}            # Popen -> 进程退出时完成的 Future
+        self._reaper = None
+
+    async def _wait_start(self, flow, origin):
+        delay = origin + flow.start_offset - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _reap(self):
+        """每隔 PROCESS_POLL_INTERVAL 对所有等待中的进程 poll() 一次，没有进程时退出"""
+        while self._exits:
+            await asyncio.sleep(PROCESS_POLL_INTERVAL)
+            for proc, exited in list(self._exits.items()):
+                if proc.poll() is not None:
+                    del self._exits[proc]
+                    if not exited.done():
+                        exited.set_result(proc.returncode)
+
+    def _watch(self, proc):
+        """返回进程退出时完成的 Future，由共享的回收协程设置"""
+        exited = self._exits.get(proc)
+        if exited is None:
+            exited = self._exits[proc] = asyncio.get_running_loop().create_future()
+            if self._reaper is None or self._reaper.done():
+                self._reaper = asyncio.ensure_future(self._reap())
+        return exited
+
+    async def _terminate(self, proc):
+        if proc.poll() is not None:
+            return
+        proc.terminate()
+        exited = self._watch(proc)
+        await asyncio.wait([exited], timeout=TERMINATE_GRACE)
+        if not exited.done():
+            proc.kill()
+            await exited
+
+    async def _run_flow(self, flow, origin):
+        monitor = ConsumerMonitor(flow.name, flow.interest, flow.log_path,
+                                  segment_size=flow.segment_size, on_sample=self.on_sample)
+        proc = None
+        poll = None
+        try:
+            await self._wait_start(flow, origin)
+            if self._semaphore:
+                await self._semaphore.acquire()
+            try:
+                monitor.begin()
+                flow.start_time = time.time()
+                proc = self.launch(flow)
+                flow.status = 'running'
+                exited = self._watch(proc)
+                deadline = flow.start_time + self.timeout if self.timeout else None
+                next_sample = flow.start_time + self.interval
+                while not exited.done():
+                    now = time.time()
+                    if deadline and now >= deadline:
+                        flow.status = 'timeout'
+                        await self._terminate(proc)
+                        break
+                    if now >= next_sample:
+                        # 取消时线程里的 poll 不会停下，保留句柄以便在 stop 之前等它结束
+                        poll = asyncio.ensure_future(asyncio.to_thread(monitor.poll))
+                        await asyncio.shield(poll)
+                        next_sample += self.interval
+                    wake = min(next_sample, deadline) if deadline else next_sample
+                    await asyncio.wait([exited], timeout=max(0.0, wake - time.time()))
+            finally:
+                if self._semaphore:
+                    self._semaphore.release()
+        except asyncio.CancelledError:
+            flow.status = 'cancelled'
+            if proc is not None:
+                await self._terminate(proc)
+        if poll is not None:
+            await poll
+
+        if proc is not None:
+            flow.returncode = proc.returncode
+        wall_time = time.time() - flow.start_time if flow.start_time else 0.0
+        result = await asyncio.to_thread(monitor.stop, wall_time)
+        if flow.status == 'running':
+            flow.status = 'done' if result.completed else 'failed'
+        result.status = flow.status
+        return flow, result
+
+    async def stream(self, flows, origin=None):
+        """启动所有流，按结束顺序逐个产出 (flow, ConsumerResult)；启动时间相对 origin (默认为现在)"""
+        if self.max_running:
+            self._semaphore = asyncio.Semaphore(self.max_running)
+        origin = origin or time.time()
+        self._tasks = {flow.name: asyncio.ensure_future(self._run_flow(flow, origin)) for flow in flows}
+        try:
+            for future in asyncio.as_completed(list(self._tasks.values())):
+                yield await future
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+
+    def cancel(self, name=None):
+        """取消一个流 (name 为 None 时取消全部)；已启动的消费者会被终止，结果仍会产出"""
+        for flow_name, task in self._tasks.items():
+            if name is None or flow_name == name:
+                task.cancel()
+
+    async def _collect(self, flows, on_result, origin):
+        results = []
+        async for flow, result in self.stream(flows, origin):
+            if on_result:
+                on_result(flow, result)
+            results.append(result)
+        return results
+
+    def run(self, flows, on_result=None, origin=None):
+        """同步运行所有流，返回按结束顺序排列的结果列表"""
+        return asyncio.run(self._collect(flows, on_result, origin))
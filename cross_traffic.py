@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+背景流量 - 测试期间在指定的 Mininet 节点之间运行 CBR / on-off / TCP bulk 流量，
+与消费者竞争瓶颈链路，并记录其吞吐量，计算 NDN 流与背景流量在共享链路上的份额
+
+network_config.py 中的 cross_traffic 为 {名称: [流]}，测试通过 'cross_traffic' 引用:
+    {'src': 'producer1', 'dst': 'consumer1', 'mode': 'cbr', 'rate': 50}              # 50 Mbps UDP 恒定速率
+    {'src': 'producer1', 'dst': 'consumer1', 'mode': 'onoff', 'rate': 80, 'on': 2, 'off': 3}
+    {'src': 'producer1', 'dst': 'consumer1', 'mode': 'bulk', 'start': 10, 'duration': 20}  # TCP 尽力发送
+Data 从生产者流向消费者，因此与 NDN 竞争的背景流量一般为 src=生产者、dst=消费者。
+src 与 dst 需要直接相连或 IP 可达 (拓扑只为 NDN 安装了路由)。
+默认使用内置的 socket 发生器 (本文件的 send / recv 子命令)，'tool': 'iperf3' 时改用 iperf3 (不支持 onoff)。
+
+用法 (由模拟器在节点内启动):
+    python3 cross_traffic.py recv --port 5301 --protocol udp --log cross1-cross.tsv
+    python3 cross_traffic.py send 10.0.0.1 --port 5301 --mode cbr --rate 50
+"""
+
+import argparse
+import json
+import os
+import random
+import selectors
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+import fairness
+import routing
+
+MODES = ('cbr', 'onoff', 'bulk')
+TOOLS = ('python', 'iperf3')
+BASE_PORT = 5301                # 第 i 个背景流使用 BASE_PORT + i
+PACKET_SIZE = 1200              # UDP 负载字节数
+BULK_BLOCK_SIZE = 64 << 10      # TCP 每次发送的字节数
+REPORT_INTERVAL = 0.5           # 接收端吞吐量采样间隔 (秒)
+RECEIVER_READY_DELAY = 0.2      # 启动接收端后等待监听的时间 (秒)
+TERMINATE_GRACE = 2.0           # terminate 后等待进程退出的时间 (秒)
+CROSS_SUFFIX = '-cross.tsv'
+CROSS_TRAFFIC_FILE = 'cross_traffic.json'
+SEQUENCE = struct.Struct('!Q')  # UDP 负载开头的序号，用于统计丢包
+
+def flow_specs(specs):
+    """补全默认值: name、端口、协议、发生器"""
+    result = []
+    for index, spec in enumerate(specs):
+        spec = dict(spec)
+        spec.setdefault('name', f"cross{index + 1}")
+        spec.setdefault('mode', 'cbr')
+        spec.setdefault('port', BASE_PORT + index)
+        spec.setdefault('tool', 'python')
+        spec.setdefault('protocol', 'tcp' if spec['mode'] == 'bulk' else 'udp')
+        spec.setdefault('start', 0.0)
+        if spec['mode'] not in MODES:
+            raise ValueError(f"未知的背景流量模式: {spec['mode']}")
+        if spec['tool'] not in TOOLS:
+            raise ValueError(f"未知的背景流量工具: {spec['tool']}")
+        if spec['mode'] != 'bulk' and not spec.get('rate'):
+            raise ValueError(f"背景流 {spec['name']} 需要指定 rate (Mbps)")
+        if spec['tool'] == 'iperf3' and spec['mode'] == 'onoff':
+            raise ValueError(f"背景流 {spec['name']}: iperf3 不支持 onoff")
+        result.append(spec)
+    return result
+
+def destination_ip(config, src, dst):
+    """dst 上朝向 src 的 IP: 两者直接相连时取链路上 dst 一端的地址，否则取节点地址"""
+    for link_config in config.links.values():
+        if set(link_config['nodes']) == {src, dst}:
+            return routing.link_endpoint_ip(config, link_config, dst)
+    return routing.strip_prefixlen(config.nodes[dst]['ip'])
+
+# ---- 节点内运行的发生器 ----
+
+def pace(start, sent_bytes, rate_bps):
+    """按 rate_bps 发送时，已发送 sent_bytes 后需要等待的时间"""
+    delay = start + sent_bytes * 8 / rate_bps - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+def on_periods(mode, on, off, distribution, seed):
+    """产出 (开启时长, 关闭时长)；cbr / bulk 为一直开启"""
+    if mode != 'onoff':
+        while True:
+            yield float('inf'), 0.0
+    rng = random.Random(seed)
+    while True:
+        if distribution == 'exp':
+            yield rng.expovariate(1 / on), rng.expovariate(1 / off)
+        else:
+            yield on, off
+
+def send(args):
+    """按 mode 向 host:port 发送，直到 duration 结束或被终止"""
+    if args.at:
+        delay = args.at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+    end = time.time() + args.duration if args.duration else float('inf')
+    rate_bps = args.rate * 1e6 if args.rate else None
+    if args.protocol == 'udp':
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.connect((args.host, args.port))
+    else:
+        sock = socket.create_connection((args.host, args.port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    size = args.packet_size if args.protocol == 'udp' else BULK_BLOCK_SIZE
+    payload = bytearray(size)
+    sequence = 0
+    for on, off in on_periods(args.mode, args.on, args.off, args.distribution, args.seed):
+        start = time.time()
+        period_end = min(start + on, end)
+        sent = 0
+        while time.time() < period_end:
+            if args.protocol == 'udp':
+                SEQUENCE.pack_into(payload, 0, sequence)
+                sequence += 1
+                try:
+                    sock.send(payload)
+                except (ConnectionRefusedError, BlockingIOError):
+                    pass
+            else:
+                sock.sendall(payload)
+            sent += size
+            if rate_bps:
+                pace(start, sent, rate_bps)
+        if time.time() >= end:
+            break
+        time.sleep(max(0.0, min(off, end - time.time())))
+    sock.close()
+
+def receive(args):
+    """在 port 上接收，每 interval 秒向 log 追加一行: 时间戳、吞吐量 (Mbps)、累计丢包 (UDP)"""
+    selector = selectors.DefaultSelector()
+    if args.protocol == 'udp':
+        listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+    else:
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(('', args.port))
+    if args.protocol == 'tcp':
+        listener.listen()
+    listener.setblocking(False)
+    selector.register(listener, selectors.EVENT_READ)
+
+    buffer = bytearray(BULK_BLOCK_SIZE)
+    received = 0
+    packets = 0
+    max_sequence = -1
+    last_report = time.time()
+    last_bytes = 0
+
+    def stop(signum, frame):
+        raise SystemExit(0)
+    signal.signal(signal.SIGTERM, stop)
+
+    with open(args.log, 'w', buffering=1) as log:
+        log.write('time\tthroughput_mbps\tlost\n')
+        try:
+            while True:
+                timeout = max(0.0, last_report + args.interval - time.time())
+                for key, _ in selector.select(timeout):
+                    sock = key.fileobj
+                    if sock is listener and args.protocol == 'tcp':
+                        connection, _ = listener.accept()
+                        connection.setblocking(False)
+                        selector.register(connection, selectors.EVENT_READ)
+                        continue
+                    try:
+                        n = sock.recv_into(buffer)
+                    except BlockingIOError:
+                        continue
+                    if n == 0:
+                        selector.unregister(sock)
+                        sock.close()
+                        continue
+                    received += n
+                    if args.protocol == 'udp' and n >= SEQUENCE.size:
+                        packets += 1
+                        max_sequence = max(max_sequence, SEQUENCE.unpack_from(buffer)[0])
+                now = time.time()
+                if now - last_report >= args.interval:
+                    lost = max_sequence + 1 - packets if args.protocol == 'udp' else 0
+                    log.write(f"{now:.3f}\t{(received - last_bytes) * 8 / (now - last_report) / 1e6:.4f}\t{lost}\n")
+                    last_report, last_bytes = now, received
+        finally:
+            selector.close()
+
+# ---- 模拟器中的控制 ----
+
+def receiver_command(spec, log_path, iperf_log):
+    if spec['tool'] == 'iperf3':
+        # 接收端的 intervals 才是实际到达的速率 (UDP 还有 lost_packets)，客户端的只是发送速率
+        return ['iperf3', '-s', '-1', '-p', str(spec['port']), '-J', '--logfile', iperf_log,
+                '-i', str(REPORT_INTERVAL)]
+    return [sys.executable, os.path.abspath(__file__), 'recv', '--port', str(spec['port']),
+            '--protocol', spec['protocol'], '--log', log_path]
+
+def sender_command(spec, ip, at, timeout=None):
+    """timeout 为测试的超时；iperf3 没有 duration 时发送这么久，两者都没有时使用 iperf3 默认的 10 秒"""
+    if spec['tool'] == 'iperf3':
+        command = ['iperf3', '-c', ip, '-p', str(spec['port'])]
+        duration = spec.get('duration') or timeout
+        if duration:
+            command += ['-t', str(duration)]
+        if spec['protocol'] == 'udp':
+            command += ['-u', '-l', str(spec.get('packet_size', PACKET_SIZE))]
+        if spec.get('rate'):
+            command += ['-b', f"{spec['rate']}M"]
+        return command
+    command = [sys.executable, os.path.abspath(__file__), 'send', ip, '--port', str(spec['port']),
+               '--protocol', spec['protocol'], '--mode', spec['mode'], '--at', f"{at:.3f}",
+               '--packet-size', str(spec.get('packet_size', PACKET_SIZE))]
+    for key in ('rate', 'on', 'off', 'duration', 'seed'):
+        if spec.get(key) is not None:
+            command += [f"--{key}", str(spec[key])]
+    if spec.get('distribution'):
+        command += ['--distribution', spec['distribution']]
+    return command
+
+def convert_iperf_log(iperf_log, log_path):
+    """把 iperf3 服务端 (接收端) 的 JSON 结果转换为与内置接收端相同的 TSV"""
+    if not os.path.exists(iperf_log):
+        return
+    try:
+        with open(iperf_log) as f:
+            report = json.load(f)
+    except ValueError:
+        return
+    start = report.get('start', {}).get('timestamp', {}).get('timesecs', 0)
+    with open(log_path, 'w') as f:
+        f.write('time\tthroughput_mbps\tlost\n')
+        for interval in report.get('intervals', []):
+            total = interval['sum']
+            f.write(f"{start + total['end']:.3f}\t{total['bits_per_second'] / 1e6:.4f}\t"
+                    f"{total.get('lost_packets', 0)}\n")
+
+def terminate(proc):
+    if proc.poll() is not None:
+        return
+    proc.terminate()
+    try:
+        proc.wait(TERMINATE_GRACE)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+class CrossTraffic:
+    """启动测试的所有背景流；发送端按 start 相对 origin 延迟发送，stop() 终止全部进程"""
+
+    def __init__(self, hosts, config, specs, test_dir, timeout=None):
+        self.hosts = hosts
+        self.config = config
+        self.specs = flow_specs(specs)
+        self.test_dir = test_dir
+        self.timeout = timeout
+        self.origin = None
+        self._receivers = []
+        self._senders = []
+        self._timers = []
+
+    def log_path(self, spec):
+        return os.path.join(self.test_dir, f"{spec['name']}{CROSS_SUFFIX}")
+
+    def iperf_log(self, spec):
+        return os.path.join(self.test_dir, f"{spec['name']}-iperf3.json")
+
+    def start(self, origin=None):
+        self.origin = origin or time.time()
+        for spec in self.specs:
+            self._receivers.append(self.hosts[spec['dst']].popen(
+                receiver_command(spec, os.path.abspath(self.log_path(spec)),
+                                 os.path.abspath(self.iperf_log(spec))),
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        time.sleep(RECEIVER_READY_DELAY)
+        for spec in self.specs:
+            ip = destination_ip(self.config, spec['src'], spec['dst'])
+            at = self.origin + spec['start']
+            print(f"背景流 {spec['name']}: {spec['src']} -> {spec['dst']} ({ip}) "
+                  f"{spec['mode']} {spec['protocol']} {spec.get('rate') or '尽力'} Mbps, {spec['start']}s 开始")
+            command = sender_command(spec, ip, at, self.timeout)
+            if spec['tool'] == 'iperf3':
+                # iperf3 没有定时启动选项，由定时器在 start 时刻启动
+                timer = threading.Timer(max(0.0, at - time.time()), self._launch_sender,
+                                        (spec['src'], command))
+                timer.start()
+                self._timers.append(timer)
+            else:
+                self._launch_sender(spec['src'], command)
+        return self
+
+    def _launch_sender(self, src, command):
+        self._senders.append(self.hosts[src].popen(
+            command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+
+    def stop(self):
+        for timer in self._timers:
+            timer.cancel()
+        for proc in self._senders + self._receivers:
+            terminate(proc)
+        for spec in self.specs:
+            if spec['tool'] == 'iperf3':
+                convert_iperf_log(self.iperf_log(spec), self.log_path(spec))
+
+# ---- 分析 ----
+
+def load_series(path, origin):
+    """读取背景流的 TSV，返回相对 origin 的 (t, throughput, lost)"""
+    if not os.path.exists(path):
+        return np.empty(0), np.empty(0), 0
+    data = np.loadtxt(path, delimiter='\t', skiprows=1, ndmin=2)
+    if not len(data):
+        return np.empty(0), np.empty(0), 0
+    return data[:, 0] - origin, data[:, 1], int(data[-1, 2])
+
+def ndn_path_links(config, host, interest):
+    producer = routing.producer_of(config, interest)
+    return routing.shortest_path_links(config, host, producer) if producer else []
+
+def analyze(config, specs, test_dir, origin, ndn_flows):
+    """背景流的吞吐量，以及每条共享链路上 NDN 流与背景流量的份额
+
+    ndn_flows: [{'name', 'host', 'interest', 'start_time', 'goodput': (t, v)}]，t 相对流启动
+    """
+    specs = flow_specs(specs)
+    series = {}
+    cross = []
+    for spec in specs:
+        t, v, lost = load_series(os.path.join(test_dir, f"{spec['name']}{CROSS_SUFFIX}"), origin)
+        active = v > 0
+        series[spec['name']] = (t, v)
+        cross.append({
+            'name': spec['name'], 'src': spec['src'], 'dst': spec['dst'], 'mode': spec['mode'],
+            'protocol': spec['protocol'], 'tool': spec['tool'], 'rate_mbps': spec.get('rate'),
+            'mean_mbps': float(np.mean(v[active])) if np.any(active) else 0.0,
+            'lost_packets': lost,
+            'links': routing.shortest_path_links(config, spec['src'], spec['dst']),
+        })
+    for flow in ndn_flows:
+        t, v = flow['goodput']
+        series[flow['name']] = (t + flow['start_time'] - origin, v)
+
+    names, grid, matrix = fairness.resample(series, REPORT_INTERVAL)
+    column = {name: i for i, name in enumerate(names)}
+    links = []
+    for link_name in dict.fromkeys(name for item in cross for name in item['links']):
+        cross_names = [item['name'] for item in cross if link_name in item['links']]
+        ndn_names = [flow['name'] for flow in ndn_flows
+                     if link_name in ndn_path_links(config, flow['host'], flow['interest'])]
+        if not ndn_names:
+            continue
+        ndn = matrix[:, [column[name] for name in ndn_names]]
+        background = matrix[:, [column[name] for name in cross_names]]
+        # 只统计 NDN 流与背景流同时活跃的时间
+        overlap = np.any(~np.isnan(ndn), axis=1) & np.any(background > 0, axis=1)
+        if not np.any(overlap):
+            continue
+        ndn_mean = np.nanmean(ndn[overlap], axis=0)
+        cross_mean = np.nanmean(background[overlap], axis=0)
+        ndn_total = float(np.nansum(ndn_mean))
+        cross_total = float(np.nansum(cross_mean))
+        bw = config.links[link_name].get('bw')
+        links.append({
+            'link': link_name,
+            'bw': bw,
+            'overlap_s': float(np.count_nonzero(overlap) * REPORT_INTERVAL),
+            'ndn_flows': ndn_names,
+            'cross_flows': cross_names,
+            'ndn_mbps': ndn_total,
+            'cross_mbps': cross_total,
+            'ndn_share': ndn_total / (ndn_total + cross_total) if ndn_total + cross_total else None,
+            'utilisation': (ndn_total + cross_total) / bw if bw else None,
+            'jain': float(fairness.jain_index(np.concatenate([ndn_mean, cross_mean]))),
+        })
+    return {'cross_flows': cross, 'links': links}
+
+def write_result(test_dir, result):
+    with open(os.path.join(test_dir, CROSS_TRAFFIC_FILE), 'w') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+def print_summary(result):
+    print("\n--- 背景流量 ---")
+    for item in result['cross_flows']:
+        lost = f", 丢包 {item['lost_packets']}" if item['protocol'] == 'udp' else ''
+        print(f"  {item['name']} {item['src']} -> {item['dst']} {item['mode']}: "
+              f"平均 {item['mean_mbps']:.2f} Mbps{lost}")
+    for link in result['links']:
+        share = f"{link['ndn_share'] * 100:.1f}%" if link['ndn_share'] is not None else '-'
+        utilisation = f", 利用率 {link['utilisation'] * 100:.1f}%" if link['utilisation'] is not None else ''
+        print(f"  {link['link']}: NDN {link['ndn_mbps']:.2f} Mbps / 背景 {link['cross_mbps']:.2f} Mbps, "
+              f"NDN 份额 {share}{utilisation}, Jain {link['jain']:.3f} ({link['overlap_s']:.1f}s)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='背景流量发生器')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    send_parser = commands.add_parser('send', help='发送端')
+    send_parser.add_argument('host')
+    send_parser.add_argument('--port', type=int, default=BASE_PORT)
+    send_parser.add_argument('--protocol', choices=('udp', 'tcp'), default='udp')
+    send_parser.add_argument('--mode', choices=MODES, default='cbr')
+    send_parser.add_argument('--rate', type=float, help='发送速率 (Mbps)，bulk 可省略')
+    send_parser.add_argument('--on', type=float, default=1.0, help='onoff 的开启时长 (秒)')
+    send_parser.add_argument('--off', type=float, default=1.0, help='onoff 的关闭时长 (秒)')
+    send_parser.add_argument('--distribution', choices=('fixed', 'exp'), default='fixed',
+                             help='onoff 时长固定或服从指数分布')
+    send_parser.add_argument('--seed', type=int)
+    send_parser.add_argument('--duration', type=float, help='发送时长 (秒)，默认直到被终止')
+    send_parser.add_argument('--at', type=float, help='开始发送的时间戳')
+    send_parser.add_argument('--packet-size', type=int, default=PACKET_SIZE)
+
+    recv_parser = commands.add_parser('recv', help='接收端')
+    recv_parser.add_argument('--port', type=int, default=BASE_PORT)
+    recv_parser.add_argument('--protocol', choices=('udp', 'tcp'), default='udp')
+    recv_parser.add_argument('--interval', type=float, default=REPORT_INTERVAL)
+    recv_parser.add_argument('--log', required=True)
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == 'send':
+            send(args)
+        else:
+            receive(args)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+实时终端面板 - 测试运行期间增量跟踪每个消费者的输出、cwnd / rtt 日志和每个生产者的日志 (每次只读新增的字节)，
+在有界内存中维护滚动统计，每秒重绘几次各流的 goodput、cwnd、srtt、重传和预计剩余时间，
+停滞 (一段时间没有新数据) 或崩溃 (goodput 跌到峰值的一小部分) 的流立即标出
+
+仿真器中在测试里设置 'dashboard': True 或使用 --dashboard 开启；也可以在另一个终端中连接正在运行的测试:
+    python3 dashboard.py logs/<运行>/<测试>
+"""
+
+from collections import deque
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import unicodedata
+
+import log_analysis
+from consumer_output import (DEFAULT_SEGMENT_SIZE, TAIL_READ_SIZE, ConsumerOutputParser, ConsumerResult,
+                             LogTailer)
+from producer_log import DATA_PREFIX, NACK_LINE
+
+DEFAULT_INTERVAL = 0.25         # 重绘间隔 (秒)
+GOODPUT_WINDOW = 2.0            # 滚动 goodput 的窗口 (秒)
+STALL_TIMEOUT = 3.0             # 超过该时间没有新数据视为停滞 (秒)
+COLLAPSE_RATIO = 0.2            # 滚动 goodput 低于峰值的该比例视为崩溃
+COLLAPSE_MIN_PEAK = 1.0         # 峰值低于该值 (Mbps) 时不判断崩溃
+MAX_CATCHUP_READS = 8           # 每次轮询最多读取的块数，日志增长过快时跳过积压只看最新内容
+NON_TTY_INTERVAL = 5.0          # 输出不是终端时整表输出的间隔 (秒)
+HISTORY = 64                    # 每个流保留的采样数
+SPARK = ' ▁▂▃▄▅▆▇█'
+STATE_ORDER = {'collapsing': 0, 'stalled': 1, 'failed': 2, 'running': 3, 'starting': 4,
+               'pending': 5, 'done': 6}
+STATE_MARK = {'collapsing': '↓ 崩溃', 'stalled': '⏸ 停滞', 'failed': '❌ 失败', 'running': '▶ 运行',
+              'starting': '… 启动', 'pending': '  等待', 'done': '✓ 完成'}
+CLEAR = '\x1b[H\x1b[2J'
+
+class LiveParser(ConsumerOutputParser):
+    """只维护计数器，不保存各段的到达时间 (内存与传输大小无关)"""
+
+    def _feed_timing(self, t, size):
+        result = self.result
+        result.payload_bytes += size
+        if result.first_segment_s is None:
+            result.first_segment_s = t
+        result.last_segment_s = t
+
+    def finish(self):
+        pass
+
+class LatestTailer(LogTailer):
+    """只关心最新一行的日志 (cwnd / rtt): 积压超过一个读取块时直接跳到末尾附近"""
+
+    def latest(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return None
+        if size - self.offset > TAIL_READ_SIZE:
+            self.offset = size - TAIL_READ_SIZE
+            self._partial = b''
+            lines = self.read_lines()[1:]       # 第一行可能不完整
+        else:
+            lines = self.read_lines()
+        for line in reversed(lines):
+            fields = line.split()
+            if fields and fields[0][0].isdigit():
+                return fields
+        return None
+
+class FlowTracker:
+    """一个消费者流的滚动状态"""
+
+    def __init__(self, name, log_path, cwnd_path=None, rtt_path=None, expected_bytes=None,
+                 segment_size=DEFAULT_SEGMENT_SIZE):
+        self.name = name
+        self.expected_bytes = expected_bytes
+        self.result = ConsumerResult(name, '', segment_size=segment_size)
+        self.parser = LiveParser(self.result)
+        self.log = LogTailer(log_path)
+        self.cwnd_log = LatestTailer(cwnd_path) if cwnd_path else None
+        self.rtt_log = LatestTailer(rtt_path) if rtt_path else None
+        self.cwnd = None
+        self.srtt_ms = None
+        self.rto_ms = None
+        self.samples = deque(maxlen=HISTORY)    # (time, bytes)
+        self.goodput_history = deque(maxlen=HISTORY)
+        self.goodput = 0.0
+        self.peak_goodput = 0.0
+        self.started = None
+        self.last_progress = None
+        self.exited = False
+
+    def poll(self, now):
+        if not os.path.exists(self.log.path):
+            return
+        if self.started is None:
+            self.started = self.last_progress = now
+        before = self.result.bytes
+        for line in self.log.read_available(MAX_CATCHUP_READS):
+            self.parser.feed(line)
+        current = self.result.bytes
+        if current > before:
+            self.last_progress = now
+        if self.cwnd_log:
+            fields = self.cwnd_log.latest()
+            if fields and len(fields) >= 2:
+                self.cwnd = float(fields[1])
+        if self.rtt_log:
+            fields = self.rtt_log.latest()
+            if fields and len(fields) >= 5:
+                self.srtt_ms, self.rto_ms = float(fields[3]), float(fields[4])
+
+        self.samples.append((now, current))
+        while len(self.samples) > 2 and now - self.samples[1][0] >= GOODPUT_WINDOW:
+            self.samples.popleft()
+        first_time, first_bytes = self.samples[0]
+        self.goodput = (current - first_bytes) * 8 / (now - first_time) / 1e6 if now > first_time else 0.0
+        self.goodput_history.append(self.goodput)
+        if now - first_time >= GOODPUT_WINDOW / 2:
+            self.peak_goodput = max(self.peak_goodput, self.goodput)
+
+    def state(self, now):
+        result = self.result
+        if self.started is None:
+            return 'pending'
+        if result.completed:
+            return 'done'
+        if self.exited or (result.errors and now - self.last_progress >= STALL_TIMEOUT):
+            return 'failed'
+        if result.segments == 0:
+            return 'stalled' if now - self.started >= STALL_TIMEOUT * 3 else 'starting'
+        if now - self.last_progress >= STALL_TIMEOUT:
+            return 'stalled'
+        if self.peak_goodput >= COLLAPSE_MIN_PEAK and self.goodput < self.peak_goodput * COLLAPSE_RATIO:
+            return 'collapsing'
+        return 'running'
+
+    def eta(self):
+        """按滚动 goodput 估计的剩余时间 (秒)，不知道文件大小或没有速率时为 None"""
+        if not self.expected_bytes or self.goodput <= 0:
+            return None
+        return max(self.expected_bytes - self.result.bytes, 0) * 8 / (self.goodput * 1e6)
+
+    def progress(self):
+        if not self.expected_bytes:
+            return None
+        return min(self.result.bytes / self.expected_bytes, 1.0)
+
+class ProducerTracker:
+    """一个生产者日志中 Interest / Data / Nack 的累计数和滚动速率"""
+
+    def __init__(self, name, log_path):
+        self.name = name
+        self.log = LogTailer(log_path)
+        self.interests = 0
+        self.data = 0
+        self.nacks = 0
+        self.samples = deque(maxlen=HISTORY)    # (time, interests, data)
+        self.interest_rate = 0.0
+        self.data_rate = 0.0
+
+    def poll(self, now):
+        for line in self.log.read_available(MAX_CATCHUP_READS):
+            if line.startswith('Interest: '):
+                self.interests += 1
+            elif line.startswith(DATA_PREFIX):
+                self.data += 1
+            elif line.startswith(NACK_LINE):
+                self.nacks += 1
+        self.samples.append((now, self.interests, self.data))
+        while len(self.samples) > 2 and now - self.samples[1][0] >= GOODPUT_WINDOW:
+            self.samples.popleft()
+        first_time, first_interests, first_data = self.samples[0]
+        if now > first_time:
+            self.interest_rate = (self.interests - first_interests) / (now - first_time)
+            self.data_rate = (self.data - first_data) / (now - first_time)
+
+def sparkline(values, peak):
+    if not values or peak <= 0:
+        return ''
+    return ''.join(SPARK[min(int(value / peak * (len(SPARK) - 1) + 0.5), len(SPARK) - 1)] for value in values)
+
+def display_width(text):
+    return sum(2 if unicodedata.east_asian_width(char) in 'WF' else 1 for char in text)
+
+def pad(text, width, right=False):
+    """按终端显示宽度 (中文占两列) 补齐"""
+    fill = ' ' * max(width - display_width(text), 0)
+    return fill + text if right else text + fill
+
+# 各列的 (标题, 宽度, 右对齐)
+COLUMNS = (('流', 14, False), ('状态', 8, False), ('Mbps', 8, True), ('峰值', 8, True), ('cwnd', 7, True),
+           ('srtt', 7, True), ('rto', 7, True), ('重传', 6, True), ('超时', 6, True), ('进度', 6, True),
+           ('剩余', 6, True))
+COLUMNS_WIDTH = sum(width + 1 for _, width, _ in COLUMNS) + 1
+
+def format_row(values):
+    return ' '.join(pad(value, width, right) for value, (_, width, right) in zip(values, COLUMNS)) + '  '
+
+def format_duration(seconds):
+    if seconds is None:
+        return '-'
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}" if seconds < 3600 else f"{seconds // 3600}h{seconds // 60 % 60:02d}"
+
+def format_optional(value, digits=1):
+    return '-' if value is None else f"{value:.{digits}f}"
+
+class Dashboard:
+    """在后台线程中轮询所有流和生产者并重绘面板"""
+
+    def __init__(self, title='', interval=DEFAULT_INTERVAL, out=None):
+        self.title = title
+        self.interval = interval
+        self.out = out or sys.stdout
+        self.tty = self.out.isatty()
+        self.flows = {}
+        self.producers = {}
+        self.origin = time.time()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_output = 0.0
+
+    def add_flow(self, name, log_path, cwnd_path=None, rtt_path=None, expected_bytes=None,
+                 segment_size=DEFAULT_SEGMENT_SIZE):
+        with self._lock:
+            self.flows[name] = FlowTracker(name, log_path, cwnd_path, rtt_path, expected_bytes, segment_size)
+
+    def add_producer(self, name, log_path):
+        with self._lock:
+            self.producers[name] = ProducerTracker(name, log_path)
+            # 只统计连接之后的新内容
+            try:
+                self.producers[name].log.offset = os.path.getsize(log_path)
+            except OSError:
+                pass
+
+    def flow_exited(self, name):
+        """消费者进程已结束 (没有输出完成标志时显示为失败)"""
+        with self._lock:
+            if name in self.flows:
+                self.flows[name].poll(time.time())
+                self.flows[name].exited = True
+
+    def poll(self):
+        now = time.time()
+        with self._lock:
+            for tracker in self.flows.values():
+                if not tracker.exited:
+                    tracker.poll(now)
+            for tracker in self.producers.values():
+                tracker.poll(now)
+
+    def finished(self):
+        now = time.time()
+        with self._lock:
+            return bool(self.flows) and all(tracker.state(now) in ('done', 'failed') for tracker in self.flows.values())
+
+    def render(self, width=None, height=None):
+        """面板文本: 问题最严重的流排在前面，行数超过终端高度时省略其余的流"""
+        size = shutil.get_terminal_size()
+        width, height = width or size.columns, height or size.lines
+        now = time.time()
+        with self._lock:
+            trackers = list(self.flows.values())
+            producers = list(self.producers.values())
+            states = {tracker.name: tracker.state(now) for tracker in trackers}
+        counts = {}
+        for state in states.values():
+            counts[state] = counts.get(state, 0) + 1
+        total = sum(tracker.goodput for tracker in trackers if states[tracker.name] != 'done')
+        lines = [f"{self.title}  {format_duration(now - self.origin)}  总 goodput {total:.2f} Mbps  " +
+                 '  '.join(f"{STATE_MARK[state].strip()} {count}"
+                           for state, count in sorted(counts.items(), key=lambda item: STATE_ORDER[item[0]])),
+                 format_row([title for title, _, _ in COLUMNS]) + 'goodput']
+        producer_lines = [f"生产者 {tracker.name}: Interest {tracker.interest_rate:.0f}/s, "
+                          f"Data {tracker.data_rate:.0f}/s, Nack {tracker.nacks}" for tracker in producers]
+        rows = height - len(lines) - len(producer_lines) - 2
+        trackers.sort(key=lambda tracker: (STATE_ORDER[states[tracker.name]], tracker.name))
+        spark_width = max(width - COLUMNS_WIDTH, 0)
+        for tracker in trackers[:max(rows, 1)]:
+            result = tracker.result
+            progress = tracker.progress()
+            history = list(tracker.goodput_history)[-spark_width:] if spark_width else []
+            lines.append(format_row([
+                tracker.name[:14], STATE_MARK[states[tracker.name]], f"{tracker.goodput:.2f}",
+                f"{tracker.peak_goodput:.2f}", format_optional(tracker.cwnd), format_optional(tracker.srtt_ms),
+                format_optional(tracker.rto_ms, 0), str(result.retransmissions), str(result.timeouts),
+                '-' if progress is None else f"{progress * 100:.0f}%", format_duration(tracker.eta()),
+            ]) + sparkline(history, tracker.peak_goodput))
+        if len(trackers) > max(rows, 1):
+            lines.append(f"... 还有 {len(trackers) - max(rows, 1)} 个流")
+        lines.extend(producer_lines)
+        return '\n'.join(lines)
+
+    def draw(self, final=False):
+        now = time.time()
+        if not self.tty and not final and now - self._last_output < NON_TTY_INTERVAL:
+            return
+        self._last_output = now
+        text = self.render()
+        self.out.write((CLEAR if self.tty else '\n') + text + '\n')
+        self.out.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+            self.draw()
+
+    def start(self):
+        self.origin = time.time()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止刷新，读完剩余内容并输出最后一帧"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.poll()
+        self.draw(final=True)
+
+def expected_size(applications, interest):
+    """按 Interest 的第一个名称组件找到生产者目录中的原文件，返回其大小"""
+    first = interest.strip('/').split('/')[0]
+    for app in applications.values():
+        prefix = app['prefix'].strip('/')
+        if prefix == first:
+            path = os.path.join(app['directory'], interest.strip('/')[len(prefix):].strip('/'))
+            return os.path.getsize(path) if os.path.exists(path) else None
+    return None
+
+def find_run_metadata(test_dir):
+    """从测试目录向上找到运行目录的 run.json，返回 (运行目录, 元数据)"""
+    directory = os.path.abspath(test_dir)
+    while True:
+        path = os.path.join(directory, 'run.json')
+        if os.path.exists(path):
+            with open(path) as f:
+                return directory, json.load(f)
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None, {}
+        directory = parent
+
+def attach(test_dir, interval=DEFAULT_INTERVAL):
+    """连接正在运行的测试: 流来自 flows.json (测试开始时写出)，生产者日志在运行目录下"""
+    run_dir, metadata = find_run_metadata(test_dir)
+    applications = metadata.get('network', {}).get('applications', {})
+    flows_path = os.path.join(test_dir, log_analysis.FLOWS_FILE)
+    if not os.path.exists(flows_path):
+        raise FileNotFoundError(f"没有 {flows_path}")
+    with open(flows_path) as f:
+        flows = json.load(f)
+
+    dashboard = Dashboard(os.path.basename(os.path.normpath(test_dir)), interval)
+    for flow in flows:
+        name = flow['consumer']
+        dashboard.add_flow(name, os.path.join(test_dir, f"{name}.log"),
+                           os.path.join(test_dir, f"{name}-cwnd.log"), os.path.join(test_dir, f"{name}-rtt.log"),
+                           expected_size(applications, flow['interest']))
+    for name in applications:
+        log_path = os.path.join(run_dir or test_dir, f"{name}.log")
+        if os.path.exists(log_path):
+            dashboard.add_producer(name, log_path)
+    dashboard.start()
+    try:
+        while not dashboard.finished():
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    dashboard.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='实时跟踪正在运行的测试')
+    parser.add_argument('test_dir', help='测试目录 (logs/<运行>/<测试>)')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='重绘间隔 (秒)')
+    args = parser.parse_args(argv)
+    attach(args.test_dir, args.interval)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+测试数据集工具 - 快速生成指定大小和内容模式的文件，维护按 segment-size 对齐的分块哈希清单，
+并流式校验消费者取回的文件，报告第一个不一致的段号
+
+用法:
+    python3 dataset.py generate experiments/1/testfile_6442450.txt --size 6442450 --pattern lorem
+    python3 dataset.py generate experiments/1/zeros_4G.dat --size 4G --pattern sparse
+    python3 dataset.py manifest experiments/1 [--segment-size 8192]
+    python3 dataset.py verify output.txt --manifest experiments/1/manifest.json [--name testfile_6442450.txt]
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import random
+import re
+import sys
+
+import numpy as np
+
+from consumer_output import DEFAULT_SEGMENT_SIZE
+
+MANIFEST_FILE = 'manifest.json'
+WRITE_BLOCK_SIZE = 8 << 20      # 生成文件时每次写入的字节数
+CHUNK_SEGMENTS = 64             # 清单中每个哈希覆盖的段数
+DIGEST_SIZE = 8                 # 分块哈希 (blake2b) 的字节数
+PATTERNS = ('lorem', 'random', 'counter', 'zeros', 'sparse')
+SIZE_RE = re.compile(r'^\s*([\d,.]+)\s*([kmgt]?)i?b?\s*$', re.IGNORECASE)
+SIZE_UNITS = {'': 1, 'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30, 't': 1 << 40}
+
+# 与 experiments/1/generator.sh 相同的行内容
+LOREM = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed do eiusmod tempor incididunt "
+         "ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud exercitation ullamco "
+         "laboris nisi ut aliquip ex ea commodo consequat. Duis aute irure dolor in reprehenderit in "
+         "voluptate velit esse cillum dolore eu fugiat nulla pariatur.")
+
+def parse_size(text):
+    """'6,442,450' / '64M' / '4GiB' -> 字节数"""
+    match = SIZE_RE.match(str(text))
+    if not match:
+        raise ValueError(f"无法解析的大小: {text}")
+    return int(float(match.group(1).replace(',', '')) * SIZE_UNITS[match.group(2).lower()])
+
+def lorem_blocks(size):
+    """逐行 'Line i: ...' 的文本，按块产出，最后一行截断到恰好 size 字节"""
+    line_number = 1
+    remaining = size
+    while remaining > 0:
+        lines = []
+        length = 0
+        while length < WRITE_BLOCK_SIZE and length < remaining:
+            line = f"Line {line_number}: {LOREM}\n"
+            lines.append(line)
+            length += len(line)
+            line_number += 1
+        block = ''.join(lines).encode()[:remaining]
+        remaining -= len(block)
+        yield block
+
+def random_blocks(size, seed=0):
+    rng = random.Random(seed)
+    for offset in range(0, size, WRITE_BLOCK_SIZE):
+        yield rng.randbytes(min(WRITE_BLOCK_SIZE, size - offset))
+
+def counter_blocks(size):
+    """每个 8 字节字 (小端) 是它自身的偏移量，错位的段可以从内容直接看出来源"""
+    for offset in range(0, size, WRITE_BLOCK_SIZE):
+        length = min(WRITE_BLOCK_SIZE, size - offset)
+        words = np.arange(offset, offset + length + 7, 8, dtype='<u8')
+        yield words.tobytes()[:length]
+
+def zero_blocks(size):
+    block = bytes(WRITE_BLOCK_SIZE)
+    for offset in range(0, size, WRITE_BLOCK_SIZE):
+        yield block[:min(WRITE_BLOCK_SIZE, size - offset)]
+
+def generate(path, size, pattern='lorem', seed=0):
+    """生成 size 字节的文件
+
+    sparse 只设置文件长度 (稀疏文件，全零)；zeros 用 fallocate 预分配后写零；
+    其他模式按 WRITE_BLOCK_SIZE 的块顺序写入。
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'wb', buffering=0) as f:
+        if pattern == 'sparse':
+            f.truncate(size)
+            return path
+        if pattern == 'zeros':
+            if hasattr(os, 'posix_fallocate') and size > 0:
+                os.posix_fallocate(f.fileno(), 0, size)
+                return path
+            blocks = zero_blocks(size)
+        elif pattern == 'lorem':
+            blocks = lorem_blocks(size)
+        elif pattern == 'random':
+            blocks = random_blocks(size, seed)
+        elif pattern == 'counter':
+            blocks = counter_blocks(size)
+        else:
+            raise ValueError(f"未知的内容模式: {pattern}")
+        for block in blocks:
+            f.write(block)
+    return path
+
+def chunk_digest(data):
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).hexdigest()
+
+def iter_chunks(path, chunk_size):
+    """按 chunk_size 顺序读取文件，复用同一个缓冲区"""
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            yield view[:n]
+
+def file_entry(path, segment_size=DEFAULT_SEGMENT_SIZE):
+    """计算一个文件的清单条目: 大小、按 CHUNK_SEGMENTS 个段分块的哈希，以及由分块哈希得到的整体摘要"""
+    chunk_size = segment_size * CHUNK_SEGMENTS
+    chunks = []
+    size = 0
+    for data in iter_chunks(path, chunk_size):
+        chunks.append(chunk_digest(data))
+        size += len(data)
+    return {
+        'size': size,
+        'segments': -(-size // segment_size),
+        'digest': hashlib.blake2b(''.join(chunks).encode()).hexdigest(),
+        'chunk_size': chunk_size,
+        'chunks': chunks,
+    }
+
+def manifest_path(directory):
+    return os.path.join(directory, MANIFEST_FILE)
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def build_manifest(directory, segment_size=DEFAULT_SEGMENT_SIZE, previous=None):
+    """为目录下的所有文件生成清单；大小和修改时间未变的文件沿用 previous 中的条目"""
+    files = {}
+    old_files = (previous or {}).get('files', {}) if (previous or {}).get('segment_size') == segment_size else {}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name == MANIFEST_FILE or not os.path.isfile(path):
+            continue
+        stat = os.stat(path)
+        old = old_files.get(name)
+        if old and old['size'] == stat.st_size and old.get('mtime') == stat.st_mtime:
+            files[name] = old
+            continue
+        files[name] = dict(file_entry(path, segment_size), mtime=stat.st_mtime)
+    return {'segment_size': segment_size, 'files': files}
+
+def write_manifest(directory, segment_size=DEFAULT_SEGMENT_SIZE):
+    path = manifest_path(directory)
+    manifest = build_manifest(directory, segment_size, load_manifest(path))
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    return path, manifest
+
+def first_differing_segment(path, source_path, start, length, segment_size):
+    """在 [start, start + length) 内逐段比较两个文件，返回第一个不同的段号"""
+    with open(path, 'rb') as f, open(source_path, 'rb') as g:
+        if os.fstat(f.fileno()).st_size == 0 or os.fstat(g.fileno()).st_size == 0:
+            return start // segment_size
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as a, \
+                mmap.mmap(g.fileno(), 0, access=mmap.ACCESS_READ) as b:
+            for offset in range(start, start + length, segment_size):
+                if a[offset:offset + segment_size] != b[offset:offset + segment_size]:
+                    return offset // segment_size
+    return start // segment_size
+
+def verify(path, entry, segment_size, source_path=None):
+    """按清单条目流式校验 path，返回 {'ok', 'size', 'expected_size', 'first_bad_segment', 'reason'}
+
+    分块哈希不一致时，如果能访问原文件则逐段比较找出确切的段号，否则报告该块的第一个段。
+    """
+    size = os.path.getsize(path)
+    result = {'ok': False, 'size': size, 'expected_size': entry['size'],
+              'first_bad_segment': None, 'reason': None}
+    chunk_size = entry['chunk_size']
+    for index, data in enumerate(iter_chunks(path, chunk_size)):
+        if index >= len(entry['chunks']) or chunk_digest(data) != entry['chunks'][index]:
+            start = index * chunk_size
+            if source_path and os.path.exists(source_path) and index < len(entry['chunks']):
+                result['first_bad_segment'] = first_differing_segment(
+                    path, source_path, start, len(data), segment_size)
+            else:
+                result['first_bad_segment'] = start // segment_size
+            result['reason'] = '内容不一致' if size == entry['size'] else f"大小不一致 ({size} != {entry['size']})"
+            return result
+    if size != entry['size']:
+        result['first_bad_segment'] = size // segment_size
+        result['reason'] = f"大小不一致 ({size} != {entry['size']})"
+        return result
+    result['ok'] = True
+    return result
+
+def verify_against_source(path, source_path, segment_size=DEFAULT_SEGMENT_SIZE):
+    """根据原文件所在目录的清单校验；清单中没有该文件时现场计算原文件的条目"""
+    directory, name = os.path.split(source_path)
+    manifest = load_manifest(manifest_path(directory))
+    entry = None
+    if manifest and manifest.get('segment_size') == segment_size:
+        entry = manifest['files'].get(name)
+        if entry and os.path.exists(source_path) and os.path.getsize(source_path) != entry['size']:
+            entry = None    # 清单已过期
+    if entry is None:
+        if not os.path.exists(source_path):
+            return None
+        entry = file_entry(source_path, segment_size)
+    return verify(path, entry, segment_size, source_path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='测试数据集生成与校验')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = commands.add_parser('generate', help='生成测试文件')
+    generate_parser.add_argument('path')
+    generate_parser.add_argument('--size', required=True, help='大小，如 6442450 / 64M / 4G')
+    generate_parser.add_argument('--pattern', choices=PATTERNS, default='lorem')
+    generate_parser.add_argument('--seed', type=int, default=0, help='random 模式的随机种子')
+    generate_parser.add_argument('--no-manifest', action='store_true', help='不更新所在目录的清单')
+    generate_parser.add_argument('--segment-size', type=int, default=DEFAULT_SEGMENT_SIZE)
+
+    manifest_parser = commands.add_parser('manifest', help='生成或更新目录的清单')
+    manifest_parser.add_argument('directories', nargs='+')
+    manifest_parser.add_argument('--segment-size', type=int, default=DEFAULT_SEGMENT_SIZE)
+
+    verify_parser = commands.add_parser('verify', help='按清单校验取回的文件')
+    verify_parser.add_argument('path')
+    verify_parser.add_argument('--manifest', required=True)
+    verify_parser.add_argument('--name', help='清单中的文件名，默认与 path 的文件名相同')
+
+    args = parser.parse_args(argv)
+    if args.command == 'generate':
+        generate(args.path, parse_size(args.size), args.pattern, args.seed)
+        print(f"✓ {args.path}: {os.path.getsize(args.path)} 字节")
+        if not args.no_manifest:
+            path, _ = write_manifest(os.path.dirname(os.path.abspath(args.path)), args.segment_size)
+            print(f"✓ {path}")
+    elif args.command == 'manifest':
+        for directory in args.directories:
+            path, manifest = write_manifest(directory, args.segment_size)
+            print(f"✓ {path}: {len(manifest['files'])} 个文件")
+    else:
+        manifest = load_manifest(args.manifest)
+        name = args.name or os.path.basename(args.path)
+        if manifest is None or name not in manifest['files']:
+            sys.exit(f"清单中没有 {name}")
+        source_path = os.path.join(os.path.dirname(os.path.abspath(args.manifest)), name)
+        result = verify(args.path, manifest['files'][name], manifest['segment_size'], source_path)
+        if result['ok']:
+            print(f"✓ {args.path}: 与 {name} 一致")
+        else:
+            sys.exit(f"❌ {args.path}: {result['reason']}，第一个不一致的段 #{result['first_bad_segment']}")
+
+if __name__ == '__main__':
+    main()
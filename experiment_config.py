@@ -0,0 +1,172 @@
+"""
+实验配置工具 - 加载 network_config，读取 ini 配置并基于原始文件派生带覆盖项的新配置
+"""
+
+import copy
+import datetime
+import importlib.util
+import json
+import os
+import pprint
+import re
+import subprocess
+
+SECTION_RE = re.compile(r'^\s*\[([^\]]+)\]\s*$')
+KEY_RE = re.compile(r'^\s*([^#;=\s][^=]*?)\s*=\s*(.*?)\s*$')
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+RUN_FILE = 'run.json'
+
+def load_config(config_file='network_config.py'):
+    """加载网络配置；只定义了 topology 时由 topology.py 生成节点、链路、应用和测试"""
+    spec = importlib.util.spec_from_file_location("network_config", config_file)
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+    if hasattr(config, 'topology') and not hasattr(config, 'nodes'):
+        import topology
+        topology.expand_config(config)
+    return config
+
+def read_ini(path):
+    """读取 ini 为 {section: {key: value}}，值保持字符串"""
+    sections = {}
+    current = sections.setdefault('', {})
+    with open(path) as f:
+        for line in f:
+            match = SECTION_RE.match(line)
+            if match:
+                current = sections.setdefault(match.group(1).strip(), {})
+                continue
+            match = KEY_RE.match(line)
+            if match:
+                current[match.group(1)] = match.group(2)
+    if not sections['']:
+        del sections['']
+    return sections
+
+def format_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+def derive_ini(base_path, overrides, output_path):
+    """逐行复制 base_path，只替换 overrides {section: {key: value}} 中的键
+
+    保留原文件的注释和顺序；原文件中不存在的键追加到对应 section 末尾。
+    """
+    with open(base_path) as f:
+        lines = f.read().splitlines()
+
+    pending = {section: dict(values) for section, values in overrides.items()}
+    output = []
+    section = ''
+
+    def flush(section):
+        for key, value in pending.pop(section, {}).items():
+            output.append(f"{key} = {format_value(value)}")
+
+    for line in lines:
+        match = SECTION_RE.match(line)
+        if match:
+            flush(section)
+            section = match.group(1).strip()
+            output.append(line)
+            continue
+        match = KEY_RE.match(line)
+        if match and match.group(1) in pending.get(section, {}):
+            key = match.group(1)
+            output.append(f"{key} = {format_value(pending[section].pop(key))}")
+            continue
+        output.append(line)
+    flush(section)
+    for missing_section in list(pending):
+        output.append(f"[{missing_section}]")
+        flush(missing_section)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w') as f:
+        f.write('\n'.join(output) + '\n')
+    return output_path
+
+def parse_overrides(settings):
+    """把 {'section.key': value} 转换为 derive_ini 使用的 {section: {key: value}}"""
+    overrides = {}
+    for name, value in settings.items():
+        section, key = name.split('.', 1)
+        overrides.setdefault(section, {})[key] = value
+    return overrides
+
+# network_config 中描述网络与测试的变量
+NETWORK_CONFIG_KEYS = ('nodes', 'links', 'applications', 'routing', 'routes', 'nfd', 'scenarios', 'cross_traffic', 'tests')
+
+def network_config_values(config):
+    """取出 network_config 模块中的网络与测试定义，返回可修改的副本"""
+    return {key: copy.deepcopy(getattr(config, key)) for key in NETWORK_CONFIG_KEYS
+            if hasattr(config, key)}
+
+def dump_network_config(values, path, header=None):
+    """把 network_config_values 的结果写成可被 load_config 加载的 Python 文件"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        if header:
+            f.write(f"# {header}\n\n")
+        for key, value in values.items():
+            f.write(f"{key} = {pprint.pformat(value, sort_dicts=False)}\n\n")
+    return path
+
+def rename_nodes(values, mapping):
+    """按 mapping {旧名: 新名} 重命名网络配置中出现的所有节点"""
+    def rename(name):
+        return mapping.get(name, name)
+
+    values['nodes'] = {rename(name): node for name, node in values['nodes'].items()}
+    for link_config in values['links'].values():
+        link_config['nodes'] = tuple(rename(node) for node in link_config['nodes'])
+    for key in ('applications', 'routes', 'nfd'):
+        if key in values:
+            values[key] = {rename(name): value for name, value in values[key].items()}
+    for specs in values.get('cross_traffic', {}).values():
+        for spec in specs:
+            spec['src'], spec['dst'] = rename(spec['src']), rename(spec['dst'])
+    for test in values.get('tests', []):
+        consumers = test['consumer']
+        test['consumer'] = rename(consumers) if isinstance(consumers, str) else [rename(c) for c in consumers]
+        if 'sources' in test:
+            test['sources'] = [rename(source) for source in test['sources']]
+        if 'producer' in test:
+            test['producer'] = rename(test['producer'])
+        if 'nfd' in test:
+            test['nfd'] = {rename(name): value for name, value in test['nfd'].items()}
+    return values
+
+def git_revision(path=PROJECT_ROOT):
+    """当前提交 (有未提交的修改时带 -dirty 后缀)，不在 git 仓库中时返回 None"""
+    try:
+        output = subprocess.run(['git', 'describe', '--always', '--dirty', '--abbrev=40'],
+                                cwd=path, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip() or None
+
+def write_run_metadata(log_dir, config, config_file):
+    """把本次运行的网络配置、生产者 ini 和 git 版本写到 log_dir/run.json
+
+    消费者的有效配置由仿真器在各测试目录下生成 (<consumer>-conconfig.ini)。
+    """
+    values = network_config_values(config)
+    producer_ini = {
+        name: read_ini(app['config_file'])
+        for name, app in values.get('applications', {}).items()
+        if os.path.exists(app.get('config_file', ''))
+    }
+    metadata = {
+        'config_file': os.path.abspath(config_file),
+        'started': datetime.datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'network': values,
+        'producer_ini': producer_ini,
+    }
+    os.makedirs(log_dir, exist_ok=True)
+    path = os.path.join(log_dir, RUN_FILE)
+    with open(path, 'w') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False, default=str)
+    return path
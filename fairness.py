@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+多流公平性与收敛分析 - 基于各流的 goodput / cwnd 时间序列
+
+用法:
+    python3 fairness.py logs/<run>/<test> [--config network_config.py] [--window 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+import log_analysis
+import routing
+from experiment_config import load_config
+from consumer_output import GOODPUT_SUFFIX
+
+DEFAULT_WINDOW = 5.0            # 滑动窗口长度 (秒)
+DEFAULT_STEP = 1.0              # 对齐时间轴的步长 (秒)
+FAIR_THRESHOLD = 0.9            # Jain 指数达到该值视为收敛
+FAIR_SHARE_RATIO = 0.8          # 后加入的流达到公平份额的该比例视为获得份额
+FAIRNESS_FILE = 'fairness.json'
+
+def jain_index(values):
+    """Jain 公平性指数，忽略 NaN (未活跃的流)；不足两个活跃流时返回 NaN"""
+    values = np.asarray(values, dtype=np.float64)
+    active = ~np.isnan(values)
+    n = np.count_nonzero(active, axis=-1)
+    x = np.where(active, values, 0.0)
+    total = np.sum(x, axis=-1)
+    squares = np.sum(x * x, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        index = total * total / (n * squares)
+    return np.where(n >= 2, index, np.nan)
+
+def resample(series, step, origin=0.0, end=None):
+    """把 {flow: (t, v)} 前向填充到统一步长的时间轴，流开始前和结束后为 NaN"""
+    names = list(series)
+    if end is None:
+        end = max((t[-1] for t, _ in series.values() if len(t)), default=origin)
+    grid = np.arange(origin, end + step / 2, step)
+    matrix = np.full((len(grid), len(names)), np.nan)
+    for i, name in enumerate(names):
+        t, v = series[name]
+        if len(t) == 0:
+            continue
+        index = np.searchsorted(t, grid, side='right') - 1
+        active = (index >= 0) & (grid <= t[-1])
+        matrix[active, i] = v[index[active]]
+    return names, grid, matrix
+
+def sliding_mean(matrix, width):
+    """按列计算宽度为 width 个样本的滑动均值 (窗口内有 NaN 时结果为 NaN)"""
+    if width <= 1 or len(matrix) < width:
+        return matrix.copy()
+    valid = ~np.isnan(matrix)
+    zeros = np.zeros((1, matrix.shape[1]))
+    sums = np.cumsum(np.vstack([zeros, np.where(valid, matrix, 0.0)]), axis=0)
+    counts = np.cumsum(np.vstack([zeros, valid]), axis=0)
+    window_sums = sums[width:] - sums[:-width]
+    window_counts = counts[width:] - counts[:-width]
+    result = np.full(matrix.shape, np.nan)
+    result[width - 1:] = np.where(window_counts == width, window_sums / width, np.nan)
+    return result
+
+def load_goodput_series(test_dir):
+    """读取各流的 <consumer>-goodput.tsv，并按 flows.json 的启动时间对齐"""
+    starts = log_analysis.read_flow_starts(test_dir)
+    origin = min(starts.values()) if starts else 0.0
+    series = {}
+    for name in sorted(os.listdir(test_dir)):
+        if not name.endswith(GOODPUT_SUFFIX):
+            continue
+        flow = name[:-len(GOODPUT_SUFFIX)]
+        data = log_analysis.parse_tsv(os.path.join(test_dir, name), 2)
+        offset = starts.get(flow, origin) - origin
+        series[flow] = (data[:, 0] + offset, data[:, 1])
+    return series
+
+def convergence_time(times, index, after, threshold=FAIR_THRESHOLD):
+    """after 之后 Jain 指数首次达到阈值并一直保持的时刻，相对 after 返回；未收敛返回 None"""
+    valid = (times >= after) & ~np.isnan(index)
+    if not np.any(valid):
+        return None
+    t, j = times[valid], index[valid]
+    below = np.nonzero(j < threshold)[0]
+    if len(below) == 0:
+        return float(t[0] - after)
+    if below[-1] + 1 >= len(t):
+        return None
+    return float(t[below[-1] + 1] - after)
+
+def join_times(series):
+    return {flow: float(t[0]) for flow, (t, _) in series.items() if len(t)}
+
+def late_joiner_share_times(names, grid, windowed, joins, ratio=FAIR_SHARE_RATIO):
+    """每个晚于第一个流加入的流，达到 ratio × 公平份额所需的时间"""
+    first = min(joins.values())
+    n = np.count_nonzero(~np.isnan(windowed), axis=1)
+    fair = np.where(n > 0, np.nansum(windowed, axis=1) / np.maximum(n, 1), np.nan)
+    result = {}
+    for i, flow in enumerate(names):
+        if flow not in joins or joins[flow] <= first:
+            continue
+        reached = np.nonzero((grid >= joins[flow]) & (windowed[:, i] >= ratio * fair))[0]
+        result[flow] = float(grid[reached[0]] - joins[flow]) if len(reached) else None
+    return result
+
+def link_utilisation(config, flows, mean_goodput):
+    """按最短路径把各流的平均 goodput 累加到经过的链路上，与链路 bw 比较"""
+    load = {}
+    for flow, host, interest in flows:
+        producer = routing.producer_of(config, interest)
+        if flow not in mean_goodput or producer is None:
+            continue
+        for link_name in routing.shortest_path_links(config, host, producer):
+            load[link_name] = load.get(link_name, 0.0) + mean_goodput[flow]
+    return {
+        link_name: {
+            'load_mbps': value,
+            'bw_mbps': config.links[link_name]['bw'],
+            'utilisation': value / config.links[link_name]['bw'],
+        }
+        for link_name, value in load.items()
+    }
+
+def analyze_test(test_dir, config=None, window=DEFAULT_WINDOW, step=DEFAULT_STEP):
+    """计算一次多流测试的公平性、收敛时间、链路利用率和后加入流获得份额的时间"""
+    series = load_goodput_series(test_dir)
+    result = {'test': os.path.basename(os.path.normpath(test_dir)), 'flows': sorted(series)}
+    if not series:
+        return result
+
+    names, grid, matrix = resample(series, step)
+    width = max(1, int(round(window / step)))
+    windowed = sliding_mean(matrix, width)
+    index = jain_index(windowed)
+    joins = join_times(series)
+    last_join = max(joins.values())
+
+    result['window_s'] = window
+    result['jain'] = {
+        'mean': float(np.nanmean(index)) if np.any(~np.isnan(index)) else None,
+        'min': float(np.nanmin(index)) if np.any(~np.isnan(index)) else None,
+        'series': [[float(t), float(j)] for t, j in zip(grid, index) if not np.isnan(j)],
+    }
+    result['convergence_s'] = convergence_time(grid, index, last_join)
+    result['late_joiner_share_s'] = late_joiner_share_times(names, grid, windowed, joins)
+
+    mean_goodput = {name: float(np.nanmean(matrix[:, i])) for i, name in enumerate(names)
+                    if np.any(~np.isnan(matrix[:, i]))}
+    result['mean_goodput_mbps'] = mean_goodput
+
+    cwnd_names, cwnd_grid, cwnd = log_analysis.merge_cwnd(test_dir)
+    if len(cwnd_names) >= 2 and len(cwnd_grid):
+        cwnd_index = jain_index(cwnd)
+        if np.any(~np.isnan(cwnd_index)):
+            result['cwnd_jain_mean'] = float(np.nanmean(cwnd_index))
+
+    if config is not None:
+        flows_path = os.path.join(test_dir, log_analysis.FLOWS_FILE)
+        if os.path.exists(flows_path):
+            with open(flows_path) as f:
+                flows = [(flow['consumer'], flow.get('host', flow['consumer']), flow['interest'])
+                         for flow in json.load(f)]
+            result['links'] = link_utilisation(config, flows, mean_goodput)
+    return result
+
+def print_summary(result):
+    """输出公平性分析摘要"""
+    print(f"\n--- 公平性分析: {result['test']} ---")
+    if 'jain' not in result:
+        print("  无 goodput 序列")
+        return
+    jain = result['jain']
+    if jain['mean'] is not None:
+        print(f"  Jain 指数 (窗口 {result['window_s']:.0f}s): 平均 {jain['mean']:.3f}, 最小 {jain['min']:.3f}")
+    if 'cwnd_jain_mean' in result:
+        print(f"  cwnd Jain 指数: 平均 {result['cwnd_jain_mean']:.3f}")
+    convergence = result['convergence_s']
+    print(f"  收敛到公平份额: {'未收敛' if convergence is None else f'{convergence:.1f} 秒'}")
+    for flow, elapsed in result['late_joiner_share_s'].items():
+        print(f"  后加入的 {flow} 获得份额: {'未达到' if elapsed is None else f'{elapsed:.1f} 秒'}")
+    for link_name, link in result.get('links', {}).items():
+        print(f"  链路 {link_name}: {link['load_mbps']:.2f}/{link['bw_mbps']} Mbps "
+              f"({link['utilisation']:.0%})")
+
+def write_result(test_dir, result):
+    with open(os.path.join(test_dir, FAIRNESS_FILE), 'w') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='多流公平性与收敛分析')
+    parser.add_argument('tests', nargs='+', help='logs/<run>/<test> 目录')
+    parser.add_argument('--config', help='network_config.py，用于计算链路利用率')
+    parser.add_argument('--window', type=float, default=DEFAULT_WINDOW, help='滑动窗口 (秒)')
+    parser.add_argument('--json', action='store_true', help='输出 JSON')
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config) if args.config else None
+
+    results = [analyze_test(test_dir, config, args.window) for test_dir in args.tests]
+    if args.json:
+        json.dump(results if len(results) > 1 else results[0], sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        for result in results:
+            print_summary(result)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+cwnd.log / rtt.log 分析工具 - 基于 NumPy 的分块加载与统计，输出 JSON 或多次运行的对比表
+
+用法:
+    python3 log_analysis.py logs/<run>                  # 单次运行，输出 JSON
+    python3 log_analysis.py logs/<run1> logs/<run2>     # 多次运行，输出对比表
+    python3 log_analysis.py --merge logs/<run>          # 额外写出对齐后的 cwnd-merged.tsv
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from consumer_output import DEFAULT_SEGMENT_SIZE
+
+CWND_COLUMNS = ('time', 'cwnd')
+RTT_COLUMNS = ('segment', 'rtt', 'rttvar', 'srtt', 'rto')
+CHUNK_SIZE = 16 << 20           # 分块读取的大小 (字节)
+CACHE_MIN_SIZE = 64 << 20       # 超过该大小的日志解析后缓存为 .npy，之后用内存映射加载
+RTT_PERCENTILES = (50, 90, 95, 99)
+RTO_JUMP_RATIO = 1.5            # rto 相对上一个样本增长超过该比例视为一次退避
+SLOW_START_STEP = 0.999         # 每次 cwnd 增量不小于 1 段视为慢启动
+FLOWS_FILE = 'flows.json'
+MERGED_CWND_FILE = 'cwnd-merged.tsv'
+
+def parse_lines(text, ncols):
+    """逐行解析，丢弃列数不对或无法解析的行 (例如多个进程交错写入同一文件)"""
+    rows = []
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) != ncols:
+            continue
+        try:
+            rows.append([float(value) for value in fields])
+        except ValueError:
+            continue
+    return np.array(rows, dtype=np.float64).reshape(-1)
+
+def parse_block(text, ncols):
+    """快速路径用 np.fromstring 整块解析，数值个数与行数不符时退回逐行解析"""
+    values = np.fromstring(text, sep=' ')
+    if len(values) == text.count('\n') * ncols:
+        return values
+    return parse_lines(text, ncols)
+
+def parse_tsv(path, ncols):
+    """分块解析带表头的数值 TSV，返回 shape 为 (n, ncols) 的 float64 数组"""
+    chunks = []
+    remainder = b''
+    with open(path, 'rb') as f:
+        f.readline()  # 表头
+        while True:
+            block = f.read(CHUNK_SIZE)
+            if not block:
+                break
+            block = remainder + block
+            cut = block.rfind(b'\n') + 1
+            remainder = block[cut:]
+            if cut:
+                chunks.append(parse_block(block[:cut].decode('ascii', 'replace'), ncols))
+    # 最后一行可能是正在写入的半行，只有列数完整时才保留
+    chunks.append(parse_lines(remainder.decode('ascii', 'replace'), ncols))
+    values = np.concatenate(chunks)
+    return values.reshape(-1, ncols)
+
+def load_tsv(path, columns):
+    """加载 TSV 为 {列名: 数组}；大文件的解析结果缓存为 .npy 并以内存映射方式读取"""
+    cache_path = path + '.npy'
+    if (os.path.exists(cache_path)
+            and os.path.getmtime(cache_path) >= os.path.getmtime(path)):
+        data = np.load(cache_path, mmap_mode='r')
+    else:
+        data = parse_tsv(path, len(columns))
+        if os.path.getsize(path) >= CACHE_MIN_SIZE:
+            try:
+                np.save(cache_path, data)
+            except OSError:
+                pass
+    return {name: data[:, i] for i, name in enumerate(columns)}
+
+def load_cwnd(path):
+    return load_tsv(path, CWND_COLUMNS)
+
+def load_rtt(path):
+    return load_tsv(path, RTT_COLUMNS)
+
+def segments_received(rtt):
+    """按 rtt.log 中最大的段号估计已接收的段数 (段号从 0 开始)
+
+    rtt.log 只记录没有重传过的段 (Karn 规则)，重传的段没有 RTT 样本，直接数不同的段号会少算。
+    """
+    if len(rtt['segment']) == 0:
+        return 0
+    return int(rtt['segment'].max()) + 1
+
+def describe(values):
+    if len(values) == 0:
+        return None
+    return {
+        'mean': float(np.mean(values)),
+        'min': float(np.min(values)),
+        'max': float(np.max(values)),
+    }
+
+def analyze_rtt(rtt):
+    """RTT 分位数、srtt/rto 统计以及 rto 跳变 (退避) 事件"""
+    samples = rtt['rtt']
+    if len(samples) == 0:
+        return {'samples': 0}
+    result = {
+        'samples': int(len(samples)),
+        'rtt_ms': describe(samples),
+        'srtt_ms': describe(rtt['srtt']),
+        'rto_ms': describe(rtt['rto']),
+    }
+    for p, value in zip(RTT_PERCENTILES, np.percentile(samples, RTT_PERCENTILES)):
+        result['rtt_ms'][f'p{p}'] = float(value)
+    rto = np.asarray(rtt['rto'])
+    jumps = np.nonzero(rto[1:] > rto[:-1] * RTO_JUMP_RATIO)[0] + 1
+    result['backoff_events'] = int(len(jumps))
+    result['backoff_segments'] = [int(s) for s in np.asarray(rtt['segment'])[jumps][:100]]
+    return result
+
+def analyze_cwnd(cwnd):
+    """cwnd 的时间加权均值、最大值，以及慢启动/拥塞避免/窗口下降的时间占比"""
+    t = np.asarray(cwnd['time'])
+    w = np.asarray(cwnd['cwnd'])
+    # 丢弃时间比下一个样本还晚的乱序样本
+    keep = np.ones(len(t), dtype=bool)
+    keep[:-1] = t[:-1] <= t[1:]
+    dropped = int(len(t) - np.count_nonzero(keep))
+    t, w = t[keep], w[keep]
+    if len(t) == 0:
+        return {'samples': 0}
+    result = {
+        'samples': int(len(t)),
+        'max': float(np.max(w)),
+        'final': float(w[-1]),
+    }
+    if dropped:
+        result['dropped_samples'] = dropped
+    if len(t) < 2:
+        result['duration_s'] = 0.0
+        result['mean'] = float(w[0])
+        return result
+
+    dt = np.clip(np.diff(t), 0, None)
+    dw = np.diff(w)
+    total = float(np.sum(dt))
+    result['duration_s'] = total
+    result['mean'] = float(np.sum(w[:-1] * dt) / total) if total > 0 else float(np.mean(w))
+
+    # 以每一步的窗口变化判断所处阶段，并把这一步到下一个样本的时间计入该阶段
+    slow_start = dw >= SLOW_START_STEP
+    decrease = dw < 0
+    avoidance = ~slow_start & ~decrease
+    result['slow_start_s'] = float(np.sum(dt[slow_start]))
+    result['congestion_avoidance_s'] = float(np.sum(dt[avoidance]))
+    result['decrease_events'] = int(np.count_nonzero(decrease))
+    if total > 0:
+        result['slow_start_ratio'] = result['slow_start_s'] / total
+    return result
+
+def find_flows(run_dir):
+    """返回 {flow: (cwnd_path, rtt_path)}
+
+    每个消费者写 <consumer>-cwnd.log / <consumer>-rtt.log；旧的运行只有共享的
+    cwnd.log / rtt.log，作为名为 'consumer' 的单个流处理。
+    """
+    flows = {}
+    for name in sorted(os.listdir(run_dir)):
+        if name.endswith('-cwnd.log'):
+            flow = name[:-len('-cwnd.log')]
+            flows[flow] = (os.path.join(run_dir, name),
+                           os.path.join(run_dir, f"{flow}-rtt.log"))
+    if not flows:
+        cwnd_path = os.path.join(run_dir, 'cwnd.log')
+        rtt_path = os.path.join(run_dir, 'rtt.log')
+        if os.path.exists(cwnd_path) or os.path.exists(rtt_path):
+            flows['consumer'] = (cwnd_path, rtt_path)
+    return flows
+
+def analyze_flow(cwnd_path, rtt_path, segment_size=DEFAULT_SEGMENT_SIZE):
+    """分析单个流的 cwnd/rtt 日志"""
+    result = {}
+    duration = None
+    if os.path.exists(cwnd_path):
+        result['cwnd'] = analyze_cwnd(load_cwnd(cwnd_path))
+        duration = result['cwnd'].get('duration_s')
+    if os.path.exists(rtt_path):
+        rtt = load_rtt(rtt_path)
+        result['rtt'] = analyze_rtt(rtt)
+        segments = segments_received(rtt)
+        result['segments'] = segments
+        # rtt.log 没有时间戳，传输时长取 cwnd.log 的时间跨度
+        if duration:
+            result['goodput_mbps'] = segments * segment_size * 8 / duration / 1e6
+    return result
+
+def analyze_run(run_dir, segment_size=DEFAULT_SEGMENT_SIZE):
+    """分析一次运行中所有流的 cwnd/rtt 日志"""
+    return {
+        'run': os.path.basename(os.path.normpath(run_dir)),
+        'flows': {
+            flow: analyze_flow(cwnd_path, rtt_path, segment_size)
+            for flow, (cwnd_path, rtt_path) in find_flows(run_dir).items()
+        },
+    }
+
+def read_flow_starts(run_dir):
+    """读取仿真器写入的 flows.json 中各流的启动时间"""
+    path = os.path.join(run_dir, FLOWS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {flow['consumer']: flow['start_time'] for flow in json.load(f)
+                if flow.get('start_time') is not None}
+
+def merge_cwnd(run_dir):
+    """把各流的 cwnd 序列对齐到同一时间轴
+
+    每个流的时间是相对自身启动的，按 flows.json 中的启动时间加上偏移；在所有
+    样本时间的并集上对每个流做前向填充，流开始前和结束后为 NaN。
+    返回 (flow 名称列表, 时间数组, shape 为 (n, flows) 的 cwnd 矩阵)。
+    """
+    flows = find_flows(run_dir)
+    starts = read_flow_starts(run_dir)
+    origin = min(starts.values()) if starts else 0.0
+    names, series = [], []
+    for flow, (cwnd_path, _) in flows.items():
+        if not os.path.exists(cwnd_path):
+            continue
+        cwnd = load_cwnd(cwnd_path)
+        offset = starts.get(flow, origin) - origin
+        names.append(flow)
+        series.append((np.asarray(cwnd['time']) + offset, np.asarray(cwnd['cwnd'])))
+    if not series:
+        return names, np.empty(0), np.empty((0, 0))
+
+    grid = np.unique(np.concatenate([t for t, _ in series]))
+    merged = np.full((len(grid), len(series)), np.nan)
+    for i, (t, w) in enumerate(series):
+        if len(t) == 0:
+            continue
+        order = np.argsort(t, kind='stable')
+        t, w = t[order], w[order]
+        index = np.searchsorted(t, grid, side='right') - 1
+        active = (index >= 0) & (grid <= t[-1])
+        merged[active, i] = w[index[active]]
+    return names, grid, merged
+
+def write_merged_cwnd(run_dir):
+    """把对齐后的 cwnd 写成 cwnd-merged.tsv (time + 每个流一列)"""
+    names, grid, merged = merge_cwnd(run_dir)
+    path = os.path.join(run_dir, MERGED_CWND_FILE)
+    with open(path, 'w') as f:
+        f.write('\t'.join(['time'] + names) + '\n')
+        if len(grid):
+            np.savetxt(f, np.column_stack([grid, merged]), fmt='%.6g', delimiter='\t')
+    return path
+
+def format_table(results):
+    """多次运行的对比表，每个流一行"""
+    def get(result, *keys):
+        value = result
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                return None
+            value = value[key]
+        return value
+
+    columns = [
+        ('run', lambda r: r['run'], '{}'),
+        ('flow', lambda r: r['flow'], '{}'),
+        ('segments', lambda r: r.get('segments'), '{:d}'),
+        ('goodput(Mbps)', lambda r: r.get('goodput_mbps'), '{:.2f}'),
+        ('rtt p50', lambda r: get(r, 'rtt', 'rtt_ms', 'p50'), '{:.2f}'),
+        ('rtt p99', lambda r: get(r, 'rtt', 'rtt_ms', 'p99'), '{:.2f}'),
+        ('srtt', lambda r: get(r, 'rtt', 'srtt_ms', 'mean'), '{:.2f}'),
+        ('rto max', lambda r: get(r, 'rtt', 'rto_ms', 'max'), '{:.1f}'),
+        ('cwnd mean', lambda r: get(r, 'cwnd', 'mean'), '{:.1f}'),
+        ('cwnd max', lambda r: get(r, 'cwnd', 'max'), '{:.0f}'),
+        ('slow start', lambda r: get(r, 'cwnd', 'slow_start_ratio'), '{:.0%}'),
+        ('backoffs', lambda r: get(r, 'rtt', 'backoff_events'), '{:d}'),
+    ]
+    rows = [[name for name, _, _ in columns]]
+    flow_results = [dict(metrics, run=result['run'], flow=flow)
+                    for result in results
+                    for flow, metrics in result['flows'].items()]
+    for result in flow_results:
+        row = []
+        for _, getter, fmt in columns:
+            value = getter(result)
+            row.append('-' if value is None else fmt.format(value))
+        rows.append(row)
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    lines = ['  '.join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows]
+    lines.insert(1, '  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='分析 cwnd.log / rtt.log')
+    parser.add_argument('runs', nargs='+', help='logs/ 下的运行目录')
+    parser.add_argument('--segment-size', type=int, default=DEFAULT_SEGMENT_SIZE,
+                        help='段大小 (字节)，用于计算 goodput')
+    parser.add_argument('--json', action='store_true', help='多次运行时也输出 JSON')
+    parser.add_argument('--merge', action='store_true',
+                        help='同时把各流的 cwnd 对齐写入 cwnd-merged.tsv')
+    args = parser.parse_args(argv)
+
+    if args.merge:
+        for run in args.runs:
+            print(f"✓ {write_merged_cwnd(run)}", file=sys.stderr)
+
+    results = [analyze_run(run, args.segment_size) for run in args.runs]
+    if len(results) == 1 or args.json:
+        output = results[0] if len(results) == 1 else results
+        json.dump(output, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        print(format_table(results))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+多数据源 / 多路径获取 - 同一数据集由多个生产者以共享前缀提供，安装到所有数据源的多路径 FIB，
+从生产者日志统计每个段由哪个生产者应答，并对比多源与单源获取的吞吐量
+
+测试中的用法:
+    {
+        'name': 'multi_source',
+        'consumer': ['c1', 'c2'],
+        'interest': '/shared/testfile_6442450.txt',   # 第一个名称组件为各数据源共用的前缀
+        'sources': ['p1', 'p2', 'p3'],                # 提供该数据集的生产者节点 (使用各自 applications 的目录)
+        'strategy': 'asf',                            # 共享前缀的转发策略: multicast / asf / random (负载均衡)
+        'compare_single': True,                       # 再只用第一个数据源运行一次作为对比
+        'description': '...',
+    }
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+
+DEFAULT_STRATEGY = 'asf'
+MULTIPATH_FILE = 'multipath.json'
+SEGMENT_SOURCES_FILE = 'segment-sources.tsv'
+DATA_RE = re.compile(r'^Data: Name: (\S+)/seg=(\d+)')
+
+def shared_prefix(interest):
+    """'/shared/testfile.txt' -> '/shared'"""
+    return '/' + interest.strip('/').split('/')[0]
+
+def test_interests(test):
+    interests = test['interest']
+    return interests if isinstance(interests, list) else [interests]
+
+def modes(test):
+    """[(模式, 数据源)]: 先用全部数据源，compare_single 时再只用第一个数据源"""
+    result = [('multi', list(test['sources']))]
+    if test.get('compare_single', True) and len(test['sources']) > 1:
+        result.append(('single', list(test['sources'][:1])))
+    return result
+
+def mode_test(test, sources):
+    """某个模式下实际运行的测试: 去掉 sources，并把共享前缀的策略加入测试的 nfd 覆盖项"""
+    prefixes = {shared_prefix(interest) for interest in test_interests(test)}
+    strategy = test.get('strategy', DEFAULT_STRATEGY)
+    nfd = {node: dict(values) for node, values in test.get('nfd', {}).items()}
+    default = nfd.setdefault('default', {})
+    default['strategies'] = {**default.get('strategies', {}), **{prefix: strategy for prefix in prefixes}}
+    derived = {key: value for key, value in test.items() if key not in ('sources', 'compare_single')}
+    derived['nfd'] = nfd
+    derived['producer'] = sources[0]    # 内容校验使用的原文件所在的生产者
+    return derived
+
+def segment_sources(log_paths, prefix):
+    """逐行读取各生产者日志中的 Data，统计每个生产者发送的段数，以及每个段由哪些生产者发送
+
+    log_paths 为 [(producer, path)]；返回 ({producer: Data 数}, 每段的生产者位掩码数组)。
+    """
+    counts = {}
+    owners = np.zeros(0, dtype=np.uint32)
+    prefix = prefix.rstrip('/') + '/'
+    for index, (producer, path) in enumerate(log_paths):
+        counts[producer] = 0
+        if not os.path.exists(path):
+            continue
+        segments = []
+        with open(path, 'rb') as f:
+            for raw in f:
+                if not raw.startswith(b'Data: '):
+                    continue
+                match = DATA_RE.match(raw.decode('utf-8', errors='replace'))
+                if match and match.group(1).startswith(prefix):
+                    segments.append(int(match.group(2)))
+        counts[producer] = len(segments)
+        if segments:
+            segments = np.asarray(segments, dtype=np.int64)
+            if segments.max() >= len(owners):
+                owners = np.concatenate([owners, np.zeros(segments.max() + 1 - len(owners), dtype=np.uint32)])
+            owners[segments] |= np.uint32(1 << index)
+    return counts, owners
+
+def owner_runs(owners, producers):
+    """把每段的生产者位掩码压缩为 [(起始段, 结束段, 生产者列表)]"""
+    if not len(owners):
+        return []
+    boundaries = np.nonzero(np.diff(owners))[0] + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries - 1, [len(owners) - 1]])
+    runs = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        mask = int(owners[start])
+        runs.append((start, end, [producer for i, producer in enumerate(producers) if mask >> i & 1]))
+    return runs
+
+def write_segment_sources(path, runs):
+    with open(path, 'w') as f:
+        f.write('first_segment\tlast_segment\tproducers\n')
+        for start, end, producers in runs:
+            f.write(f"{start}\t{end}\t{','.join(producers) or '-'}\n")
+
+def summarize(sources, results, counts, owners):
+    """一个模式的汇总: 吞吐量和各生产者应答的段数"""
+    succeeded = [result for result in results if result.success]
+    bits = np.unpackbits(owners.view(np.uint8)).reshape(-1, 32).sum(axis=1) if len(owners) else np.zeros(0)
+    total = sum(counts.values())
+    return {
+        'sources': sources,
+        'flows': len(results),
+        'succeeded': len(succeeded),
+        'aggregate_goodput_mbps': sum(result.goodput_mbps for result in succeeded),
+        'mean_goodput_mbps': (sum(result.goodput_mbps for result in succeeded) / len(succeeded)
+                              if succeeded else None),
+        'mean_wall_time': (sum(result.wall_time for result in succeeded) / len(succeeded)
+                           if succeeded else None),
+        'data_by_producer': counts,
+        'share_by_producer': {producer: count / total for producer, count in counts.items()} if total else {},
+        'segments_answered': int(np.count_nonzero(bits)),
+        'segments_answered_by_several': int(np.count_nonzero(bits > 1)),
+    }
+
+def compare(summaries):
+    """多源相对单源的吞吐量之比"""
+    result = {'modes': summaries}
+    multi, single = summaries.get('multi'), summaries.get('single')
+    if multi and single and single['aggregate_goodput_mbps']:
+        result['speedup'] = multi['aggregate_goodput_mbps'] / single['aggregate_goodput_mbps']
+    return result
+
+def write_result(test_dir, result):
+    with open(os.path.join(test_dir, MULTIPATH_FILE), 'w') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+def print_summary(result):
+    print("\n--- 多源获取 ---")
+    labels = {'multi': '多源', 'single': '单源'}
+    for mode, summary in result['modes'].items():
+        shares = ', '.join(f"{producer} {summary['data_by_producer'][producer]} "
+                           f"({summary['share_by_producer'].get(producer, 0) * 100:.0f}%)"
+                           for producer in summary['data_by_producer'])
+        print(f"  {labels.get(mode, mode)} ({', '.join(summary['sources'])}): "
+              f"总 goodput {summary['aggregate_goodput_mbps']:.2f} Mbps, "
+              f"成功 {summary['succeeded']}/{summary['flows']}")
+        print(f"    各生产者发送的 Data: {shares or '-'}, "
+              f"多个生产者应答的段 {summary['segments_answered_by_several']}")
+    if 'speedup' in result:
+        print(f"  多源 / 单源: {result['speedup']:.2f}x")
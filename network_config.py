@@ -5,6 +5,14 @@
 import os
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 
+# 生成的拓扑 (可选): 定义 topology 并删去 nodes / links / applications / tests 时，
+# 由 topology.py 自动生成 (line / star / dumbbell / grid / fat-tree / waxman / ba)
+# topology = {
+#     'type': 'grid', 'rows': 10, 'cols': 10,
+#     'consumers': 8, 'producers': 2, 'seed': 1,
+#     'link': {'bw': {'uniform': [50, 100]}, 'delay': {'choice': ['1ms', '5ms']}, 'loss': 0},
+# }
+
 # 节点配置
 nodes = {
     'consumer1': {'ip': '10.0.0.1/24', 'type': 'consumer'},
@@ -26,6 +34,7 @@ links = {
         'max_queue_size': 100,                  # 最大队列大小 (字节)
         'use_htb': True,                        # 使用 HTB 队列调度
         'jitter': None                          # 抖动 (可选)
+        # 'ips': ('10.0.1.1/30', '10.0.1.2/30'),  # 链路两端的 IP (可选，多跳拓扑需要)
     },
     'consumer2-producer2': {
         'nodes': ('consumer2', 'producer2'),
@@ -66,7 +75,13 @@ applications = {
     },
 }
 
-# 路由配置
+# 自动路由配置: 根据 links 为每个生产者前缀计算最短路径 FIB
+routing = {
+    'metric': 'delay',          # 链路代价: 'delay' (延迟) / 'bw' (带宽倒数) / 'hop' (跳数)
+    'multipath': False,         # True 时安装所有无环的下一跳，由转发策略选择
+}
+
+# 静态路由配置 (可选，会与自动计算的路由一起安装)
 routes = {
     # 节点名称: [(前缀, 下一跳)]
     'consumer1': [('/producer1', 'udp4://10.0.0.2:6363')],
@@ -77,6 +92,42 @@ routes = {
     'producer3': [('/consumer3', 'udp4://10.0.0.5:6363')],
 }
 
+# NFD 表与转发策略 (可选): 'default' 作用于所有节点，节点名的设置覆盖 'default'
+nfd = {
+    'default': {
+        'cs_max_packets': 65536,                # 内容缓存容量 (包)，0 为不缓存
+        'cs_policy': 'lru',                     # lru / priority_fifo (只能在启动时设置)
+        'strategies': {'/': 'best-route'},      # 前缀: 转发策略
+        'congestion_marking': True,             # face 的拥塞标记
+        'congestion_marking_interval': None,    # 拥塞标记间隔 (毫秒)，None 为 NFD 默认值
+    },
+    # 'producer1': {'cs_max_packets': 0},
+}
+
+# 链路场景 (可选): 测试中按时间改变链路条件，测试通过 'scenario' 引用
+scenarios = {
+    # 场景名: [事件]，'at' 为相对测试开始的秒数，带 'duration' 的事件到时恢复原状
+    'bw_step': [
+        {'at': 10, 'link': 'consumer1-producer1', 'bw': 20},                        # 带宽阶跃
+        {'at': 20, 'link': 'consumer1-producer1', 'delay': '50ms', 'duration': 5},  # 时延尖峰
+        {'at': 30, 'link': 'consumer1-producer1', 'loss': 5, 'duration': 2},        # 丢包突发
+        {'at': 40, 'link': 'consumer1-producer1', 'down': True, 'duration': 1},     # 链路中断
+    ],
+}
+
+# 背景流量 (可选): 测试期间在节点之间运行的竞争流量，测试通过 'cross_traffic' 引用
+cross_traffic = {
+    # 名称: [流]，mode 为 cbr / onoff / bulk，rate 单位 Mbps，start / duration 单位秒
+    'cbr_50': [
+        {'src': 'producer1', 'dst': 'consumer1', 'mode': 'cbr', 'rate': 50},
+    ],
+    'onoff_bulk': [
+        {'src': 'producer1', 'dst': 'consumer1', 'mode': 'onoff', 'rate': 80, 'on': 2, 'off': 3},
+        {'src': 'producer2', 'dst': 'consumer2', 'mode': 'bulk', 'start': 5, 'duration': 20},
+        # {'src': 'producer3', 'dst': 'consumer3', 'mode': 'cbr', 'rate': 30, 'tool': 'iperf3'},
+    ],
+}
+
 # 测试配置
 tests = [
     {
@@ -88,9 +139,31 @@ tests = [
             '/producer2/testfile_6442450.txt',
             '/producer3/testfile_6442450.txt',
         ],
-        'description': '3个consumer分别请求3个producer的同一文件'
+        'description': '3个consumer分别请求3个producer的同一文件',
+        # 可选的调度参数:
+        # 'repeat': 100,                                    # 每个消费者并发的流数
+        # 'arrival': {'mode': 'poisson', 'rate': 20, 'seed': 1},  # together / stagger (interval) / poisson (rate)
+        # 'timeout': 600,                                   # 单流超时 (秒)，超时的消费者被终止
+        # 'max_running': 500,                               # 同时运行的流数上限
+        # 'scenario': 'bw_step',                            # 测试中执行的链路场景
+        # 'cross_traffic': 'cbr_50',                        # 测试中运行的背景流量
+        # 'nfd': {'default': {'cs_max_packets': 0}},        # 只在本测试期间生效的 NFD 设置
+        # 'nfd_sample_interval': 0.5,                      # NFD 计数器采样间隔 (秒)，0 为不采样
+        # 'cold_cache': False,                              # 批处理中不在每次试验前清空内容缓存
+        # 'dashboard': True,                                # 测试期间显示实时面板 (也可以用 --dashboard)
     },
     
+    # 多数据源: 同一文件由多个生产者以共享前缀提供，对比多源与单源的吞吐量
+    # {
+    #     'name': 'multi_source',
+    #     'consumer': ['consumer1', 'consumer2', 'consumer3'],
+    #     'interest': '/shared/testfile_6442450.txt',
+    #     'sources': ['producer1', 'producer2', 'producer3'],
+    #     'strategy': 'asf',                                # multicast / asf / random
+    #     'config': os.path.join(PROJECT_ROOT, 'exp-conconfig.ini'),
+    #     'description': '3个consumer从3个producer多路径获取同一文件',
+    # },
+    
     # 你可以添加更多测试
     # {
     #     'name': 'large_file_test',
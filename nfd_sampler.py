@@ -0,0 +1,177 @@
+"""
+NFD 计数器采样 - 测试期间按固定间隔读取每个节点的转发器计数器 (nfdc status show) 和
+face 计数器 (nfdc face list)，解析为结构化记录保存在有界环形缓冲区中，并换算为各 face 的包速率
+
+输出到测试目录 (time 为 Unix 时间戳，与 flows.json 的 start_time 相同，可与 cwnd / rtt 日志对齐):
+    nfd-forwarder.tsv   time node pit_entries cs_entries 以及 Interest / Data / Nack 的入出速率 (每秒)
+    nfd-faces.tsv       time node face remote 以及各方向的 Interest / Data / Nack 速率 (每秒) 和 Mbps
+"""
+
+from collections import deque
+import os
+import re
+import threading
+import time
+
+import nfd_tables
+
+DEFAULT_INTERVAL = 1.0          # 采样间隔 (秒)
+MAX_RECORDS = 100000            # 环形缓冲区保留的记录数 (每个节点每次采样一条)
+FORWARDER_FILE = 'nfd-forwarder.tsv'
+FACES_FILE = 'nfd-faces.tsv'
+FACE_RE = re.compile(
+    r'faceid=(\d+) remote=(\S+) local=(\S+).*?'
+    r'counters=\{in=\{(\d+)i (\d+)d (\d+)n (\d+)B\} out=\{(\d+)i (\d+)d (\d+)n (\d+)B\}\}')
+FACE_COUNTERS = ('in_interests', 'in_data', 'in_nacks', 'in_bytes',
+                 'out_interests', 'out_data', 'out_nacks', 'out_bytes')
+# 转发器计数器中按速率输出的项，和 nfd-forwarder.tsv 中对应的列名
+FORWARDER_RATES = (('nInInterests', 'in_interests'), ('nOutInterests', 'out_interests'),
+                   ('nInData', 'in_data'), ('nOutData', 'out_data'),
+                   ('nInNacks', 'in_nacks'), ('nOutNacks', 'out_nacks'),
+                   ('nUnsatisfiedInterests', 'unsatisfied'))
+INTERNAL_SCHEMES = ('internal://', 'contentstore://', 'null://')
+
+def parse_faces(text):
+    """解析 nfdc face list 的输出，返回 {faceid: {'remote', 'local', 计数器...}}，跳过内部 face"""
+    faces = {}
+    for match in FACE_RE.finditer(text):
+        face_id, remote, local = match.group(1, 2, 3)
+        if remote.startswith(INTERNAL_SCHEMES):
+            continue
+        face = {'remote': remote, 'local': local}
+        face.update(zip(FACE_COUNTERS, map(int, match.groups()[3:])))
+        faces[int(face_id)] = face
+    return faces
+
+def parse_sample(text):
+    """一次采样的输出 (nfdc status show 后接 nfdc face list) -> (转发器计数器, face 计数器)"""
+    return nfd_tables.parse_counters(text), parse_faces(text)
+
+class NfdSampler:
+    """在后台线程中并行采样所有节点
+
+    hosts 为 {name: NDNHost}，每个节点一条记录: {'time', 'node', 'forwarder': {...}, 'faces': {...}}。
+    """
+
+    def __init__(self, hosts, interval=DEFAULT_INTERVAL, max_records=MAX_RECORDS):
+        self.hosts = hosts
+        self.interval = interval
+        self.records = deque(maxlen=max_records)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        procs = {name: host.popen(host.nfd_sample_command(), shell=True)
+                 for name, host in self.hosts.items()}
+        for name, proc in procs.items():
+            output, _ = proc.communicate()
+            forwarder, faces = parse_sample(output.decode(errors='replace') if output else '')
+            self.records.append({'time': time.time(), 'node': name, 'forwarder': forwarder, 'faces': faces})
+
+    def _run(self):
+        next_sample = time.time()
+        while not self._stop.is_set():
+            self.sample()
+            next_sample += self.interval
+            self._stop.wait(max(0.0, next_sample - time.time()))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止采样，并在结束时再采样一次，使最后一个间隔完整"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self.sample()
+        return list(self.records)
+
+def rates(records):
+    """把相邻两次采样的计数器差值换算为每秒速率
+
+    返回 (forwarder_rows, face_rows)，每行为 dict；计数器回绕或 face 重建 (计数器变小) 的间隔被跳过。
+    """
+    previous = {}
+    forwarder_rows = []
+    face_rows = []
+    for record in records:
+        node = record['node']
+        last = previous.get(node)
+        previous[node] = record
+        if last is None:
+            continue
+        dt = record['time'] - last['time']
+        if dt <= 0:
+            continue
+        counters, last_counters = record['forwarder'], last['forwarder']
+        row = {'time': record['time'], 'node': node,
+               'pit_entries': counters.get('nPitEntries'), 'cs_entries': counters.get('nCsEntries')}
+        for key, column in FORWARDER_RATES:
+            if key in counters and key in last_counters and counters[key] >= last_counters[key]:
+                row[column] = (counters[key] - last_counters[key]) / dt
+        forwarder_rows.append(row)
+
+        for face_id, face in record['faces'].items():
+            last_face = last['faces'].get(face_id)
+            if last_face is None or last_face['remote'] != face['remote']:
+                continue
+            deltas = {key: face[key] - last_face[key] for key in FACE_COUNTERS}
+            if min(deltas.values()) < 0:
+                continue
+            row = {'time': record['time'], 'node': node, 'face': face_id, 'remote': face['remote']}
+            for key, delta in deltas.items():
+                if key.endswith('_bytes'):
+                    row[key.replace('_bytes', '_mbps')] = delta * 8 / dt / 1e6
+                else:
+                    row[key] = delta / dt
+            face_rows.append(row)
+    return forwarder_rows, face_rows
+
+def write_tsv(path, columns, rows):
+    with open(path, 'w') as f:
+        f.write('\t'.join(columns) + '\n')
+        for row in rows:
+            values = []
+            for column in columns:
+                value = row.get(column)
+                if value is None:
+                    values.append('')
+                elif isinstance(value, float):
+                    values.append(f"{value:.3f}" if column == 'time' else f"{value:.4f}")
+                else:
+                    values.append(str(value))
+            f.write('\t'.join(values) + '\n')
+
+def write_rates(test_dir, records):
+    """把采样换算为速率，写出 nfd-forwarder.tsv 和 nfd-faces.tsv"""
+    forwarder_rows, face_rows = rates(records)
+    forwarder_columns = ['time', 'node', 'pit_entries', 'cs_entries'] + [column for _, column in FORWARDER_RATES]
+    face_columns = ['time', 'node', 'face', 'remote'] + [
+        key.replace('_bytes', '_mbps') for key in FACE_COUNTERS]
+    write_tsv(os.path.join(test_dir, FORWARDER_FILE), forwarder_columns, forwarder_rows)
+    write_tsv(os.path.join(test_dir, FACES_FILE), face_columns, face_rows)
+    return forwarder_rows, face_rows
+
+def print_summary(forwarder_rows, face_rows):
+    """各节点的峰值 PIT 大小和 Nack 速率，以及各 face 的峰值速率"""
+    if not forwarder_rows:
+        return
+    print("\n--- NFD 采样 ---")
+    peaks = {}
+    for row in forwarder_rows:
+        peak = peaks.setdefault(row['node'], {'pit_entries': 0, 'in_nacks': 0.0, 'out_nacks': 0.0})
+        for key in peak:
+            if row.get(key) is not None:
+                peak[key] = max(peak[key], row[key])
+    for node, peak in sorted(peaks.items()):
+        print(f"  {node}: PIT 峰值 {peak['pit_entries']}, Nack 峰值 入 {peak['in_nacks']:.0f}/s "
+              f"出 {peak['out_nacks']:.0f}/s")
+    face_peaks = {}
+    for row in face_rows:
+        key = (row['node'], row['remote'])
+        face_peaks[key] = max(face_peaks.get(key, 0.0), row['in_mbps'], row['out_mbps'])
+    for (node, remote), peak in sorted(face_peaks.items()):
+        if peak > 0:
+            print(f"  {node} {remote}: 峰值 {peak:.2f} Mbps")
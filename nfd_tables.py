@@ -0,0 +1,174 @@
+"""
+NFD 表与转发策略配置 - 合并 network_config.nfd 中的默认值、节点和测试的覆盖项，生成 nfd.conf 的 tables 段
+和测试期间修改设置的 nfdc 命令；并解析 nfdc status / cs info 的计数器，计算内容缓存命中率
+
+network_config.py 中的 nfd:
+    nfd = {
+        'default': {'cs_max_packets': 65536, 'cs_policy': 'lru'},
+        'router1': {'cs_max_packets': 0, 'strategies': {'/producer1': 'multicast'}},
+    }
+测试中的 'nfd' 结构相同，只在该测试期间生效；cs_policy 和 cs_unsolicited_policy 只能在 NFD 启动时设置。
+"""
+
+import copy
+import json
+import os
+import re
+
+DEFAULT_SETTINGS = {
+    'cs_max_packets': 65536,
+    'cs_policy': 'lru',                     # lru / priority_fifo
+    'cs_unsolicited_policy': 'drop-all',
+    'strategies': {'/': 'best-route'},      # 前缀: 策略名或完整的策略名称
+    'congestion_marking': True,
+    'congestion_marking_interval': None,    # 毫秒，None 时使用 NFD 的默认值
+}
+NFD_MARKING_INTERVAL = 100             # NFD 默认的拥塞标记间隔 (毫秒)
+STARTUP_ONLY = ('cs_policy', 'cs_unsolicited_policy')
+STRATEGY_PREFIX = '/localhost/nfd/strategy/'
+# 本地管理前缀使用的策略，不受配置影响
+LOCAL_STRATEGIES = {
+    '/localhost': 'multicast',
+    '/localhost/nfd': 'best-route',
+    '/ndn/broadcast': 'multicast',
+}
+COUNTER_RE = re.compile(r'^\s*(n[A-Za-z]+|capacity)=(\d+)\s*$', re.MULTILINE)
+NFD_COUNTERS_FILE = 'nfd_counters.json'
+
+def strategy_name(strategy):
+    """'best-route' -> '/localhost/nfd/strategy/best-route'"""
+    return strategy if strategy.startswith('/') else STRATEGY_PREFIX + strategy
+
+def merge(settings, overrides):
+    """把 overrides 合并到 settings 中；strategies 按前缀合并"""
+    result = copy.deepcopy(settings)
+    for key, value in (overrides or {}).items():
+        if key == 'strategies':
+            result['strategies'] = {**result.get('strategies', {}), **value}
+        else:
+            result[key] = value
+    return result
+
+def node_settings(config, node, test=None):
+    """节点的有效 NFD 设置: 默认值 < nfd['default'] < nfd[node] < test['nfd']['default'] < test['nfd'][node]"""
+    settings = DEFAULT_SETTINGS
+    for source in (getattr(config, 'nfd', {}), (test or {}).get('nfd', {})):
+        settings = merge(settings, source.get('default'))
+        settings = merge(settings, source.get(node))
+    return settings
+
+def render_tables(settings):
+    """nfd.conf 的 tables 段"""
+    strategies = {**LOCAL_STRATEGIES, **settings['strategies']}
+    choices = '\n'.join(f"        {prefix} {strategy_name(strategy)}"
+                        for prefix, strategy in sorted(strategies.items()))
+    return (f"tables {{\n"
+            f"    cs_max_packets {settings['cs_max_packets']}\n"
+            f"    cs_policy {settings['cs_policy']}\n"
+            f"    cs_unsolicited_policy {settings['cs_unsolicited_policy']}\n"
+            f"    \n"
+            f"    strategy_choice {{\n"
+            f"{choices}\n"
+            f"    }}\n"
+            f"}}")
+
+def face_options(settings):
+    """nfdc face create 的拥塞标记参数"""
+    options = f"congestion-marking {'on' if settings['congestion_marking'] else 'off'}"
+    if settings.get('congestion_marking_interval') is not None:
+        options += f" congestion-marking-interval {settings['congestion_marking_interval']}"
+    return options
+
+def runtime_commands(current, target, faces):
+    """把正在运行的 NFD 从 current 改为 target 的 nfdc 命令
+
+    faces 为节点上由路由创建的 face URI，拥塞标记参数通过对已有 face 再次 face create 更新。
+    """
+    commands = []
+    if target['cs_max_packets'] != current['cs_max_packets']:
+        commands.append(f"nfdc cs config capacity {target['cs_max_packets']}")
+    for prefix, strategy in target['strategies'].items():
+        if current['strategies'].get(prefix) != strategy:
+            commands.append(f"nfdc strategy set {prefix} {strategy_name(strategy)}")
+    for prefix in current['strategies']:
+        if prefix not in target['strategies']:
+            if prefix == '/':
+                commands.append(f"nfdc strategy set / {strategy_name(DEFAULT_SETTINGS['strategies']['/'])}")
+            else:
+                commands.append(f"nfdc strategy unset {prefix}")
+    if face_options(target) != face_options(current):
+        # 恢复为默认间隔时需要显式指定，否则 face 保留之前的间隔
+        interval = target.get('congestion_marking_interval') or NFD_MARKING_INTERVAL
+        options = face_options(dict(target, congestion_marking_interval=interval))
+        for uri in faces:
+            commands.append(f"nfdc face create {uri} {options}")
+    return [f"{command} >/dev/null" for command in commands]
+
+def startup_only_changes(current, target):
+    """测试覆盖了只能在启动时设置的项"""
+    return [key for key in STARTUP_ONLY if target[key] != current[key]]
+
+def parse_counters(text):
+    """从 nfdc status show / nfdc cs info 的输出中取出 key=整数 的计数器"""
+    return {key: int(value) for key, value in COUNTER_RE.findall(text)}
+
+def counter_delta(before, after):
+    """两次快照之间各节点计数器的增量；nCsEntries 等表大小取测试结束时的值"""
+    result = {}
+    for node, counters in after.items():
+        previous = before.get(node, {})
+        delta = {key: value - previous.get(key, 0) for key, value in counters.items()
+                 if key.startswith('n') and not key.endswith('Entries')}
+        delta.update({key: value for key, value in counters.items()
+                      if key.endswith('Entries') or key == 'capacity'})
+        lookups = delta.get('nHits', 0) + delta.get('nMisses', 0)
+        delta['cs_hit_rate'] = delta.get('nHits', 0) / lookups if lookups else None
+        result[node] = delta
+    return result
+
+def cache_speedup(fetches):
+    """同一对象的多次获取: 第一次与之后各次的传输时间之比
+
+    fetches: [(interest, start_time, wall_time, goodput_mbps)]，只统计成功的传输
+    """
+    groups = {}
+    for interest, start_time, wall_time, goodput in fetches:
+        groups.setdefault(interest, []).append((start_time, wall_time, goodput))
+    result = {}
+    for interest, items in groups.items():
+        if len(items) < 2:
+            continue
+        items.sort()
+        first = items[0]
+        later = items[1:]
+        later_time = sum(item[1] for item in later) / len(later)
+        result[interest] = {
+            'fetches': len(items),
+            'first_wall_time': first[1],
+            'later_wall_time': later_time,
+            'first_goodput_mbps': first[2],
+            'later_goodput_mbps': sum(item[2] for item in later) / len(later),
+            'speedup': first[1] / later_time if later_time else None,
+        }
+    return result
+
+def write_result(test_dir, result):
+    with open(os.path.join(test_dir, NFD_COUNTERS_FILE), 'w') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+def print_summary(result):
+    print("\n--- NFD 计数器 (测试期间) ---")
+    for node, delta in sorted(result['nodes'].items()):
+        if not delta.get('nInInterests') and not delta.get('nInData'):
+            continue
+        line = (f"  {node}: Interest 入 {delta.get('nInInterests', 0)} / 出 {delta.get('nOutInterests', 0)}, "
+                f"Data 入 {delta.get('nInData', 0)} / 出 {delta.get('nOutData', 0)}, "
+                f"Nack 入 {delta.get('nInNacks', 0)} / 出 {delta.get('nOutNacks', 0)}")
+        if delta.get('cs_hit_rate') is not None:
+            line += (f", CS 命中 {delta.get('nHits', 0)} / 未命中 {delta.get('nMisses', 0)} "
+                     f"({delta['cs_hit_rate'] * 100:.1f}%)")
+        print(line)
+    for interest, item in result['cache'].items():
+        speedup = f"{item['speedup']:.2f}x" if item['speedup'] else '-'
+        print(f"  {interest}: {item['fetches']} 次获取, 第一次 {item['first_wall_time']:.2f} 秒, "
+              f"之后平均 {item['later_wall_time']:.2f} 秒 (加速 {speedup})")
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+进程资源采样 - 运行期间周期性读取 nfd / ndnput / ndnget 的 /proc/<pid>/stat、status、io，
+记录 CPU %、RSS、上下文切换和 I/O 字节数，并标记占满一个核的进程，用于判断运行是 CPU 瓶颈还是网络瓶颈
+
+进程按网络命名空间归属到 Mininet 节点，因此无论通过 NDNHost.popen 还是 cmd 启动都会被采样。
+
+输出到运行的日志目录:
+    profile.tsv     time node pid comm cpu_pct max_thread_cpu_pct rss_kb threads 上下文切换与 I/O 速率
+    profile.json    每个进程的峰值 / 平均 CPU、峰值 RSS、I/O 总量和占满一个核的时长
+
+用法:
+    python3 proc_profiler.py logs/<run>        # 输出已有运行的 profile.json 摘要
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+PROCESS_NAMES = ('nfd', 'ndnput', 'ndnget')
+DEFAULT_INTERVAL = 1.0          # 采样间隔 (秒)
+SATURATION_PCT = 95.0           # 单个线程的 CPU 达到该值视为占满一个核
+SATURATION_MIN_SAMPLES = 2      # 连续这么多次采样占满才标记，避免单次抖动
+PROFILE_FILE = 'profile.tsv'
+PROFILE_SUMMARY_FILE = 'profile.json'
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE_KB = os.sysconf('SC_PAGE_SIZE') // 1024
+COLUMNS = ('time', 'node', 'pid', 'comm', 'cpu_pct', 'max_thread_cpu_pct', 'rss_kb', 'threads',
+           'voluntary_ctxt_per_s', 'nonvoluntary_ctxt_per_s', 'read_bytes_per_s', 'write_bytes_per_s')
+
+def read_text(path):
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+def parse_stat(text):
+    """/proc/<pid>/stat -> (comm, utime + stime 的 tick 数, 线程数, RSS 页数, 启动时间)
+
+    comm 可能含空格和括号，以最后一个 ')' 为界。
+    """
+    comm = text[text.index('(') + 1:text.rindex(')')]
+    fields = text[text.rindex(')') + 2:].split()
+    # fields[0] 为原始第 3 个字段 (state)
+    return comm, int(fields[11]) + int(fields[12]), int(fields[17]), int(fields[21]), int(fields[19])
+
+def parse_keyed(text):
+    """'key: value' 或 'key: value kB' 形式的 status / io -> {key: int}"""
+    values = {}
+    for line in (text or '').splitlines():
+        key, _, value = line.partition(':')
+        parts = value.split()
+        if parts and parts[0].isdigit():
+            values[key.strip()] = int(parts[0])
+    return values
+
+def netns(pid):
+    try:
+        return os.readlink(f"/proc/{pid}/ns/net")
+    except OSError:
+        return None
+
+def thread_ticks(pid):
+    """各线程的 utime + stime (tick)"""
+    ticks = {}
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return ticks
+    for tid in tasks:
+        text = read_text(f"/proc/{pid}/task/{tid}/stat")
+        if text:
+            ticks[tid] = parse_stat(text)[1]
+    return ticks
+
+class ProcessStats:
+    """单个进程的累计统计"""
+
+    def __init__(self, node, pid, comm):
+        self.node = node
+        self.pid = pid
+        self.comm = comm
+        self.first_seen = None
+        self.last_seen = None
+        self.samples = 0
+        self.cpu_sum = 0.0
+        self.peak_cpu = 0.0
+        self.peak_thread_cpu = 0.0
+        self.peak_rss_kb = 0
+        self.read_bytes = 0
+        self.write_bytes = 0
+        self.voluntary_ctxt = 0
+        self.nonvoluntary_ctxt = 0
+        self.saturated_samples = 0
+        self.saturated_s = 0.0
+        self.saturated_since = None     # 第一次连续占满的时间
+        self._run = 0
+        self._last = None               # (time, ticks, thread_ticks, status, io)
+
+    def update(self, now, ticks, threads_ticks, rss_kb, threads, status, io):
+        row = None
+        if self._last is not None:
+            last_time, last_ticks, last_threads, last_status, last_io = self._last
+            dt = now - last_time
+            if dt > 0:
+                cpu = (ticks - last_ticks) / CLOCK_TICKS / dt * 100
+                thread_cpu = max(((value - last_threads.get(tid, value)) / CLOCK_TICKS / dt * 100
+                                  for tid, value in threads_ticks.items()), default=0.0)
+
+                def rate(source, last_source, key):
+                    if key in source and key in last_source:
+                        return (source[key] - last_source[key]) / dt
+                    return None
+
+                row = {
+                    'time': now, 'node': self.node, 'pid': self.pid, 'comm': self.comm,
+                    'cpu_pct': cpu, 'max_thread_cpu_pct': thread_cpu, 'rss_kb': rss_kb, 'threads': threads,
+                    'voluntary_ctxt_per_s': rate(status, last_status, 'voluntary_ctxt_switches'),
+                    'nonvoluntary_ctxt_per_s': rate(status, last_status, 'nonvoluntary_ctxt_switches'),
+                    'read_bytes_per_s': rate(io, last_io, 'read_bytes'),
+                    'write_bytes_per_s': rate(io, last_io, 'write_bytes'),
+                }
+                self.samples += 1
+                self.cpu_sum += cpu
+                self.peak_cpu = max(self.peak_cpu, cpu)
+                self.peak_thread_cpu = max(self.peak_thread_cpu, thread_cpu)
+                if thread_cpu >= SATURATION_PCT:
+                    self._run += 1
+                    if self._run >= SATURATION_MIN_SAMPLES:
+                        self.saturated_samples += 1
+                        self.saturated_s += dt
+                        if self.saturated_since is None:
+                            self.saturated_since = now
+                        if self._run == SATURATION_MIN_SAMPLES:
+                            print(f"⚠ {self.node} {self.comm} (pid {self.pid}) 占满一个核 "
+                                  f"({thread_cpu:.0f}%)，可能是 CPU 瓶颈")
+                else:
+                    self._run = 0
+        if self.first_seen is None:
+            self.first_seen = now
+        self.last_seen = now
+        self.peak_rss_kb = max(self.peak_rss_kb, status.get('VmHWM', rss_kb))
+        self.read_bytes = io.get('read_bytes', self.read_bytes)
+        self.write_bytes = io.get('write_bytes', self.write_bytes)
+        self.voluntary_ctxt = status.get('voluntary_ctxt_switches', self.voluntary_ctxt)
+        self.nonvoluntary_ctxt = status.get('nonvoluntary_ctxt_switches', self.nonvoluntary_ctxt)
+        self._last = (now, ticks, threads_ticks, status, io)
+        return row
+
+    def summary(self):
+        return {
+            'node': self.node,
+            'pid': self.pid,
+            'comm': self.comm,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'mean_cpu_pct': self.cpu_sum / self.samples if self.samples else None,
+            'peak_cpu_pct': self.peak_cpu,
+            'peak_thread_cpu_pct': self.peak_thread_cpu,
+            'peak_rss_kb': self.peak_rss_kb,
+            'read_bytes': self.read_bytes,
+            'write_bytes': self.write_bytes,
+            'voluntary_ctxt_switches': self.voluntary_ctxt,
+            'nonvoluntary_ctxt_switches': self.nonvoluntary_ctxt,
+            'saturated_s': self.saturated_s,
+            'saturated_since': self.saturated_since,
+            'cpu_bound': self.saturated_samples > 0,
+        }
+
+class ProcessProfiler:
+    """在后台线程中采样属于 hosts 网络命名空间的目标进程，逐行写 profile.tsv
+
+    hosts 为 {name: Host}，用各节点 shell 的 pid 确定命名空间。
+    """
+
+    def __init__(self, hosts, log_dir, interval=DEFAULT_INTERVAL, names=PROCESS_NAMES):
+        self.log_dir = log_dir
+        self.interval = interval
+        self.names = set(names)
+        self.namespaces = {}
+        for name, host in hosts.items():
+            namespace = netns(host.pid)
+            if namespace and namespace != netns(os.getpid()):
+                self.namespaces[namespace] = name
+        self.processes = {}     # (pid, 启动时间) -> ProcessStats
+        self._ignored = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self._file = None
+
+    def _target(self, pid):
+        """pid 为目标进程时返回 (node, comm)"""
+        comm = (read_text(f"/proc/{pid}/comm") or '').strip()
+        if comm not in self.names:
+            return None
+        node = self.namespaces.get(netns(pid))
+        return (node, comm) if node else None
+
+    def sample(self):
+        now = time.time()
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            text = read_text(f"/proc/{pid}/stat")
+            if not text:
+                continue
+            comm, ticks, threads, rss_pages, start_time = parse_stat(text)
+            key = (pid, start_time)
+            if key in self._ignored:
+                continue
+            stats = self.processes.get(key)
+            if stats is None:
+                target = self._target(pid)
+                if target is None:
+                    self._ignored.add(key)
+                    continue
+                stats = self.processes[key] = ProcessStats(target[0], pid, target[1])
+            status = parse_keyed(read_text(f"/proc/{pid}/status"))
+            io = parse_keyed(read_text(f"/proc/{pid}/io"))
+            row = stats.update(now, ticks, thread_ticks(pid), rss_pages * PAGE_SIZE_KB, threads, status, io)
+            if row:
+                self._write(row)
+
+    def _write(self, row):
+        values = []
+        for column in COLUMNS:
+            value = row[column]
+            if value is None:
+                values.append('')
+            elif isinstance(value, float):
+                values.append(f"{value:.3f}" if column == 'time' else f"{value:.1f}")
+            else:
+                values.append(str(value))
+        self._file.write('\t'.join(values) + '\n')
+
+    def _run(self):
+        next_sample = time.time()
+        while not self._stop.is_set():
+            self.sample()
+            next_sample += self.interval
+            self._stop.wait(max(0.0, next_sample - time.time()))
+
+    def start(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._file = open(os.path.join(self.log_dir, PROFILE_FILE), 'w', buffering=1)
+        self._file.write('\t'.join(COLUMNS) + '\n')
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止采样，写 profile.json，返回每个进程的摘要"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self._file:
+            self._file.close()
+        summary = [stats.summary() for stats in self.processes.values()]
+        with open(os.path.join(self.log_dir, PROFILE_SUMMARY_FILE), 'w') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        return summary
+
+def print_summary(summary):
+    """按进程输出 CPU / 内存 / I/O，并给出 CPU 瓶颈的判断"""
+    if not summary:
+        return
+    print("\n--- 进程资源 ---")
+    for item in sorted(summary, key=lambda item: (item['node'], item['comm'], item['pid'])):
+        mean = f"{item['mean_cpu_pct']:.0f}%" if item['mean_cpu_pct'] is not None else '-'
+        line = (f"  {item['node']} {item['comm']} (pid {item['pid']}): CPU 平均 {mean} / 峰值 {item['peak_cpu_pct']:.0f}%, "
+                f"RSS 峰值 {item['peak_rss_kb'] / 1024:.1f} MB, "
+                f"读 {item['read_bytes'] / 1e6:.1f} MB / 写 {item['write_bytes'] / 1e6:.1f} MB")
+        if item['cpu_bound']:
+            line += f", 占满一个核 {item['saturated_s']:.1f} 秒"
+        print(line)
+    bound = [item for item in summary if item['cpu_bound']]
+    if bound:
+        names = ', '.join(f"{item['node']} {item['comm']}" for item in bound)
+        print(f"⚠ CPU 瓶颈: {names}")
+    else:
+        print("✓ 没有进程占满一个核，瓶颈在网络或协议")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='进程资源采样摘要')
+    parser.add_argument('log_dir', help='运行的日志目录')
+    args = parser.parse_args(argv)
+    path = os.path.join(args.log_dir, PROFILE_SUMMARY_FILE)
+    if not os.path.exists(path):
+        sys.exit(f"找不到 {path}")
+    with open(path) as f:
+        print_summary(json.load(f))
+
+if __name__ == '__main__':
+    main()
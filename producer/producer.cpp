@@ -2,6 +2,7 @@
 
 #include <ndn-cxx/metadata-object.hpp>
 #include <ndn-cxx/util/segmenter.hpp>
+#include <iomanip>
 #include <iostream>
 #include <boost/lexical_cast.hpp>
 namespace ndn::chunks
@@ -41,7 +42,11 @@ namespace ndn::chunks
     {
         if (m_options.isVerbose)
         {
-            std::cerr << "Interest: " << interest << "\n";
+            // 附带到达的墙钟时间 (epoch 秒)，供 producer_log.py 统计 Interest 速率
+            auto sinceEpoch = time::system_clock::now().time_since_epoch();
+            std::cerr << "Interest: " << interest << " at " << std::fixed << std::setprecision(6)
+                      << time::duration_cast<time::microseconds>(sinceEpoch).count() / 1e6
+                      << std::defaultfloat << "\n";
         }
 
         // 获取前缀
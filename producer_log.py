@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+生产者日志 (producerN.log) 的流式分析 - 逐行单次遍历，内存只与段数和时长有关，与日志大小无关
+
+按前缀统计: Interest 到达速率随时间的变化、重复请求的段 (新 nonce 为重传，相同 nonce 为网络中的重复)、
+Nack 数、因前缀被从 m_store 删除而重新执行 segmentationFile 的次数，以及第一个 Interest 到最后一个 Data 的时间。
+
+用法:
+    python3 producer_log.py logs/<run>/producer1.log [...] [--bin 1.0] [--json]
+"""
+
+from array import array
+import argparse
+import json
+import os
+import re
+import sys
+
+DEFAULT_BIN = 1.0       # Interest 速率的统计间隔 (秒)
+INTEREST_RE = re.compile(r'Interest: (\S+?)/seg=(\d+)\?\S*?Nonce=([0-9a-fA-F]+)\S*(?: at ([\d.]+))?')
+INTEREST_TIME_RE = re.compile(r' at ([\d.]+)$')
+DATA_PREFIX = 'Data: Name: '
+CONTENT_RE = re.compile(r'Content: \[(\d+) bytes\]')
+SEGMENTATION_PREFIX = 'Segmentation file for prefix: '
+NACK_LINE = 'Interest cannot be satisfied, sending Nack'
+NO_NONCE = 0xFFFFFFFF   # 尚未收到该段的 Interest
+
+class PrefixStats:
+    """单个前缀的统计"""
+
+    def __init__(self, prefix, bin_size):
+        self.prefix = prefix
+        self.bin_size = bin_size
+        self.interests = 0
+        self.other_interests = 0    # 不带段号的 Interest (例如版本发现)
+        self.unique_segments = 0
+        self.retransmissions = 0    # 同一段、新 nonce
+        self.duplicates = 0         # 同一段、相同 nonce
+        self.nacks = 0
+        self.data = 0
+        self.data_bytes = 0
+        self.segmentations = 0
+        self.first_interest = None
+        self.last_data = None
+        self.bins = array('l')      # 每个统计间隔内到达的 Interest 数
+        self._nonces = array('L')   # 每个段最近一次 Interest 的 nonce
+
+    def add_interest(self, segment, nonce, t):
+        self.interests += 1
+        if t is not None:
+            if self.first_interest is None:
+                self.first_interest = t
+            index = int((t - self.first_interest) / self.bin_size)
+            if index >= len(self.bins):
+                self.bins.extend([0] * (index + 1 - len(self.bins)))
+            self.bins[index] += 1
+        if segment >= len(self._nonces):
+            self._nonces.extend([NO_NONCE] * (segment + 1 - len(self._nonces)))
+        previous = self._nonces[segment]
+        if previous == NO_NONCE:
+            self.unique_segments += 1
+        elif previous == nonce:
+            self.duplicates += 1
+        else:
+            self.retransmissions += 1
+        self._nonces[segment] = nonce
+
+    def summary(self):
+        result = {
+            'prefix': self.prefix,
+            'interests': self.interests,
+            'other_interests': self.other_interests,
+            'unique_segments': self.unique_segments,
+            'retransmitted_requests': self.retransmissions,
+            'duplicate_requests': self.duplicates,
+            'nacks': self.nacks,
+            'data': self.data,
+            'data_bytes': self.data_bytes,
+            'segmentations': self.segmentations,
+            'resegmentations': max(self.segmentations - 1, 0),
+        }
+        if self.first_interest is not None and self.last_data is not None:
+            result['first_interest_to_last_data_s'] = self.last_data - self.first_interest
+        if len(self.bins):
+            rates = [count / self.bin_size for count in self.bins]
+            result['interest_rate'] = {
+                'bin_s': self.bin_size,
+                'mean': sum(rates) / len(rates),
+                'max': max(rates),
+                'series': [[i * self.bin_size, rate] for i, rate in enumerate(rates)],
+            }
+        return result
+
+class ProducerLogAnalyzer:
+    """逐行分析生产者日志；Data / Nack 归属于它前面最近的 Interest 所在的前缀"""
+
+    def __init__(self, bin_size=DEFAULT_BIN):
+        self.bin_size = bin_size
+        self.prefixes = {}
+        self.lines = 0
+        self.errors = []
+        self._current = None
+        self._last_time = None
+        self._in_data = False
+
+    def _stats(self, prefix):
+        stats = self.prefixes.get(prefix)
+        if stats is None:
+            stats = self.prefixes[prefix] = PrefixStats(prefix, self.bin_size)
+        return stats
+
+    def feed(self, line):
+        self.lines += 1
+        if line.startswith('Interest: '):
+            self._in_data = False
+            match = INTEREST_RE.match(line)
+            if match:
+                prefix, segment, nonce, t = match.groups()
+                self._last_time = float(t) if t else None
+                self._current = self._stats(prefix)
+                self._current.add_interest(int(segment), int(nonce, 16) & 0xFFFFFFFF, self._last_time)
+            else:
+                match = INTEREST_TIME_RE.search(line.rstrip())
+                self._last_time = float(match.group(1)) if match else None
+                name = line[len('Interest: '):].split('?', 1)[0].split(' ', 1)[0]
+                self._current = self._stats(name.rstrip('/'))
+                self._current.other_interests += 1
+        elif line.startswith(DATA_PREFIX):
+            self._in_data = True
+            if self._current is not None:
+                self._current.data += 1
+                if self._last_time is not None:
+                    self._current.last_data = self._last_time
+        elif self._in_data and line.startswith('Content: '):
+            match = CONTENT_RE.match(line)
+            if match and self._current is not None:
+                self._current.data_bytes += int(match.group(1))
+        elif line.startswith(NACK_LINE):
+            if self._current is not None:
+                self._current.nacks += 1
+        elif line.startswith(SEGMENTATION_PREFIX):
+            self._stats(line[len(SEGMENTATION_PREFIX):].strip()).segmentations += 1
+        elif line.startswith('ERROR'):
+            self.errors.append(line.strip())
+
+    def summary(self):
+        return {
+            'lines': self.lines,
+            'errors': self.errors,
+            'prefixes': {prefix: stats.summary() for prefix, stats in self.prefixes.items()
+                         if stats.interests or stats.other_interests or stats.segmentations},
+        }
+
+def analyze_producer_log(path, bin_size=DEFAULT_BIN):
+    """流式分析一个生产者日志文件"""
+    analyzer = ProducerLogAnalyzer(bin_size)
+    with open(path, 'rb') as f:
+        for line in f:
+            analyzer.feed(line.decode('utf-8', errors='replace'))
+    result = analyzer.summary()
+    result['log'] = os.path.basename(path)
+    return result
+
+def print_summary(result):
+    """输出生产者日志分析摘要"""
+    print(f"\n--- 生产者日志: {result['log']} ({result['lines']} 行) ---")
+    for prefix, stats in result['prefixes'].items():
+        print(f"  {prefix}")
+        print(f"    Interest: {stats['interests']} (不同的段 {stats['unique_segments']}, "
+              f"重传 {stats['retransmitted_requests']}, 重复 nonce {stats['duplicate_requests']})")
+        print(f"    Data: {stats['data']} ({stats['data_bytes']} 字节), Nack: {stats['nacks']}")
+        print(f"    分段: {stats['segmentations']} 次 (重新分段 {stats['resegmentations']} 次)")
+        if 'first_interest_to_last_data_s' in stats:
+            print(f"    第一个 Interest 到最后一个 Data: {stats['first_interest_to_last_data_s']:.3f} 秒")
+        if 'interest_rate' in stats:
+            rate = stats['interest_rate']
+            print(f"    Interest 速率: 平均 {rate['mean']:.1f}/s, 峰值 {rate['max']:.1f}/s")
+    for error in result['errors']:
+        print(f"  {error}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生产者日志分析')
+    parser.add_argument('logs', nargs='+', help='producerN.log')
+    parser.add_argument('--bin', type=float, default=DEFAULT_BIN, help='Interest 速率的统计间隔 (秒)')
+    parser.add_argument('--json', action='store_true', help='输出 JSON')
+    args = parser.parse_args(argv)
+
+    results = [analyze_producer_log(path, args.bin) for path in args.logs]
+    if args.json:
+        json.dump(results if len(results) > 1 else results[0], sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        for result in results:
+            print_summary(result)
+
+if __name__ == '__main__':
+    main()
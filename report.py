@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+运行报告 - 读取一个或多个运行目录中的 cwnd / rtt / goodput 日志和 NFD 采样，用 LTTB 或最小/最大值分桶
+降采样后绘制为内嵌 SVG 的单文件 HTML 报告 (不引用外部脚本、样式或图片)；可选用 matplotlib 另外输出 PNG
+
+每条序列最多保留 --points 个点，百万级样本的大文件传输生成的报告也只有几百 KB。多个运行目录时同类曲线
+画在同一张图中对比，曲线名为 <运行>/<测试>/<流>。
+
+用法:
+    python3 report.py logs/2025-07-15_09-49-27_testfile_6442450.txt
+    python3 report.py logs/run_a logs/run_b --out compare.html --png
+    python3 report.py logs/run --method minmax --points 2000
+"""
+
+import argparse
+import datetime
+import html
+import math
+import os
+import time
+
+import numpy as np
+
+import fairness
+import log_analysis
+import nfd_sampler
+
+DEFAULT_POINTS = 1000       # 每条序列降采样后的点数
+METHODS = ('lttb', 'minmax')
+REPORT_FILE = 'report.html'
+MAX_RTT_CHARTS = 12         # 超过该流数时 RTT 只画一张各流 srtt 的对比图
+CHART_WIDTH = 900
+CHART_HEIGHT = 300
+MARGIN = {'left': 64, 'right': 16, 'top': 12, 'bottom': 40}
+COLORS = ('#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
+          '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf')
+FORWARDER_CHARTS = (('in_interests', '收到的 Interest (每秒)'), ('in_data', '收到的 Data (每秒)'),
+                    ('pit_entries', 'PIT 表项'))
+
+# ---- 降采样 ----
+
+def lttb(x, y, points):
+    """Largest-Triangle-Three-Buckets: 保留首尾点，每个桶选与前一个选中点、下一个桶均值构成最大三角形的点"""
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    # 每个桶之后那个桶的均值 (最后一个桶用最后一个点)
+    sums_x = np.concatenate([[0.0], np.cumsum(x)])
+    sums_y = np.concatenate([[0.0], np.cumsum(y)])
+    next_start, next_end = edges[1:], np.append(edges[2:], n)
+    counts = np.maximum(next_end - next_start, 1)
+    mean_x = (sums_x[next_end] - sums_x[next_start]) / counts
+    mean_y = (sums_y[next_end] - sums_y[next_start]) / counts
+    mean_x[-1], mean_y[-1] = x[-1], y[-1]
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - mean_x[i]) * (by - y[a]) - (x[a] - bx) * (mean_y[i] - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def minmax(x, y, points):
+    """等点数分桶，每个桶保留最小值和最大值所在的点 (按原顺序)，以及首尾点"""
+    n = len(x)
+    buckets = max(points // 2 - 1, 1)
+    if points >= n:
+        return np.arange(n)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    rows = padded.reshape(buckets, size)
+    valid = ~np.all(np.isnan(rows), axis=1)
+    offsets = np.arange(buckets)[valid] * size
+    low = offsets + np.nanargmin(rows[valid], axis=1)
+    high = offsets + np.nanargmax(rows[valid], axis=1)
+    return np.unique(np.concatenate([[0, n - 1], low, high]))
+
+def downsample(x, y, points=DEFAULT_POINTS, method='lttb'):
+    """按 x 排序、去掉非有限值后降采样，返回 (x, y)"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    keep = np.isfinite(x) & np.isfinite(y)
+    if not keep.all():
+        x, y = x[keep], y[keep]
+    if len(x) > 1 and np.any(x[1:] < x[:-1]):
+        order = np.argsort(x, kind='stable')
+        x, y = x[order], y[order]
+    index = (lttb if method == 'lttb' else minmax)(x, y, points)
+    return x[index], y[index]
+
+# ---- 读取运行目录 ----
+
+def report_dirs(run_dir):
+    """返回 [(测试名, 目录)]: 含有 cwnd / rtt 日志、goodput 序列或 NFD 采样的目录"""
+    dirs = []
+    for root, subdirs, files in os.walk(run_dir):
+        subdirs.sort()
+        if (log_analysis.find_flows(root) or nfd_sampler.FORWARDER_FILE in files
+                or any(name.endswith(fairness.GOODPUT_SUFFIX) for name in files)):
+            test = os.path.relpath(root, run_dir)
+            dirs.append(('' if test == '.' else test, root))
+    return dirs
+
+def read_forwarder(path):
+    """读取 nfd-forwarder.tsv，返回 {node: {列名: 数组}}"""
+    nodes = {}
+    with open(path) as f:
+        columns = f.readline().rstrip('\n').split('\t')
+        for line in f:
+            values = line.rstrip('\n').split('\t')
+            row = nodes.setdefault(values[columns.index('node')], {column: [] for column in columns})
+            for column, value in zip(columns, values):
+                row[column].append(value)
+    return {node: {column: np.array([float(value) if value else np.nan for value in values])
+                   for column, values in row.items() if column != 'node'}
+            for node, row in nodes.items()}
+
+class RunData:
+    """一个测试目录中用于绘图的原始序列"""
+
+    def __init__(self, label, test_dir):
+        self.label = label
+        self.dir = test_dir
+        starts = log_analysis.read_flow_starts(test_dir)
+        self.origin = min(starts.values()) if starts else None
+        self.cwnd = {}
+        self.rtt = {}
+        for flow, (cwnd_path, rtt_path) in log_analysis.find_flows(test_dir).items():
+            offset = starts[flow] - self.origin if flow in starts else 0.0
+            if os.path.exists(cwnd_path):
+                cwnd = log_analysis.load_cwnd(cwnd_path)
+                self.cwnd[flow] = (np.asarray(cwnd['time']) + offset, np.asarray(cwnd['cwnd']))
+            if os.path.exists(rtt_path):
+                self.rtt[flow] = log_analysis.load_rtt(rtt_path)
+        self.goodput = fairness.load_goodput_series(test_dir)
+        forwarder_path = os.path.join(test_dir, nfd_sampler.FORWARDER_FILE)
+        self.forwarder = read_forwarder(forwarder_path) if os.path.exists(forwarder_path) else {}
+        if self.forwarder and self.origin is None:
+            self.origin = min(float(np.nanmin(node['time'])) for node in self.forwarder.values())
+
+    def flow_label(self, flow):
+        return f"{self.label}/{flow}" if self.label else flow
+
+    def samples(self):
+        """原始样本总数"""
+        total = sum(len(t) for t, _ in self.cwnd.values()) + sum(len(rtt['rtt']) for rtt in self.rtt.values())
+        return total + sum(len(t) for t, _ in self.goodput.values())
+
+def load_runs(run_dirs):
+    runs = []
+    for run_dir in run_dirs:
+        name = os.path.basename(os.path.normpath(run_dir))
+        for test, test_dir in report_dirs(run_dir):
+            parts = ([name] if len(run_dirs) > 1 else []) + ([test] if test else [])
+            runs.append(RunData('/'.join(parts), test_dir))
+    return runs
+
+# ---- 图表 ----
+
+def build_charts(runs, points=DEFAULT_POINTS, method='lttb'):
+    """返回图表列表 [{'title', 'xlabel', 'ylabel', 'series': [(名称, x, y)]}]，序列已降采样"""
+    def series(label, x, y):
+        return (label, *downsample(x, y, points, method))
+
+    charts = []
+    cwnd = [series(run.flow_label(flow), t, w) for run in runs for flow, (t, w) in run.cwnd.items()]
+    if cwnd:
+        charts.append({'title': 'cwnd', 'xlabel': '时间 (秒)', 'ylabel': 'cwnd (段)', 'series': cwnd})
+    goodput = [series(run.flow_label(flow), t, v) for run in runs for flow, (t, v) in run.goodput.items()]
+    if goodput:
+        charts.append({'title': 'goodput', 'xlabel': '时间 (秒)', 'ylabel': 'Mbps', 'series': goodput})
+
+    rtts = [(run, flow, rtt) for run in runs for flow, rtt in run.rtt.items()]
+    if len(rtts) > MAX_RTT_CHARTS:
+        charts.append({'title': 'srtt', 'xlabel': '段号', 'ylabel': 'ms', 'series': [
+            series(run.flow_label(flow), rtt['segment'], rtt['srtt']) for run, flow, rtt in rtts]})
+    else:
+        for run, flow, rtt in rtts:
+            charts.append({'title': f"RTT: {run.flow_label(flow)}", 'xlabel': '段号', 'ylabel': 'ms',
+                           'series': [series(column, rtt['segment'], rtt[column])
+                                      for column in ('rtt', 'srtt', 'rto')]})
+
+    for run in runs:
+        if not run.forwarder:
+            continue
+        origin = run.origin or 0.0
+        # 只画有流量经过的节点
+        active = {node: data for node, data in run.forwarder.items()
+                  if np.nansum(data.get('in_interests', np.zeros(0))) > 0}
+        for column, title in FORWARDER_CHARTS:
+            lines = [series(node, data['time'] - origin, data[column])
+                     for node, data in sorted(active.items()) if column in data]
+            if lines:
+                charts.append({'title': f"NFD {title}" + (f": {run.label}" if run.label else ''),
+                               'xlabel': '时间 (秒)', 'ylabel': title, 'series': lines})
+    return charts
+
+def nice_ticks(low, high, count=6):
+    """覆盖 [low, high] 的 1/2/5×10^k 刻度"""
+    if not high > low:
+        high = low + 1
+    step = 10 ** math.floor(math.log10((high - low) / count))
+    for multiple in (1, 2, 5, 10):
+        if (high - low) / (step * multiple) <= count:
+            step *= multiple
+            break
+    first = math.ceil(low / step - 1e-9)
+    last = math.floor(high / step + 1e-9)
+    return [i * step for i in range(first, last + 1)]
+
+def chart_bounds(chart):
+    xs = [x for _, x, _ in chart['series'] if len(x)]
+    ys = [y for _, _, y in chart['series'] if len(y)]
+    if not xs:
+        return 0.0, 1.0, 0.0, 1.0
+    x_low, x_high = min(float(x[0]) for x in xs), max(float(x[-1]) for x in xs)
+    y_low = min(0.0, min(float(np.min(y)) for y in ys))
+    y_high = max(float(np.max(y)) for y in ys)
+    if x_high <= x_low:
+        x_high = x_low + 1
+    if y_high <= y_low:
+        y_high = y_low + 1
+    return x_low, x_high, y_low, y_high * 1.05
+
+def render_svg(chart, width=CHART_WIDTH, height=CHART_HEIGHT):
+    """把一张图表渲染为内嵌 SVG"""
+    x_low, x_high, y_low, y_high = chart_bounds(chart)
+    left, top = MARGIN['left'], MARGIN['top']
+    plot_width = width - left - MARGIN['right']
+    plot_height = height - top - MARGIN['bottom']
+
+    def px(x):
+        return left + (x - x_low) / (x_high - x_low) * plot_width
+
+    def py(y):
+        return top + plot_height - (y - y_low) / (y_high - y_low) * plot_height
+
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'viewBox="0 0 {width} {height}">',
+             f'<rect x="{left}" y="{top}" width="{plot_width}" height="{plot_height}" class="plot"/>']
+    for tick in nice_ticks(x_low, x_high):
+        x = px(tick)
+        parts.append(f'<line x1="{x:.1f}" y1="{top}" x2="{x:.1f}" y2="{top + plot_height}" class="grid"/>'
+                     f'<text x="{x:.1f}" y="{top + plot_height + 16}" text-anchor="middle">{tick:g}</text>')
+    for tick in nice_ticks(y_low, y_high):
+        y = py(tick)
+        parts.append(f'<line x1="{left}" y1="{y:.1f}" x2="{left + plot_width}" y2="{y:.1f}" class="grid"/>'
+                     f'<text x="{left - 6}" y="{y + 4:.1f}" text-anchor="end">{tick:g}</text>')
+    parts.append(f'<text x="{left + plot_width / 2}" y="{height - 4}" text-anchor="middle">'
+                 f'{html.escape(chart["xlabel"])}</text>')
+    parts.append(f'<text transform="translate(14,{top + plot_height / 2}) rotate(-90)" text-anchor="middle">'
+                 f'{html.escape(chart["ylabel"])}</text>')
+    for i, (label, x, y) in enumerate(chart['series']):
+        coords = ' '.join(f"{a:.1f},{b:.1f}" for a, b in zip(px(x).tolist(), py(y).tolist()))
+        parts.append(f'<polyline points="{coords}" stroke="{COLORS[i % len(COLORS)]}">'
+                     f'<title>{html.escape(label)}</title></polyline>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+def render_legend(chart):
+    items = ''.join(f'<span><i style="background:{COLORS[i % len(COLORS)]}"></i>{html.escape(label)}</span>'
+                    for i, (label, _, _) in enumerate(chart['series']))
+    return f'<div class="legend">{items}</div>'
+
+STYLE = """
+body { font-family: sans-serif; margin: 24px; color: #222; }
+h2 { font-size: 16px; margin: 24px 0 4px; }
+table { border-collapse: collapse; font-size: 13px; }
+th, td { border: 1px solid #ccc; padding: 3px 8px; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+svg text { font-size: 11px; fill: #444; }
+svg .plot { fill: none; stroke: #888; }
+svg .grid { stroke: #eee; }
+svg polyline { fill: none; stroke-width: 1.2; }
+.legend { font-size: 12px; margin: 2px 0 0 64px; }
+.legend span { margin-right: 14px; white-space: nowrap; }
+.legend i { display: inline-block; width: 10px; height: 10px; margin-right: 4px; }
+.note { color: #666; font-size: 12px; }
+"""
+
+def format_number(value, digits=2):
+    return '-' if value is None else f"{value:.{digits}f}"
+
+def summary_table(runs, segment_size):
+    """每个流一行: goodput、RTT 分位数、cwnd 均值和原始样本数"""
+    rows = []
+    for run in runs:
+        for flow in sorted(set(run.cwnd) | set(run.rtt)):
+            rtt = log_analysis.analyze_rtt(run.rtt[flow]) if flow in run.rtt else {}
+            cwnd = log_analysis.analyze_cwnd({'time': run.cwnd[flow][0], 'cwnd': run.cwnd[flow][1]}) \
+                if flow in run.cwnd else {}
+            rtt_ms = rtt.get('rtt_ms') or {}
+            segments = log_analysis.segments_received(run.rtt[flow]) if flow in run.rtt else 0
+            # 与 log_analysis.analyze_flow 相同: 段数取最大段号，时长取 cwnd.log 的时间跨度
+            duration = cwnd.get('duration_s')
+            goodput = segments * segment_size * 8 / duration / 1e6 if segments and duration else None
+            samples = (len(run.cwnd[flow][0]) if flow in run.cwnd else 0) + \
+                (len(run.rtt[flow]['rtt']) if flow in run.rtt else 0)
+            rows.append((run.flow_label(flow), goodput, rtt_ms.get('p50'), rtt_ms.get('p99'),
+                         cwnd.get('mean'), rtt.get('backoff_events'), samples))
+    if not rows:
+        return ''
+    header = ('流', 'goodput (Mbps)', 'RTT p50 (ms)', 'RTT p99 (ms)', 'cwnd 均值', 'rto 退避', '原始样本')
+    lines = ['<table><tr>' + ''.join(f'<th>{column}</th>' for column in header) + '</tr>']
+    for label, goodput, p50, p99, mean_cwnd, backoffs, samples in rows:
+        lines.append(f'<tr><td>{html.escape(label)}</td><td>{format_number(goodput)}</td>'
+                     f'<td>{format_number(p50)}</td><td>{format_number(p99)}</td>'
+                     f'<td>{format_number(mean_cwnd, 1)}</td><td>{"-" if backoffs is None else backoffs}</td>'
+                     f'<td>{samples}</td></tr>')
+    lines.append('</table>')
+    return '\n'.join(lines)
+
+def render_html(run_dirs, runs, charts, points, method, segment_size):
+    title = '运行报告: ' + ', '.join(os.path.basename(os.path.normpath(run_dir)) for run_dir in run_dirs)
+    body = [f'<h1>{html.escape(title)}</h1>',
+            f'<p class="note">生成于 {datetime.datetime.now().isoformat(timespec="seconds")}；'
+            f'原始样本 {sum(run.samples() for run in runs)} 个，每条序列降采样到最多 {points} 个点 ({method})</p>',
+            summary_table(runs, segment_size)]
+    for chart in charts:
+        body.append(f'<h2>{html.escape(chart["title"])}</h2>')
+        body.append(render_svg(chart))
+        body.append(render_legend(chart))
+    return (f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+            f'<style>{STYLE}</style></head><body>\n' + '\n'.join(body) + '\n</body></html>\n')
+
+def write_pngs(charts, out_dir):
+    """用 matplotlib 把每张图表另存为 PNG；没有安装 matplotlib 时返回 None"""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return None
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for index, chart in enumerate(charts, 1):
+        fig, ax = plt.subplots(figsize=(CHART_WIDTH / 100, CHART_HEIGHT / 100), dpi=100)
+        for i, (label, x, y) in enumerate(chart['series']):
+            ax.plot(x, y, color=COLORS[i % len(COLORS)], linewidth=1, label=label)
+        ax.set_title(chart['title'])
+        ax.set_xlabel(chart['xlabel'])
+        ax.set_ylabel(chart['ylabel'])
+        ax.grid(alpha=0.3)
+        if len(chart['series']) <= len(COLORS):
+            ax.legend(fontsize='small')
+        fig.tight_layout()
+        path = os.path.join(out_dir, f"{index:02d}.png")
+        fig.savefig(path)
+        plt.close(fig)
+        paths.append(path)
+    return paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成运行的 HTML 报告')
+    parser.add_argument('run_dirs', nargs='+', help='运行目录 (logs/ 下)，多个时对比')
+    parser.add_argument('--out', help=f'HTML 文件，默认为第一个运行目录下的 {REPORT_FILE}')
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS, help='每条序列降采样后的点数')
+    parser.add_argument('--method', choices=METHODS, default='lttb', help='降采样方法')
+    parser.add_argument('--segment-size', type=int, default=log_analysis.DEFAULT_SEGMENT_SIZE)
+    parser.add_argument('--png', action='store_true', help='另外输出 PNG (需要 matplotlib)')
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    runs = load_runs(args.run_dirs)
+    if not runs:
+        parser.error('运行目录中没有 cwnd / rtt / goodput 日志或 NFD 采样')
+    charts = build_charts(runs, args.points, args.method)
+    out = args.out or os.path.join(args.run_dirs[0], REPORT_FILE)
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        f.write(render_html(args.run_dirs, runs, charts, args.points, args.method, args.segment_size))
+    print(f"报告: {out} ({os.path.getsize(out) / 1024:.0f} KB, {len(charts)} 张图, "
+          f"耗时 {time.time() - start:.2f} 秒)")
+    if args.png:
+        paths = write_pngs(charts, os.path.splitext(out)[0] + '-png')
+        if paths is None:
+            print("⚠ 没有安装 matplotlib，不输出 PNG")
+        else:
+            print(f"PNG: {len(paths)} 张，在 {os.path.dirname(paths[0]) if paths else '-'}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+实验结果数据库 - 把 logs/ 下的运行索引到本地 SQLite，之后的比较直接查询，不再重新解析 TSV
+
+每个流记录一行: 运行元数据 (有效的消费者/生产者 ini、链路参数、测试名、git 版本)、
+汇总指标，以及降采样后的 cwnd / rtt / goodput 时间序列。已索引的运行在再次导入时跳过。
+
+用法:
+    python3 results_db.py ingest [logs]                      # 增量导入
+    python3 results_db.py query --group pipeline_type --where bw_mbps=100 --where delay_ms=10
+    python3 results_db.py sql "SELECT consumer, goodput_mbps FROM flows ORDER BY goodput_mbps DESC"
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+import log_analysis
+import routing
+from consumer_output import DEFAULT_SEGMENT_SIZE, GOODPUT_SUFFIX, parse_consumer_log
+from experiment_config import RUN_FILE, read_ini
+
+DEFAULT_DB = 'results.db'
+DEFAULT_LOGS_DIR = 'logs'
+RESULTS_FILE = 'results.json'
+SERIES_POINTS = 1000        # 每条时间序列最多保留的点数
+RUN_NAME_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})_(\d{2})-(\d{2})-(\d{2})_(.+)$')
+LEGACY_CONSUMER_LOG = 'consumer-app.log'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    name TEXT,
+    started TEXT,
+    file_name TEXT,
+    git_revision TEXT,
+    config_file TEXT,
+    metadata TEXT,
+    ingested_at REAL
+);
+CREATE TABLE IF NOT EXISTS flows (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    test TEXT,
+    consumer TEXT,
+    interest TEXT,
+    producer TEXT,
+    pipeline_type TEXT,
+    bw_mbps REAL,
+    delay_ms REAL,
+    loss REAL,
+    conconfig TEXT,
+    proconfig TEXT,
+    completed INTEGER,
+    segments INTEGER,
+    bytes INTEGER,
+    wall_time_s REAL,
+    goodput_mbps REAL,
+    avg_rtt_ms REAL,
+    rtt_p50_ms REAL,
+    rtt_p95_ms REAL,
+    rtt_p99_ms REAL,
+    cwnd_mean REAL,
+    cwnd_max REAL,
+    slow_start_ratio REAL,
+    decrease_events INTEGER,
+    backoff_events INTEGER,
+    retransmissions INTEGER,
+    timeouts INTEGER,
+    startup_s REAL,
+    time_to_first_segment_s REAL,
+    steady_goodput_mbps REAL,
+    retx_overhead REAL,
+    summary TEXT
+);
+CREATE TABLE IF NOT EXISTS series (
+    flow_id INTEGER NOT NULL REFERENCES flows(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    points INTEGER,
+    t BLOB,
+    v BLOB,
+    PRIMARY KEY (flow_id, kind)
+);
+CREATE INDEX IF NOT EXISTS flows_run ON flows(run_id);
+CREATE INDEX IF NOT EXISTS flows_link ON flows(pipeline_type, bw_mbps, delay_ms);
+"""
+
+class Median:
+    """SQLite 聚合函数 median()"""
+
+    def __init__(self):
+        self.values = []
+
+    def step(self, value):
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self):
+        return float(np.median(self.values)) if self.values else None
+
+# 后来加入 flows 表的列，打开旧数据库时补上
+ADDED_FLOW_COLUMNS = {
+    'startup_s': 'REAL',
+    'time_to_first_segment_s': 'REAL',
+    'steady_goodput_mbps': 'REAL',
+    'retx_overhead': 'REAL',
+}
+
+def connect(path=DEFAULT_DB):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.executescript(SCHEMA)
+    existing = {row['name'] for row in conn.execute('PRAGMA table_info(flows)')}
+    for column, column_type in ADDED_FLOW_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f'ALTER TABLE flows ADD COLUMN {column} {column_type}')
+    conn.create_aggregate('median', 1, Median)
+    return conn
+
+def downsample(t, v, points=SERIES_POINTS):
+    """按等间隔下标取样到最多 points 个点 (保留首尾)"""
+    if len(t) <= points:
+        return t, v
+    index = np.unique(np.linspace(0, len(t) - 1, points).astype(np.int64))
+    return t[index], v[index]
+
+def encode(values):
+    return np.asarray(values, dtype=np.float32).tobytes()
+
+def load_series(conn, flow_id, kind):
+    """读取一条降采样的时间序列，返回 (t, v)；不存在时返回 None"""
+    row = conn.execute('SELECT t, v FROM series WHERE flow_id = ? AND kind = ?',
+                       (flow_id, kind)).fetchone()
+    if row is None:
+        return None
+    return np.frombuffer(row['t'], dtype=np.float32), np.frombuffer(row['v'], dtype=np.float32)
+
+def read_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+def run_info(run_dir, metadata):
+    """运行名、开始时间和传输的文件名；旧的运行从目录名 <时间>_<文件名> 推断"""
+    name = os.path.basename(os.path.normpath(run_dir))
+    match = RUN_NAME_RE.match(name)
+    started = metadata.get('started')
+    file_name = None
+    if match:
+        date, hour, minute, second, file_name = match.groups()
+        started = started or f"{date}T{hour}:{minute}:{second}"
+    return name, started, file_name
+
+def test_dirs(run_dir):
+    """返回 [(测试名, 目录)]
+
+    测试名为测试目录相对运行目录的路径: 普通运行是 <测试名>，批处理是 <label>/trial-<n>；
+    旧的运行日志直接在运行目录下，测试名为空。
+    """
+    dirs = []
+    for root, subdirs, _ in os.walk(run_dir):
+        subdirs.sort()
+        if log_analysis.find_flows(root):
+            test = os.path.relpath(root, run_dir)
+            dirs.append(('' if test == '.' else test, root))
+    return dirs
+
+def path_params(network, consumer, producer):
+    """消费者节点到生产者路径上的瓶颈带宽、单向时延和累计丢包率"""
+    if not network or 'links' not in network:
+        return None, None, None
+    config = SimpleNamespace(**network)
+    link_names = []
+    if producer is not None and consumer in network.get('nodes', {}):
+        link_names = routing.shortest_path_links(config, consumer, producer)
+    if not link_names:
+        link_names = [name for name, link in network['links'].items() if consumer in link['nodes']][:1]
+    if not link_names:
+        return None, None, None
+    links = [network['links'][name] for name in link_names]
+    bandwidths = [link['bw'] for link in links if link.get('bw')]
+    delivered = float(np.prod([1 - link.get('loss', 0) / 100 for link in links]))
+    return (min(bandwidths) if bandwidths else None,
+            sum(routing.parse_delay_ms(link.get('delay')) for link in links),
+            (1 - delivered) * 100)
+
+def consumer_result(test_dir, consumer, results, segment_size):
+    """仿真器写入的 results.json 中的结果；没有时解析消费者日志"""
+    for result in results:
+        if result.get('consumer') == consumer:
+            return result
+    for name in (f"{consumer}.log", LEGACY_CONSUMER_LOG):
+        path = os.path.join(test_dir, name)
+        if os.path.exists(path):
+            return parse_consumer_log(path, consumer, segment_size=segment_size).to_dict()
+    return None
+
+class Ingester:
+    """把一次运行的所有流写入数据库"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def indexed(self, run_dir):
+        row = self.conn.execute('SELECT 1 FROM runs WHERE path = ?',
+                                (os.path.abspath(run_dir),)).fetchone()
+        return row is not None
+
+    def ingest_run(self, run_dir):
+        metadata = read_json(os.path.join(run_dir, RUN_FILE), {})
+        results = read_json(os.path.join(run_dir, RESULTS_FILE), [])
+        network = metadata.get('network', {})
+        name, started, file_name = run_info(run_dir, metadata)
+
+        with self.conn:
+            self.conn.execute('DELETE FROM runs WHERE path = ?', (os.path.abspath(run_dir),))
+            run_id = self.conn.execute(
+                'INSERT INTO runs (path, name, started, file_name, git_revision, config_file, '
+                'metadata, ingested_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (os.path.abspath(run_dir), name, started, file_name, metadata.get('git_revision'),
+                 metadata.get('config_file'), json.dumps(metadata, ensure_ascii=False), time.time())
+            ).lastrowid
+            count = 0
+            for test, test_dir in test_dirs(run_dir):
+                test_results = [r for r in results if r.get('test', '') == test]
+                flows = {flow['consumer']: flow for flow in
+                         read_json(os.path.join(test_dir, log_analysis.FLOWS_FILE), [])}
+                for consumer, (cwnd_path, rtt_path) in log_analysis.find_flows(test_dir).items():
+                    self.ingest_flow(run_id, test, test_dir, consumer, flows.get(consumer, {}),
+                                     cwnd_path, rtt_path, test_results, metadata, network)
+                    count += 1
+        return count
+
+    def ingest_flow(self, run_id, test, test_dir, consumer, flow, cwnd_path, rtt_path,
+                    results, metadata, network):
+        interest = flow.get('interest')
+        host = flow.get('host', consumer)
+        producer = routing.producer_of(SimpleNamespace(**network), interest) if interest and network else None
+        proconfig = metadata.get('producer_ini', {}).get(producer)
+        if proconfig is None and len(metadata.get('producer_ini', {})) == 1:
+            proconfig = next(iter(metadata['producer_ini'].values()))
+        segment_size = int((proconfig or {}).get('general', {}).get('segment-size', DEFAULT_SEGMENT_SIZE))
+
+        conconfig_path = os.path.join(test_dir, f"{consumer}-conconfig.ini")
+        conconfig = read_ini(conconfig_path) if os.path.exists(conconfig_path) else None
+        pipeline_type = (conconfig or {}).get('pipeline', {}).get('pipeline-type')
+
+        analysis = log_analysis.analyze_flow(cwnd_path, rtt_path, segment_size)
+        result = consumer_result(test_dir, consumer, results, segment_size)
+        if interest is None and result:
+            interest = result.get('interest') or None
+        bw, delay, loss = path_params(network, host, producer)
+        rtt = analysis.get('rtt', {})
+        rtt_ms = rtt.get('rtt_ms') or {}
+        cwnd = analysis.get('cwnd', {})
+        goodput = result['goodput_mbps'] if result and result.get('goodput_mbps') else analysis.get('goodput_mbps')
+
+        flow_id = self.conn.execute(
+            'INSERT INTO flows (run_id, test, consumer, interest, producer, pipeline_type, bw_mbps, '
+            'delay_ms, loss, conconfig, proconfig, completed, segments, bytes, wall_time_s, '
+            'goodput_mbps, avg_rtt_ms, rtt_p50_ms, rtt_p95_ms, rtt_p99_ms, cwnd_mean, cwnd_max, '
+            'slow_start_ratio, decrease_events, backoff_events, retransmissions, timeouts, startup_s, '
+            'time_to_first_segment_s, steady_goodput_mbps, retx_overhead, summary) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, '
+            '?, ?, ?, ?)',
+            (run_id, test, consumer, interest, producer, pipeline_type, bw, delay, loss,
+             json.dumps(conconfig) if conconfig else None,
+             json.dumps(proconfig) if proconfig else None,
+             int(result['success']) if result else None,
+             result['segments'] if result else analysis.get('segments'),
+             result['bytes'] if result else None,
+             result['wall_time'] if result else cwnd.get('duration_s'),
+             goodput,
+             result['avg_rtt_ms'] if result and result.get('avg_rtt_ms') else rtt_ms.get('mean'),
+             rtt_ms.get('p50'), rtt_ms.get('p95'), rtt_ms.get('p99'),
+             cwnd.get('mean'), cwnd.get('max'), cwnd.get('slow_start_ratio'),
+             cwnd.get('decrease_events'), rtt.get('backoff_events'),
+             result['retransmissions'] if result else None,
+             result['timeouts'] if result else None,
+             result.get('startup_s') if result else None,
+             result.get('time_to_first_segment_s') if result else None,
+             result.get('steady_goodput_mbps') if result else None,
+             result.get('retx_overhead') if result else None,
+             json.dumps(analysis))
+        ).lastrowid
+        self.ingest_series(flow_id, test_dir, consumer, cwnd_path, rtt_path)
+
+    def ingest_series(self, flow_id, test_dir, consumer, cwnd_path, rtt_path):
+        series = {}
+        if os.path.exists(cwnd_path):
+            cwnd = log_analysis.load_cwnd(cwnd_path)
+            series['cwnd'] = (cwnd['time'], cwnd['cwnd'])
+        if os.path.exists(rtt_path):
+            rtt = log_analysis.load_rtt(rtt_path)
+            series['rtt'] = (rtt['segment'], rtt['rtt'])
+        goodput_path = os.path.join(test_dir, f"{consumer}{GOODPUT_SUFFIX}")
+        if os.path.exists(goodput_path):
+            goodput = log_analysis.parse_tsv(goodput_path, 2)
+            series['goodput'] = (goodput[:, 0], goodput[:, 1])
+        for kind, (t, v) in series.items():
+            t, v = downsample(np.asarray(t), np.asarray(v))
+            self.conn.execute('INSERT INTO series (flow_id, kind, points, t, v) VALUES (?, ?, ?, ?, ?)',
+                              (flow_id, kind, len(t), encode(t), encode(v)))
+
+def ingest(conn, logs_dir=DEFAULT_LOGS_DIR, reindex=False):
+    """增量导入 logs_dir 下的所有运行，返回 (导入的运行数, 跳过的运行数)"""
+    ingester = Ingester(conn)
+    added = skipped = 0
+    for name in sorted(os.listdir(logs_dir)):
+        run_dir = os.path.join(logs_dir, name)
+        if not os.path.isdir(run_dir):
+            continue
+        if not reindex and ingester.indexed(run_dir):
+            skipped += 1
+            continue
+        start = time.time()
+        flows = ingester.ingest_run(run_dir)
+        added += 1
+        print(f"✓ {name}: {flows} 个流 ({time.time() - start:.2f} 秒)", file=sys.stderr)
+    return added, skipped
+
+FLOW_COLUMNS = ('test', 'consumer', 'interest', 'producer', 'pipeline_type', 'bw_mbps', 'delay_ms',
+                'loss', 'completed', 'segments', 'bytes', 'wall_time_s', 'goodput_mbps', 'avg_rtt_ms',
+                'rtt_p50_ms', 'rtt_p95_ms', 'rtt_p99_ms', 'cwnd_mean', 'cwnd_max', 'slow_start_ratio',
+                'decrease_events', 'backoff_events', 'retransmissions', 'timeouts', 'startup_s',
+                'time_to_first_segment_s', 'steady_goodput_mbps', 'retx_overhead')
+RUN_COLUMNS = ('name', 'started', 'file_name', 'git_revision')
+
+def column_sql(name):
+    if name in FLOW_COLUMNS:
+        return f"flows.{name}"
+    if name in RUN_COLUMNS:
+        return f"runs.{name}"
+    raise ValueError(f"未知的列: {name}")
+
+def parse_where(items):
+    """把 ['bw_mbps=100'] 转换为 SQL 条件和参数"""
+    clauses = []
+    params = []
+    for item in items:
+        key, value = item.split('=', 1)
+        clauses.append(f"{column_sql(key)} = ?")
+        try:
+            params.append(float(value))
+        except ValueError:
+            params.append(value)
+    return clauses, params
+
+def query(conn, group=(), where=(), metric='goodput_mbps'):
+    """按 group 分组汇总 metric 的 count / median / mean / min / max"""
+    clauses, params = parse_where(where)
+    group_sql = [column_sql(name) for name in group]
+    metric_sql = column_sql(metric)
+    sql = (f"SELECT {', '.join(group_sql + [''])}COUNT({metric_sql}) AS n, "
+           f"median({metric_sql}) AS median, AVG({metric_sql}) AS mean, "
+           f"MIN({metric_sql}) AS min, MAX({metric_sql}) AS max "
+           f"FROM flows JOIN runs ON runs.id = flows.run_id")
+    if clauses:
+        sql += f" WHERE {' AND '.join(clauses)}"
+    if group_sql:
+        sql += f" GROUP BY {', '.join(group_sql)} ORDER BY {', '.join(group_sql)}"
+    return conn.execute(sql, params).fetchall()
+
+def format_rows(rows):
+    if not rows:
+        return '(无结果)'
+    columns = rows[0].keys()
+    cells = [[('' if value is None else f"{value:.3f}" if isinstance(value, float) else str(value))
+              for value in row] for row in rows]
+    widths = [max(len(column), *(len(row[i]) for row in cells)) for i, column in enumerate(columns)]
+    lines = ['  '.join(column.ljust(width) for column, width in zip(columns, widths))]
+    lines += ['  '.join(cell.ljust(width) for cell, width in zip(row, widths)) for row in cells]
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='实验结果数据库')
+    parser.add_argument('--db', default=DEFAULT_DB, help='SQLite 数据库文件')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = commands.add_parser('ingest', help='增量导入运行目录')
+    ingest_parser.add_argument('logs_dir', nargs='?', default=DEFAULT_LOGS_DIR)
+    ingest_parser.add_argument('--reindex', action='store_true', help='重新导入已索引的运行')
+
+    query_parser = commands.add_parser('query', help='分组汇总指标')
+    query_parser.add_argument('--group', action='append', default=[], help='分组列，如 pipeline_type')
+    query_parser.add_argument('--where', action='append', default=[], metavar='COLUMN=VALUE')
+    query_parser.add_argument('--metric', default='goodput_mbps')
+
+    sql_parser = commands.add_parser('sql', help='执行任意 SQL')
+    sql_parser.add_argument('statement')
+
+    args = parser.parse_args(argv)
+    conn = connect(args.db)
+    start = time.time()
+    if args.command == 'ingest':
+        added, skipped = ingest(conn, args.logs_dir, args.reindex)
+        print(f"导入 {added} 个运行，跳过 {skipped} 个已索引的运行")
+    elif args.command == 'query':
+        print(format_rows(query(conn, args.group, args.where, args.metric)))
+    else:
+        print(format_rows(conn.execute(args.statement).fetchall()))
+    print(f"({(time.time() - start) * 1000:.1f} ms)", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+NDN 路由计算 - 根据 network_config 中的链路为每个生产者前缀计算最短路径 FIB
+"""
+
+import heapq
+import re
+
+NFD_PORT = 6363
+
+# 计算路径代价时每一跳的附加代价，避免 0ms 链路的环路与等价路径过多
+HOP_PENALTY = 1e-3
+
+def parse_delay_ms(delay):
+    """把 '10ms' / '1s' / '500us' 形式的延迟转换为毫秒"""
+    if not delay:
+        return 0.0
+    if isinstance(delay, (int, float)):
+        return float(delay)
+    match = re.fullmatch(r'\s*([\d.]+)\s*(us|ms|s)?\s*', str(delay))
+    if not match:
+        raise ValueError(f"无法解析的延迟: {delay}")
+    value = float(match.group(1))
+    unit = match.group(2) or 'ms'
+    return value * {'us': 1e-3, 'ms': 1.0, 's': 1e3}[unit]
+
+def link_cost(link_config, metric='delay'):
+    """根据度量方式计算链路代价: delay (毫秒) / bw (带宽倒数) / hop"""
+    if metric == 'delay':
+        return parse_delay_ms(link_config.get('delay')) + HOP_PENALTY
+    if metric == 'bw':
+        return 1000.0 / link_config['bw'] + HOP_PENALTY
+    if metric == 'hop':
+        return 1.0
+    raise ValueError(f"未知的路由度量: {metric}")
+
+def strip_prefixlen(ip):
+    return ip.split('/')[0]
+
+def link_endpoint_ip(config, link_config, node):
+    """返回链路上某一端节点的 IP，优先使用链路的 'ips' 配置"""
+    ips = link_config.get('ips')
+    if ips:
+        return strip_prefixlen(ips[list(link_config['nodes']).index(node)])
+    return strip_prefixlen(config.nodes[node]['ip'])
+
+def face_uri(ip):
+    return f"udp4://{ip}:{NFD_PORT}"
+
+def build_graph(config, metric='delay'):
+    """构建无向邻接表 {node: [(neighbor, cost, face_uri)]}"""
+    graph = {name: [] for name in config.nodes}
+    for link_config in config.links.values():
+        node1, node2 = link_config['nodes']
+        cost = link_cost(link_config, metric)
+        graph[node1].append((node2, cost, face_uri(link_endpoint_ip(config, link_config, node2))))
+        graph[node2].append((node1, cost, face_uri(link_endpoint_ip(config, link_config, node1))))
+    return graph
+
+def shortest_distances(graph, source):
+    """Dijkstra: 返回所有可达节点到 source 的最短距离"""
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    while heap:
+        d, node = heapq.heappop(heap)
+        if d > dist[node]:
+            continue
+        for neighbor, cost, _ in graph[node]:
+            nd = d + cost
+            if nd < dist.get(neighbor, float('inf')):
+                dist[neighbor] = nd
+                heapq.heappush(heap, (nd, neighbor))
+    return dist
+
+def producer_prefixes(config):
+    """返回 [(prefix, producer_node)]"""
+    return [('/' + app['prefix'].strip('/'), node)
+            for node, app in config.applications.items()]
+
+def compute_routes(config, metric='delay', multipath=False):
+    """计算每个节点的 FIB: {node: [(prefix, nexthop_uri, cost)]}
+
+    单路径时每个前缀只选代价最小的下一跳；多路径时加入所有更靠近生产者的
+    邻居 (保证无环)，以路径代价作为 nfdc 的 cost，交给转发策略选择。
+    """
+    graph = build_graph(config, metric)
+    routes = {name: [] for name in graph}
+    for prefix, producer in producer_prefixes(config):
+        dist = shortest_distances(graph, producer)
+        for node, neighbors in graph.items():
+            if node == producer or node not in dist:
+                continue
+            candidates = sorted(
+                (cost + dist[neighbor], neighbor, uri)
+                for neighbor, cost, uri in neighbors
+                if neighbor in dist and dist[neighbor] < dist[node]
+            )
+            if not multipath:
+                candidates = candidates[:1]
+            for path_cost, _, uri in candidates:
+                routes[node].append((prefix, uri, int(round(path_cost * 100))))
+    return routes
+
+def source_routes(config, prefix, sources, metric='delay'):
+    """同一前缀由多个数据源提供时的多路径 FIB: {node: [(prefix, nexthop_uri, cost)]}
+
+    对每个数据源加入所有更靠近它的邻居，同一下一跳取到各数据源的最小代价，由转发策略在下一跳之间选择。
+    """
+    graph = build_graph(config, metric)
+    hops = {name: {} for name in graph}
+    for source in sources:
+        dist = shortest_distances(graph, source)
+        for node, neighbors in graph.items():
+            if node in sources or node not in dist:
+                continue
+            for neighbor, cost, uri in neighbors:
+                if neighbor in dist and dist[neighbor] < dist[node]:
+                    path_cost = int(round((cost + dist[neighbor]) * 100))
+                    hops[node][uri] = min(hops[node].get(uri, path_cost), path_cost)
+    return {node: [(prefix, uri, cost) for uri, cost in sorted(node_hops.items(), key=lambda item: item[1])]
+            for node, node_hops in hops.items() if node_hops}
+
+def merge_static_routes(routes, static_routes):
+    """把 network_config.routes 中手写的 (prefix, nexthop) 追加到计算结果中"""
+    for node, entries in static_routes.items():
+        node_routes = routes.setdefault(node, [])
+        for prefix, nexthop in entries:
+            if not any(r[0] == prefix and r[1] == nexthop for r in node_routes):
+                node_routes.append((prefix, nexthop, None))
+    return routes
+
+def flows_of_test(test):
+    """展开单个测试的 (consumer, interest) 组合，consumer/interest 可为字符串或列表"""
+    consumers = test['consumer']
+    if isinstance(consumers, str):
+        consumers = [consumers]
+    interests = test['interest']
+    if not isinstance(interests, list):
+        interests = [interests] * len(consumers)
+    return list(zip(consumers, interests))
+
+def test_flows(config):
+    """展开所有测试的 (consumer, interest) 组合"""
+    flows = []
+    for test in getattr(config, 'tests', []):
+        flows.extend(flows_of_test(test))
+    return flows
+
+def unreachable_prefixes(config, routes, metric='delay'):
+    """返回测试中无法路由到所请求前缀的 (consumer, prefix)，用于检查拓扑连通性
+
+    多数据源测试 (带 'sources') 的共享前缀只在运行时安装，按 source_routes 检查。
+    """
+    missing = []
+    for test in getattr(config, 'tests', []):
+        sources = test.get('sources')
+        if sources:
+            prefix = '/' + flows_of_test(test)[0][1].strip('/').split('/')[0]
+            shared_routes = source_routes(config, prefix, sources, metric)
+            missing.extend((consumer, interest) for consumer, interest in flows_of_test(test)
+                           if consumer not in sources and not shared_routes.get(consumer))
+            continue
+        for consumer, interest in flows_of_test(test):
+            node_routes = routes.get(consumer, [])
+            if not any(interest == prefix or interest.startswith(prefix.rstrip('/') + '/')
+                       for prefix, _, _ in node_routes):
+                missing.append((consumer, interest))
+    return missing
+
+def producer_of(config, interest):
+    """返回提供该 Interest 的生产者节点"""
+    first = interest.strip('/').split('/')[0]
+    for prefix, producer in producer_prefixes(config):
+        if prefix.strip('/') == first:
+            return producer
+    return None
+
+def shortest_path_links(config, source, target, metric='delay'):
+    """返回 source 到 target 最短路径经过的链路名称列表"""
+    link_names = {}
+    for link_name, link_config in config.links.items():
+        node1, node2 = link_config['nodes']
+        link_names[(node1, node2)] = link_names[(node2, node1)] = link_name
+    graph = build_graph(config, metric)
+    dist = shortest_distances(graph, target)
+    if source not in dist:
+        return []
+    path = []
+    node = source
+    while node != target:
+        next_node = min((cost + dist[neighbor], neighbor)
+                        for neighbor, cost, _ in graph[node] if neighbor in dist)[1]
+        path.append(link_names[(node, next_node)])
+        node = next_node
+    return path
@@ -0,0 +1,195 @@
+"""
+链路场景时间线 - 测试过程中按时间改变链路的带宽、时延、丢包或通断，记录每个事件实际发生的时刻，
+并计算各流对每个事件的反应时间和恢复时间
+
+network_config.py 中的 scenarios 为 {场景名: [事件]}，测试通过 'scenario' 引用:
+    {'at': 10, 'link': 'consumer1-producer1', 'bw': 20}                    # 带宽阶跃 (持续到测试结束)
+    {'at': 20, 'link': 'consumer1-producer1', 'delay': '80ms', 'duration': 5}   # 时延尖峰，5 秒后恢复
+    {'at': 30, 'link': 'consumer1-producer1', 'loss': 10, 'duration': 2}   # 丢包突发
+    {'at': 40, 'link': 'consumer1-producer1', 'down': True, 'duration': 1} # 链路中断 1 秒
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+import routing
+
+LINK_PARAMS = ('bw', 'delay', 'loss', 'jitter', 'max_queue_size')
+SCENARIO_FILE = 'scenario.json'
+RECOVERY_WINDOW = 3.0       # 计算事件前基线 / 事件后稳定水平的窗口 (秒)
+RECOVERY_RATIO = 0.9        # goodput 回到目标水平的该比例视为恢复
+
+def link_state(link_config):
+    return {key: link_config.get(key) for key in LINK_PARAMS} | {'down': False}
+
+def expand_events(events, links):
+    """把场景事件展开为按时间排序的动作列表
+
+    每个动作带有链路在该时刻之后的完整状态；带 duration 的事件会在结束时追加一个恢复动作，
+    恢复到事件发生前的状态。
+    """
+    changes = []
+    for index, event in enumerate(events):
+        changes.append((event['at'], index, 'change', event))
+        if event.get('duration'):
+            changes.append((event['at'] + event['duration'], index, 'revert', event))
+    changes.sort(key=lambda change: (change[0], change[1], change[2] == 'change'))
+
+    states = {name: link_state(links[name]) for name in {event['link'] for event in events}}
+    saved = {}
+    actions = []
+    for at, index, kind, event in changes:
+        name = event['link']
+        if kind == 'change':
+            saved[index] = dict(states[name])
+            update = {key: event[key] for key in LINK_PARAMS if key in event}
+            if 'down' in event:
+                update['down'] = bool(event['down'])
+            states[name] = {**states[name], **update}
+        else:
+            states[name] = saved.pop(index)
+        actions.append({'at': at, 'event': index, 'kind': kind, 'link': name,
+                        'state': dict(states[name])})
+    return actions
+
+class ScenarioRunner:
+    """在后台线程中按时间执行动作；apply(link_name, state) 负责真正修改链路
+
+    stop() 会把所有改动过的链路恢复为 network_config 中的初始状态，使下一个测试不受影响。
+    """
+
+    def __init__(self, events, links, apply):
+        self.events = events
+        self.links = links
+        self.apply = apply
+        self.actions = expand_events(events, links)
+        self.applied = []
+        self.origin = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, origin=None):
+        self.origin = origin or time.time()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        for action in self.actions:
+            delay = self.origin + action['at'] - time.time()
+            if delay > 0 and self._stop.wait(delay):
+                return
+            if self._stop.is_set():
+                return
+            self.apply(action['link'], action['state'])
+            now = time.time()
+            self.applied.append(dict(action, time=now, offset=now - self.origin))
+            description = 'down' if action['state']['down'] else ', '.join(
+                f"{key}={action['state'][key]}" for key in LINK_PARAMS if action['state'][key] is not None)
+            print(f"  [场景 {now - self.origin:6.1f}s] "
+                  f"{action['link']} {action['kind']}: {description}")
+
+    def stop(self):
+        """停止执行剩余动作，并恢复所有涉及的链路"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        for name in dict.fromkeys(action['link'] for action in self.applied):
+            self.apply(name, link_state(self.links[name]))
+        return self.applied
+
+def flow_links(config, host, interest):
+    """流经过的链路名称"""
+    producer = routing.producer_of(config, interest)
+    if producer is None:
+        return []
+    return routing.shortest_path_links(config, host, producer)
+
+def window_mean(t, v, start, end):
+    selected = v[(t >= start) & (t < end)]
+    return float(np.mean(selected)) if len(selected) else None
+
+def first_reaching(t, v, start, target):
+    reached = np.nonzero((t >= start) & (v >= target))[0]
+    return float(t[reached[0]] - start) if len(reached) else None
+
+def event_recovery(change, revert, previous_time, next_time, flow):
+    """单个流对单个事件的反应
+
+    baseline 为事件前 RECOVERY_WINDOW 秒 (不早于该链路上一个动作) 的平均 goodput；有恢复动作的事件，recovery_s 为恢复后
+    goodput 回到 RECOVERY_RATIO × baseline 的时间；永久性的变化，settle_s 为事件后 goodput 达到
+    RECOVERY_RATIO × 新稳定水平 (下一个事件或测试结束前 RECOVERY_WINDOW 秒的平均值) 的时间。
+    reaction_s 为事件后 cwnd 第一次下降的时间。
+    """
+    t, v = flow['goodput']
+    te = change['time'] - flow['start_time']
+    result = {'event': change['event'], 'link': change['link'], 'flow': flow['name'], 'at_s': te}
+    start = te - RECOVERY_WINDOW
+    if previous_time is not None:
+        start = max(start, previous_time - flow['start_time'])
+    result['baseline_mbps'] = window_mean(t, v, start, te)
+    end = revert['time'] - flow['start_time'] if revert else (next_time - flow['start_time'] if next_time else
+                                                              (t[-1] if len(t) else te))
+    result['min_mbps'] = float(np.min(v[(t >= te) & (t <= end)])) if np.any((t >= te) & (t <= end)) else None
+
+    if revert:
+        tr = revert['time'] - flow['start_time']
+        result['duration_s'] = tr - te
+        if result['baseline_mbps']:
+            result['recovery_s'] = first_reaching(t, v, tr, RECOVERY_RATIO * result['baseline_mbps'])
+    else:
+        level = window_mean(t, v, max(te, end - RECOVERY_WINDOW), end + 1e-9)
+        result['settled_mbps'] = level
+        if level:
+            result['settle_s'] = first_reaching(t, v, te, RECOVERY_RATIO * level)
+
+    if flow.get('cwnd') is not None:
+        ct, cw = flow['cwnd']
+        ct = ct + flow.get('pipeline_offset', 0.0)
+        decreases = np.nonzero((ct[1:] >= te) & (np.diff(cw) < 0))[0]
+        result['reaction_s'] = float(ct[decreases[0] + 1] - te) if len(decreases) else None
+    return result
+
+def analyze(applied, config, flows):
+    """把每个事件与经过该链路的流对应起来，计算反应与恢复时间
+
+    flows: [{'name', 'host', 'interest', 'start_time', 'goodput': (t, v), 'cwnd': (t, w) 或 None,
+             'pipeline_offset': cwnd 时间相对进程启动的偏移}]
+    """
+    changes = [action for action in applied if action['kind'] == 'change']
+    reverts = {action['event']: action for action in applied if action['kind'] == 'revert'}
+    recovery = []
+    for flow in flows:
+        links = set(flow_links(config, flow['host'], flow['interest']))
+        for i, change in enumerate(changes):
+            if change['link'] not in links or not len(flow['goodput'][0]):
+                continue
+            earlier = [a['time'] for a in applied if a['link'] == change['link'] and a['time'] < change['time']]
+            later = [c['time'] for c in changes[i + 1:] if c['link'] == change['link']]
+            recovery.append(event_recovery(change, reverts.get(change['event']),
+                                           earlier[-1] if earlier else None,
+                                           later[0] if later else None, flow))
+    return recovery
+
+def write_result(test_dir, events, applied, recovery):
+    with open(os.path.join(test_dir, SCENARIO_FILE), 'w') as f:
+        json.dump({'events': events, 'applied': applied, 'recovery': recovery},
+                  f, indent=2, ensure_ascii=False)
+
+def print_summary(recovery):
+    if not recovery:
+        return
+    print("\n--- 链路事件的反应与恢复 ---")
+    for item in recovery:
+        parts = [f"事件 #{item['event']} {item['link']} @ {item['at_s']:.1f}s", item['flow']]
+        if item.get('reaction_s') is not None:
+            parts.append(f"cwnd 反应 {item['reaction_s'] * 1e3:.0f} ms")
+        if 'recovery_s' in item:
+            parts.append('未恢复' if item['recovery_s'] is None else f"恢复 {item['recovery_s']:.1f}s")
+        if 'settle_s' in item:
+            parts.append('未稳定' if item['settle_s'] is None else f"稳定 {item['settle_s']:.1f}s")
+        print('  ' + ', '.join(parts))
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+参数扫描 - 对消费者 ini 与链路参数做网格/随机搜索，用进程池并行运行，
+结果按完整有效配置的哈希缓存，重复的参数点不会再运行，崩溃后重新执行即可续跑
+
+参数名: 'section.key' 覆盖消费者 ini (如 pipeline.init-cwnd)，'link.field' 覆盖所有链路
+(如 link.bw、link.delay)。
+
+用法:
+    python3 sweep.py --grid pipeline.init-cwnd=5,10,20 --grid cubic.cubic-beta=0.5,0.7
+    python3 sweep.py sweep.json --workers 8
+    python3 sweep.py sweep.json --backend mininet --workers 2     # 需要 root
+
+sweep.json 示例:
+    {
+        "backend": "sim",
+        "size": 6442450,
+        "model": "round",
+        "trials": 3,
+        "grid": {"pipeline.pipeline-type": ["aimd", "cubic"], "link.bw": [10, 100]},
+        "random": {"samples": 20, "seed": 1,
+                   "space": {"pipeline.init-cwnd": {"randint": [1, 100]},
+                             "cubic.cubic-beta": {"uniform": [0.5, 0.9]}}}
+    }
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import copy
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+
+import experiment_config
+import log_analysis
+import pipeline_sim
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+SIMULATOR = os.path.join(PROJECT_ROOT, 'advanced_ndn_simulator.py')
+DEFAULT_CACHE_DIR = os.path.join('sweeps', 'cache')
+RESULT_FILE = 'result.json'
+CONFIG_FILE = 'config.json'
+MININET_TIMEOUT = 3600      # 单次 Mininet 运行的超时 (秒)
+
+DEFAULTS = {
+    'backend': 'sim',
+    'conconfig': 'exp-conconfig.ini',
+    'proconfig': 'exp-proconfig.ini',
+    'network': 'network_config.py',
+    'link': None,
+    'size': 6442450,
+    'model': pipeline_sim.DEFAULT_MODEL,
+    'trials': 1,
+    'grid': {},
+    'random': None,
+}
+
+def parse_value(text):
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+def parse_grid_args(items):
+    """把 ['pipeline.init-cwnd=5,10'] 解析为 {'pipeline.init-cwnd': [5, 10]}"""
+    grid = {}
+    for item in items:
+        key, values = item.split('=', 1)
+        grid[key] = [parse_value(value) for value in values.split(',')]
+    return grid
+
+def expand_grid(grid):
+    if not grid:
+        return [{}]
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+def sample_random(spec):
+    """按 {"samples", "seed", "space"} 随机采样参数点"""
+    rng = random.Random(spec.get('seed', 0))
+    samples = []
+    for _ in range(spec['samples']):
+        params = {}
+        for key, dist in spec['space'].items():
+            if isinstance(dist, list):
+                params[key] = rng.choice(dist)
+            elif 'randint' in dist:
+                params[key] = rng.randint(*dist['randint'])
+            elif 'uniform' in dist:
+                params[key] = rng.uniform(*dist['uniform'])
+            elif 'loguniform' in dist:
+                low, high = dist['loguniform']
+                params[key] = math.exp(rng.uniform(math.log(low), math.log(high)))
+            else:
+                raise ValueError(f"未知的分布: {key}: {dist}")
+        samples.append(params)
+    return samples
+
+def split_params(params):
+    """拆分为 (ini 覆盖 {section: {key: value}}, 链路覆盖 {field: value})"""
+    ini_overrides = {}
+    link_overrides = {}
+    for key, value in params.items():
+        section, name = key.split('.', 1)
+        if section == 'link':
+            link_overrides[name] = value
+        else:
+            ini_overrides.setdefault(section, {})[name] = value
+    return ini_overrides, link_overrides
+
+def config_hash(effective):
+    text = json.dumps(effective, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+class SweepPlanner:
+    """把参数点展开为带有效配置和缓存键的具体任务"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.base_conconfig = experiment_config.read_ini(spec['conconfig'])
+        self.proconfig = experiment_config.read_ini(spec['proconfig'])
+        self.network = experiment_config.network_config_values(
+            experiment_config.load_config(spec['network']))
+        self.link = spec['link'] or next(iter(self.network['links']))
+
+    def variants(self):
+        points = expand_grid(self.spec['grid'])
+        if self.spec.get('random'):
+            points = [dict(point, **sample) for point in points
+                      for sample in sample_random(self.spec['random'])]
+        return [(params, trial) for params in points for trial in range(self.spec['trials'])]
+
+    def effective_config(self, params, trial):
+        ini_overrides, link_overrides = split_params(params)
+        conconfig = copy.deepcopy(self.base_conconfig)
+        for section, values in ini_overrides.items():
+            conconfig.setdefault(section, {}).update(
+                {key: experiment_config.format_value(value) for key, value in values.items()})
+        # 日志路径由运行方式决定，不影响结果
+        conconfig.get('pipeline', {}).pop('log-cwnd', None)
+        conconfig.get('pipeline', {}).pop('log-rtt', None)
+
+        network = copy.deepcopy(self.network)
+        for link_config in network['links'].values():
+            link_config.update(link_overrides)
+
+        effective = {
+            'backend': self.spec['backend'],
+            'conconfig': conconfig,
+            'proconfig': self.proconfig,
+            'trial': trial,
+        }
+        if self.spec['backend'] == 'sim':
+            effective['link'] = network['links'][self.link]
+            effective['size'] = self.spec['size']
+            effective['model'] = self.spec['model']
+        else:
+            for test in network.get('tests', []):
+                test.pop('config', None)
+            effective['network'] = network
+        return effective
+
+    def jobs(self, cache_dir):
+        jobs = []
+        for params, trial in self.variants():
+            effective = self.effective_config(params, trial)
+            key = config_hash(effective)
+            jobs.append({
+                'key': key,
+                'dir': os.path.join(cache_dir, key),
+                'params': params,
+                'trial': trial,
+                'effective': effective,
+                'ini_overrides': split_params(params)[0],
+                'conconfig_path': os.path.abspath(self.spec['conconfig']),
+            })
+        return jobs
+
+def write_json_atomic(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def run_sim_job(job):
+    """离线仿真后端"""
+    effective = job['effective']
+    segment_size = int(effective['proconfig'].get('general', {}).get('segment-size', 8192))
+    log_dir = os.path.join(job['dir'], 'logs')
+    metrics = pipeline_sim.simulate(effective['conconfig'], effective['link'], effective['size'],
+                                    segment_size, seed=job['trial'], out_dir=log_dir,
+                                    model=effective['model'])
+    flows = log_analysis.analyze_run(log_dir, segment_size)['flows']
+    if flows:
+        metrics['analysis'] = next(iter(flows.values()))
+    return metrics
+
+def run_mininet_job(job):
+    """Mininet 后端: 节点改名为本任务独有的短名称，使多个网络的命名空间、接口和 NFD socket 互不冲突"""
+    effective = job['effective']
+    network = copy.deepcopy(effective['network'])
+    mapping = {name: f"x{job['key'][:4]}n{i}" for i, name in enumerate(network['nodes'])}
+    experiment_config.rename_nodes(network, mapping)
+
+    conconfig_path = experiment_config.derive_ini(
+        job['conconfig_path'], job['ini_overrides'], os.path.join(job['dir'], 'conconfig.ini'))
+    for test in network.get('tests', []):
+        test['config'] = os.path.abspath(conconfig_path)
+    network_path = experiment_config.dump_network_config(
+        network, os.path.join(job['dir'], 'network_config.py'), header=f"由 sweep.py 生成: {job['params']}")
+
+    log_dir = os.path.join(job['dir'], 'logs')
+    with open(os.path.join(job['dir'], 'simulator.log'), 'w') as output:
+        subprocess.run([sys.executable, SIMULATOR, network_path, '--log-dir', log_dir, '--no-cli'],
+                       stdout=output, stderr=subprocess.STDOUT, cwd=PROJECT_ROOT,
+                       timeout=MININET_TIMEOUT, check=True)
+
+    with open(os.path.join(log_dir, 'results.json')) as f:
+        flows = json.load(f)
+    reverse = {new: old for old, new in mapping.items()}
+    for flow in flows:
+        flow['consumer'] = reverse.get(flow['consumer'], flow['consumer'])
+    # 失败或内容损坏的传输不计入吞吐量
+    goodputs = [flow['goodput_mbps'] for flow in flows if flow['success']]
+    return {
+        'completed': bool(flows) and all(flow['success'] for flow in flows),
+        'goodput_mbps': sum(goodputs) / len(goodputs) if goodputs else 0.0,
+        'flows': flows,
+    }
+
+def run_job(job):
+    """在工作进程中运行一个任务，成功后原子地写入 result.json"""
+    os.makedirs(job['dir'], exist_ok=True)
+    write_json_atomic(os.path.join(job['dir'], CONFIG_FILE),
+                      {'params': job['params'], 'trial': job['trial'], 'effective': job['effective']})
+    start = time.time()
+    if job['effective']['backend'] == 'sim':
+        metrics = run_sim_job(job)
+    else:
+        metrics = run_mininet_job(job)
+    result = {'key': job['key'], 'params': job['params'], 'trial': job['trial'],
+              'wall_time_s': time.time() - start, 'metrics': metrics}
+    write_json_atomic(os.path.join(job['dir'], RESULT_FILE), result)
+    return result
+
+def load_cached(job):
+    path = os.path.join(job['dir'], RESULT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def run_sweep(spec, workers=None, cache_dir=DEFAULT_CACHE_DIR):
+    """运行扫描，返回所有参数点的结果 (包括命中缓存的)"""
+    planner = SweepPlanner(spec)
+    jobs = planner.jobs(cache_dir)
+    results = []
+    pending = []
+    for job in jobs:
+        cached = load_cached(job)
+        if cached is not None:
+            results.append(cached)
+        else:
+            pending.append(job)
+    print(f"### 参数扫描: {len(jobs)} 个任务, {len(results)} 个命中缓存, {len(pending)} 个待运行 ###")
+
+    if workers is None:
+        workers = os.cpu_count() if spec['backend'] == 'sim' else 2
+    start = time.time()
+    failures = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_job, job): job for job in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                job = futures[future]
+                try:
+                    result = future.result()
+                    results.append(result)
+                    status = f"✓ {result['metrics'].get('goodput_mbps', 0):.2f} Mbps"
+                except Exception as e:
+                    failures += 1
+                    status = f"❌ {e}"
+                print(f"  [{done}/{len(pending)}] {job['key']} {job['params']} trial={job['trial']}: {status}")
+    print(f"扫描完成: 运行 {len(pending) - failures}, 失败 {failures}, 耗时 {time.time() - start:.2f} 秒")
+    return results
+
+def format_results(results):
+    """按 goodput 降序输出结果表"""
+    rows = sorted(results, key=lambda r: r['metrics'].get('goodput_mbps', 0), reverse=True)
+    lines = []
+    for result in rows:
+        metrics = result['metrics']
+        params = ' '.join(f"{key}={value}" for key, value in result['params'].items())
+        lines.append(f"{metrics.get('goodput_mbps', 0):10.2f} Mbps  "
+                     f"{'✓' if metrics.get('completed') else '❌'}  trial={result['trial']}  "
+                     f"{result['key']}  {params}")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='并行参数扫描')
+    parser.add_argument('spec', nargs='?', help='扫描定义 JSON 文件')
+    parser.add_argument('--grid', action='append', default=[], metavar='KEY=V1,V2,...')
+    parser.add_argument('--backend', choices=['sim', 'mininet'])
+    parser.add_argument('--size', type=int, help='文件大小 (仅 sim 后端)')
+    parser.add_argument('--model', choices=sorted(pipeline_sim.MODELS),
+                        help='仿真模型 (仅 sim 后端，默认 round)')
+    parser.add_argument('--trials', type=int, help='每个参数点的重复次数')
+    parser.add_argument('--workers', type=int, help='并行进程数')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_DIR, help='结果缓存目录')
+    parser.add_argument('--output', help='把全部结果写到该 JSON 文件')
+    args = parser.parse_args(argv)
+
+    spec = dict(DEFAULTS)
+    if args.spec:
+        with open(args.spec) as f:
+            spec.update(json.load(f))
+    spec['grid'] = dict(spec['grid'], **parse_grid_args(args.grid))
+    for key in ('backend', 'size', 'model', 'trials'):
+        if getattr(args, key) is not None:
+            spec[key] = getattr(args, key)
+
+    results = run_sweep(spec, args.workers, args.cache)
+    print(format_results(results))
+    if args.output:
+        write_json_atomic(args.output, results)
+
+if __name__ == '__main__':
+    main()
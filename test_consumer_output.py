@@ -0,0 +1,21 @@
+"""consumer_output 汇总行解析的测试"""
+
+from consumer_output import ConsumerOutputParser, ConsumerResult
+
+def parse_summary(lines):
+    result = ConsumerResult('c1', '/p/testfile')
+    parser = ConsumerOutputParser(result)
+    for line in ['All segments have been received.'] + lines:
+        parser.feed(line)
+    parser.finish()
+    return result
+
+def test_transferred_size_scientific_notation():
+    result = parse_summary(['Transferred size: 6.44245e+06 kB'])
+    assert result.reported['transferred_bytes'] == 6442450000
+    assert result.bytes == 6442450000
+
+def test_transferred_size_plain():
+    result = parse_summary(['Time elapsed: 1.5e+03 milliseconds', 'Transferred size: 6442.45 kB'])
+    assert result.reported['transferred_bytes'] == 6442450
+    assert result.reported['time_elapsed'] == 1.5
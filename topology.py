@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+拓扑生成 - 生成 line / star / dumbbell / grid / fat-tree / waxman / ba 拓扑，以数组形式保存节点与边，
+按分布抽样链路参数，自动分配 IP、消费者/生产者角色和应用，检查连通性，并展开为 network_config 的结构
+
+network_config.py 中定义 topology 而不写 nodes / links 时，load_config 会自动展开:
+    topology = {
+        'type': 'grid', 'rows': 10, 'cols': 10,
+        'consumers': 8, 'producers': 2, 'seed': 1,
+        'link': {'bw': {'uniform': [50, 100]}, 'delay': {'choice': ['1ms', '5ms']}, 'loss': 0},
+    }
+链路参数可以是常数，或 {'uniform': [低, 高]} / {'normal': [均值, 标准差]} / {'lognormal': [mu, sigma]} /
+{'choice': [候选值]}；dumbbell 的瓶颈链路参数由 'bottleneck' 单独指定。
+
+用法:
+    python3 topology.py grid rows=10 cols=10 consumers=8 producers=2 --out configs/grid.py
+    python3 topology.py waxman n=500 consumers=20 producers=5 --minindn web.conf
+"""
+
+from dataclasses import dataclass, field
+import argparse
+import ipaddress
+import json
+import math
+import os
+import random
+import sys
+
+import numpy as np
+
+import routing
+
+TYPES = ('line', 'star', 'dumbbell', 'grid', 'fat-tree', 'waxman', 'ba')
+ROUTER, CONSUMER, PRODUCER = 0, 1, 2
+ROLE_PREFIX = {ROUTER: 'r', CONSUMER: 'c', PRODUCER: 'p'}   # 名称要短: Mininet 接口名不能超过 15 个字符
+DEFAULT_LINK = {'bw': 100, 'delay': '1ms', 'loss': 0, 'max_queue_size': 100}
+LINK_SUBNET = ipaddress.ip_network('10.0.0.0/8')          # 每条链路分配一个 /30
+DEFAULT_FILE = 'testfile_6442450.txt'
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+@dataclass
+class Topology:
+    """数组形式的拓扑: 边为 (E, 2) 的节点下标，链路参数为长度 E 的数组"""
+    n: int
+    edges: np.ndarray
+    roles: np.ndarray = None
+    names: list = None
+    bw: np.ndarray = None
+    delay_ms: np.ndarray = None
+    loss: np.ndarray = None
+    max_queue_size: np.ndarray = None
+    bottleneck: np.ndarray = None           # 瓶颈链路的边下标
+    consumer_candidates: np.ndarray = None  # 生成器建议的消费者 / 生产者位置
+    producer_candidates: np.ndarray = None
+    extra: dict = field(default_factory=dict)
+
+    def degree(self):
+        return np.bincount(self.edges.ravel(), minlength=self.n)
+
+    def components(self):
+        """连通分量的标号 (并查集)"""
+        parent = list(range(self.n))
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for u, v in self.edges.tolist():
+            ru, rv = find(u), find(v)
+            if ru != rv:
+                parent[ru] = rv
+        return np.array([find(x) for x in range(self.n)], dtype=np.int32)
+
+    def is_connected(self):
+        return self.n <= 1 or len(np.unique(self.components())) == 1
+
+# ---- 生成器 ----
+
+def edge_array(pairs):
+    return np.array(pairs, dtype=np.int32).reshape(-1, 2)
+
+def line(n=10):
+    return Topology(n, edge_array([(i, i + 1) for i in range(n - 1)]),
+                    consumer_candidates=np.array([0]), producer_candidates=np.array([n - 1]))
+
+def star(n=10):
+    """节点 0 为中心，1..n 为叶子"""
+    return Topology(n + 1, edge_array([(0, i) for i in range(1, n + 1)]))
+
+def dumbbell(left=4, right=4):
+    """两个路由器 (0, 1) 之间一条瓶颈链路，左侧节点为消费者，右侧为生产者"""
+    pairs = [(0, 1)]
+    pairs += [(0, 2 + i) for i in range(left)]
+    pairs += [(1, 2 + left + i) for i in range(right)]
+    return Topology(2 + left + right, edge_array(pairs), bottleneck=np.array([0]),
+                    consumer_candidates=np.arange(2, 2 + left),
+                    producer_candidates=np.arange(2 + left, 2 + left + right))
+
+def grid(rows=4, cols=4):
+    index = np.arange(rows * cols).reshape(rows, cols)
+    horizontal = np.stack([index[:, :-1].ravel(), index[:, 1:].ravel()], axis=1)
+    vertical = np.stack([index[:-1, :].ravel(), index[1:, :].ravel()], axis=1)
+    corners = np.array([index[0, 0], index[-1, -1], index[0, -1], index[-1, 0]])
+    return Topology(rows * cols, np.concatenate([horizontal, vertical]).astype(np.int32),
+                    consumer_candidates=np.concatenate([index[:, 0], index[0, 1:]]),
+                    producer_candidates=np.unique(corners))
+
+def fat_tree(k=4):
+    """k 叉 fat-tree: (k/2)^2 个核心、k 个 pod (各 k/2 个汇聚和 k/2 个接入)、每个接入连 k/2 个主机"""
+    if k % 2:
+        raise ValueError("fat-tree 的 k 必须为偶数")
+    half = k // 2
+    core = half * half
+    aggregation = core
+    edge = aggregation + k * half
+    hosts = edge + k * half
+    pairs = []
+    for pod in range(k):
+        for a in range(half):
+            agg = aggregation + pod * half + a
+            pairs += [(core_index, agg) for core_index in range(a * half, (a + 1) * half)]
+            pairs += [(agg, edge + pod * half + e) for e in range(half)]
+        for e in range(half):
+            switch = edge + pod * half + e
+            first = hosts + (pod * half + e) * half
+            pairs += [(switch, first + h) for h in range(half)]
+    n = hosts + k * half * half
+    return Topology(n, edge_array(pairs), consumer_candidates=np.arange(hosts, n),
+                    producer_candidates=np.arange(hosts, n))
+
+def waxman(n=100, alpha=0.4, beta=0.1, seed=None):
+    """Waxman 随机图: 单位正方形内的点，u、v 相连的概率为 alpha * exp(-d / (beta * L))"""
+    rng = np.random.default_rng(seed)
+    points = rng.random((n, 2))
+    u, v = np.triu_indices(n, k=1)
+    distance = np.hypot(*(points[u] - points[v]).T)
+    probability = alpha * np.exp(-distance / (beta * math.sqrt(2)))
+    chosen = rng.random(len(u)) < probability
+    topology = Topology(n, np.stack([u[chosen], v[chosen]], axis=1).astype(np.int32))
+    topology.extra['positions'] = points
+    return connect_components(topology)
+
+def barabasi_albert(n=100, m=2, seed=None):
+    """Barabási-Albert 优先连接: 每个新节点连接 m 个已有节点，概率与度成正比"""
+    rng = random.Random(seed)
+    pairs = [(i, j) for i in range(m + 1) for j in range(i)]   # 初始为 m + 1 个节点的完全图
+    targets = [node for pair in pairs for node in pair]
+    for node in range(m + 1, n):
+        chosen = set()
+        while len(chosen) < m:
+            chosen.add(rng.choice(targets))
+        for target in chosen:
+            pairs.append((target, node))
+            targets += [target, node]
+    return Topology(n, edge_array(pairs))
+
+def connect_components(topology):
+    """把不连通的分量用最近的点对 (有坐标时) 或任意节点连到最大分量上"""
+    labels = topology.components()
+    unique, counts = np.unique(labels, return_counts=True)
+    if len(unique) <= 1:
+        return topology
+    main = unique[np.argmax(counts)]
+    points = topology.extra.get('positions')
+    extra = []
+    for label in unique:
+        if label == main:
+            continue
+        members = np.nonzero(labels == label)[0]
+        others = np.nonzero(labels == main)[0]
+        if points is not None:
+            distance = np.linalg.norm(points[members][:, None] - points[others][None], axis=2)
+            i, j = np.unravel_index(np.argmin(distance), distance.shape)
+            extra.append((others[j], members[i]))
+        else:
+            extra.append((others[0], members[0]))
+        labels[members] = main
+    topology.edges = np.concatenate([topology.edges, edge_array(extra)])
+    return topology
+
+GENERATORS = {
+    'line': line,
+    'star': star,
+    'dumbbell': dumbbell,
+    'grid': grid,
+    'fat-tree': fat_tree,
+    'waxman': waxman,
+    'ba': barabasi_albert,
+}
+
+# ---- 链路参数、角色和名称 ----
+
+def sample(spec, count, rng):
+    """按参数规格为 count 条链路抽样"""
+    if not isinstance(spec, dict):
+        return [spec] * count
+    (kind, args), = spec.items()
+    if kind == 'uniform':
+        return rng.uniform(args[0], args[1], count).tolist()
+    if kind == 'normal':
+        return np.maximum(rng.normal(args[0], args[1], count), 0).tolist()
+    if kind == 'lognormal':
+        return rng.lognormal(args[0], args[1], count).tolist()
+    if kind == 'choice':
+        return [args[i] for i in rng.integers(0, len(args), count)]
+    raise ValueError(f"未知的分布: {kind}")
+
+def assign_links(topology, link=None, bottleneck=None, seed=None):
+    rng = np.random.default_rng(seed)
+    link = {**DEFAULT_LINK, **(link or {})}
+    count = len(topology.edges)
+    delays = [routing.parse_delay_ms(value) for value in sample(link['delay'], count, rng)]
+    topology.bw = np.array(sample(link['bw'], count, rng), dtype=np.float32)
+    topology.delay_ms = np.array(delays, dtype=np.float32)
+    topology.loss = np.array(sample(link['loss'], count, rng), dtype=np.float32)
+    topology.max_queue_size = np.array(sample(link['max_queue_size'], count, rng), dtype=np.int32)
+    if bottleneck and topology.bottleneck is not None:
+        for key, value in bottleneck.items():
+            values = sample(value, len(topology.bottleneck), rng)
+            if key == 'delay':
+                values = [routing.parse_delay_ms(v) for v in values]
+            getattr(topology, 'delay_ms' if key == 'delay' else key)[topology.bottleneck] = values
+    return topology
+
+def pick(candidates, count, rng, exclude=()):
+    candidates = [int(c) for c in candidates if int(c) not in exclude]
+    rng.shuffle(candidates)
+    return candidates[:count]
+
+def assign_roles(topology, consumers=1, producers=1, placement='leaves', seed=None):
+    """选择消费者和生产者节点，其余为路由器
+
+    placement 为 leaves 时使用生成器建议的位置 (不够时报错，不会把路由器当作主机)，没有建议位置时
+    优先度为 1 的叶子，其次是度最小的节点；random 为随机选择。
+    """
+    rng = random.Random(seed)
+    degree = topology.degree()
+    if placement == 'random':
+        order = list(range(topology.n))
+        producer_pool = consumer_pool = order
+    elif placement == 'leaves':
+        by_degree = sorted(range(topology.n), key=lambda node: (degree[node], node))
+        leaves = [node for node in by_degree if degree[node] <= 1] or by_degree
+        producer_pool = list(topology.producer_candidates) if topology.producer_candidates is not None else leaves
+        consumer_pool = list(topology.consumer_candidates) if topology.consumer_candidates is not None else leaves
+    else:
+        raise ValueError(f"未知的角色分配方式: {placement}")
+
+    chosen_producers = pick(producer_pool, producers, rng)
+    chosen_consumers = pick(consumer_pool, consumers, rng, exclude=set(chosen_producers))
+    if placement == 'leaves':
+        for role, candidates, chosen, count in (('生产者', topology.producer_candidates, chosen_producers, producers),
+                                                ('消费者', topology.consumer_candidates, chosen_consumers, consumers)):
+            if candidates is not None and len(chosen) < count:
+                raise ValueError(f"生成器只建议了 {len(chosen)} 个可用的{role}位置，无法放置 {count} 个{role}"
+                                 f" (可增大拓扑规模或使用 placement='random')")
+    # 叶子不够时从其他低度节点补足
+    if len(chosen_producers) < producers or len(chosen_consumers) < consumers:
+        rest = [node for node in sorted(range(topology.n), key=lambda node: degree[node])
+                if node not in chosen_producers and node not in chosen_consumers]
+        chosen_producers += rest[:producers - len(chosen_producers)]
+        rest = [node for node in rest if node not in chosen_producers]
+        chosen_consumers += rest[:consumers - len(chosen_consumers)]
+    if len(chosen_producers) < producers or len(chosen_consumers) < consumers:
+        raise ValueError(f"拓扑只有 {topology.n} 个节点，无法放置 {consumers} 个消费者和 {producers} 个生产者")
+
+    topology.roles = np.full(topology.n, ROUTER, dtype=np.int8)
+    topology.roles[chosen_producers] = PRODUCER
+    topology.roles[chosen_consumers] = CONSUMER
+    counters = {role: 0 for role in ROLE_PREFIX}
+    names = []
+    for role in topology.roles.tolist():
+        counters[role] += 1
+        names.append(f"{ROLE_PREFIX[role]}{counters[role]}")
+    topology.names = names
+    return topology
+
+def link_ips(index):
+    """第 index 条链路的 /30 中两端的地址"""
+    base = int(LINK_SUBNET.network_address) + 4 * index
+    if base + 3 > int(LINK_SUBNET.broadcast_address):
+        raise ValueError("链路数超过了可分配的 /30 子网")
+    return (f"{ipaddress.ip_address(base + 1)}/30", f"{ipaddress.ip_address(base + 2)}/30")
+
+def format_delay(delay_ms):
+    return f"{delay_ms:g}ms"
+
+def to_values(topology, file_name=DEFAULT_FILE, producer_config=None, directory=None, multipath=False):
+    """展开为 network_config 的 nodes / links / applications / routing / routes / tests"""
+    names = topology.names
+    links = {}
+    node_ips = {}
+    for index, (u, v) in enumerate(topology.edges.tolist()):
+        ips = link_ips(index)
+        node_ips.setdefault(u, ips[0])
+        node_ips.setdefault(v, ips[1])
+        link_name = f"{names[u]}-{names[v]}"
+        while link_name in links:      # 平行边
+            link_name += "'"
+        links[link_name] = {
+            'nodes': (names[u], names[v]),
+            'bw': round(float(topology.bw[index]), 3),
+            'delay': format_delay(round(float(topology.delay_ms[index]), 3)),
+            'loss': round(float(topology.loss[index]), 4),
+            'max_queue_size': int(topology.max_queue_size[index]),
+            'use_htb': True,
+            'jitter': None,
+            'ips': ips,
+        }
+    role_names = {ROUTER: 'router', CONSUMER: 'consumer', PRODUCER: 'producer'}
+    nodes = {name: {'ip': node_ips.get(i, f"{ipaddress.ip_address(int(LINK_SUBNET.network_address) + 1)}/30"),
+                    'type': role_names[int(topology.roles[i])]}
+             for i, name in enumerate(names)}
+    producers = [name for i, name in enumerate(names) if topology.roles[i] == PRODUCER]
+    consumers = [name for i, name in enumerate(names) if topology.roles[i] == CONSUMER]
+    applications = {name: {
+        'prefix': name,
+        'config_file': producer_config or os.path.join(PROJECT_ROOT, 'exp-proconfig.ini'),
+        'directory': directory or os.path.join(PROJECT_ROOT, 'experiments/1'),
+    } for name in producers}
+    tests = [{
+        'name': 'generated',
+        'consumer': consumers,
+        'config': os.path.join(PROJECT_ROOT, 'exp-conconfig.ini'),
+        'interest': [f"/{producers[i % len(producers)]}/{file_name}" for i in range(len(consumers))],
+        'description': f"{len(consumers)} 个消费者从 {len(producers)} 个生产者获取 {file_name}",
+    }]
+    return {
+        'nodes': nodes,
+        'links': links,
+        'applications': applications,
+        'routing': {'metric': 'delay', 'multipath': multipath},
+        'routes': {},
+        'tests': tests,
+    }
+
+def generate(spec):
+    """按 spec (network_config.topology 的格式) 生成拓扑，返回 (Topology, network_config 的各项)"""
+    spec = dict(spec)
+    kind = spec.pop('type')
+    if kind not in GENERATORS:
+        raise ValueError(f"未知的拓扑类型: {kind} (可选 {', '.join(TYPES)})")
+    seed = spec.pop('seed', None)
+    options = {key: spec.pop(key) for key in ('consumers', 'producers', 'placement', 'link', 'bottleneck',
+                                               'file', 'producer_config', 'directory', 'multipath')
+               if key in spec}
+    if kind in ('waxman', 'ba'):
+        spec['seed'] = seed
+    topology = GENERATORS[kind](**spec)
+    if not topology.is_connected():
+        raise ValueError(f"生成的 {kind} 拓扑不连通")
+    assign_links(topology, options.get('link'), options.get('bottleneck'), seed)
+    assign_roles(topology, options.get('consumers', 1), options.get('producers', 1),
+                 options.get('placement', 'leaves'), seed)
+    values = to_values(topology, options.get('file', DEFAULT_FILE), options.get('producer_config'),
+                       options.get('directory'), options.get('multipath', False))
+    return topology, values
+
+def expand_config(config):
+    """network_config 中只定义了 topology 时，生成并填入缺少的各项 (已定义的项保持不变)"""
+    _, values = generate(config.topology)
+    for key, value in values.items():
+        if not hasattr(config, key):
+            setattr(config, key, value)
+    return config
+
+def write_minindn_conf(values, path):
+    """写成 MiniNDN 的拓扑文件 (autotest.py 使用的 web.conf 格式)"""
+    with open(path, 'w') as f:
+        f.write('[nodes]\n')
+        for name in values['nodes']:
+            f.write(f"{name}:_\n")
+        f.write('\n[links]\n')
+        for link_config in values['links'].values():
+            node1, node2 = link_config['nodes']
+            f.write(f"{node1}:{node2} bw={link_config['bw']:g} loss={link_config['loss']:g} "
+                    f"delay={link_config['delay']} max_queue_size={link_config['max_queue_size']}\n")
+    return path
+
+def describe(topology):
+    degree = topology.degree()
+    roles = np.bincount(topology.roles, minlength=3)
+    return (f"{topology.n} 个节点 (消费者 {roles[CONSUMER]}, 生产者 {roles[PRODUCER]}, 路由器 {roles[ROUTER]}), "
+            f"{len(topology.edges)} 条链路, 平均度 {degree.mean():.2f}, 最大度 {degree.max()}")
+
+def parse_params(items):
+    """['rows=10', 'link={"bw": 50}'] -> {'rows': 10, 'link': {'bw': 50}}"""
+    params = {}
+    for item in items:
+        key, _, value = item.partition('=')
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    return params
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='拓扑生成')
+    parser.add_argument('type', choices=TYPES)
+    parser.add_argument('params', nargs='*', help='key=value，值按 JSON 解析，如 rows=10 link=\'{"bw": 50}\'')
+    parser.add_argument('--out', help='写成可被 load_config 加载的 network_config 文件')
+    parser.add_argument('--minindn', help='同时写成 MiniNDN 拓扑文件')
+    args = parser.parse_args(argv)
+
+    try:
+        topology, values = generate({'type': args.type, **parse_params(args.params)})
+    except (TypeError, ValueError) as e:
+        sys.exit(f"❌ {e}")
+    print(f"✓ {args.type}: {describe(topology)}")
+    if args.out:
+        import experiment_config
+        experiment_config.dump_network_config(values, args.out, header=f"由 topology.py 生成: {args.type}")
+        print(f"✓ {args.out}")
+    if args.minindn:
+        print(f"✓ {write_minindn_conf(values, args.minindn)}")
+
+if __name__ == '__main__':
+    main()
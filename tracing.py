@@ -0,0 +1,98 @@
+"""
+Chrome / Perfetto trace-event 记录 - 记录仿真器各阶段、各节点和各消费者流的时间区间，
+写成 trace.json，可在 chrome://tracing 或 https://ui.perfetto.dev 中打开
+
+    with tracing.span('net.start'):
+        net.start()
+    tracing.complete('consumer1', start, end, process='流', thread='consumer1', status='done')
+    tracing.write(log_dir)
+
+时间使用 time.time()，与 flows.json 的 start_time 相同。
+"""
+
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+
+TRACE_FILE = 'trace.json'
+MAIN_PROCESS = '仿真器'
+
+class Tracer:
+    """收集 trace event；每个 (process, thread) 对应 Perfetto 中的一条轨道"""
+
+    def __init__(self):
+        self.origin = time.time()
+        self.events = []
+        self._tracks = {}
+        self._processes = {}
+        self._lock = threading.Lock()
+
+    def _track(self, process, thread):
+        """返回 (pid, tid)，第一次使用时写入进程 / 线程名称的元数据"""
+        key = (process, thread)
+        with self._lock:
+            if key in self._tracks:
+                return self._tracks[key]
+            if process not in self._processes:
+                self._processes[process] = len(self._processes) + 1
+                self.events.append({'name': 'process_name', 'ph': 'M', 'pid': self._processes[process],
+                                    'tid': 0, 'args': {'name': process}})
+                self.events.append({'name': 'process_sort_index', 'ph': 'M', 'pid': self._processes[process],
+                                    'tid': 0, 'args': {'sort_index': self._processes[process]}})
+            pid = self._processes[process]
+            tid = sum(1 for p, _ in self._tracks if p == process) + 1
+            self._tracks[key] = (pid, tid)
+            self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                                'args': {'name': str(thread)}})
+            return pid, tid
+
+    def _timestamp(self, t):
+        return (t - self.origin) * 1e6
+
+    def complete(self, name, start, end, process=MAIN_PROCESS, thread=None, category='phase', **args):
+        """记录一个已结束的区间 (start / end 为 time.time() 时间戳)"""
+        pid, tid = self._track(process, thread or threading.current_thread().name)
+        self.events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': tid,
+                            'ts': self._timestamp(start), 'dur': max(0.0, (end - start) * 1e6),
+                            'args': args})
+
+    def instant(self, name, process=MAIN_PROCESS, thread=None, category='event', **args):
+        pid, tid = self._track(process, thread or threading.current_thread().name)
+        self.events.append({'name': name, 'cat': category, 'ph': 'i', 's': 't', 'pid': pid, 'tid': tid,
+                            'ts': self._timestamp(time.time()), 'args': args})
+
+    @contextmanager
+    def span(self, name, process=MAIN_PROCESS, thread=None, category='phase', **args):
+        """记录 with 块的执行时间；块内抛出异常时在 args 中记录异常"""
+        start = time.time()
+        try:
+            yield args
+        except BaseException as e:
+            args['error'] = repr(e)
+            raise
+        finally:
+            self.complete(name, start, time.time(), process, thread, category, **args)
+
+    def write(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, TRACE_FILE)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms',
+                       'otherData': {'origin': self.origin}}, f, ensure_ascii=False)
+        return path
+
+tracer = Tracer()
+
+def span(name, **kwargs):
+    return tracer.span(name, **kwargs)
+
+def complete(name, start, end, **kwargs):
+    tracer.complete(name, start, end, **kwargs)
+
+def instant(name, **kwargs):
+    tracer.instant(name, **kwargs)
+
+def write(directory):
+    return tracer.write(directory)